@@ -0,0 +1,26 @@
+# omnibot/_lazy.py
+"""Lazy package exports: names resolve on first attribute access, so importing a package stays cheap."""
+from __future__ import annotations
+import sys
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, Tuple[str, str]]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Module-level (__getattr__, __dir__) for `package`.
+    `exports` maps each public name to (relative module, attribute).
+    """
+    def __getattr__(name: str) -> Any:
+        try:
+            module, attr = exports[name]
+        except KeyError:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        value = getattr(import_module(module, package), attr)
+        setattr(sys.modules[package], name, value)   # later lookups skip __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted({*vars(sys.modules[package]), *exports})
+
+    return __getattr__, __dir__
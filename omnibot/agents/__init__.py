@@ -1,7 +1,14 @@
 """Agents and protocols."""
 
-from .protocols import AnswerAgent
-from .benefits_iq import BenefitsIQ
-from .claims_assist import ClaimsAssist
+from omnibot._lazy import lazy_exports
 
-__all__ = ["AnswerAgent", "BenefitsIQ", "ClaimsAssist"]
+_EXPORTS = {
+    "AnswerAgent": (".protocols", "AnswerAgent"),
+    "BenefitsIQ": (".benefits_iq", "BenefitsIQ"),
+    "ClaimsAssist": (".claims_assist", "ClaimsAssist"),
+    "get_agent": (".registry", "get_agent"),
+    "agent_stats": (".registry", "agent_stats"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -6,24 +6,24 @@ from typing import List, Tuple, Sequence, Dict, Any, Optional, AsyncIterator
 
 from langchain_chroma import Chroma
 from langchain.prompts import ChatPromptTemplate
-from langchain_ollama import OllamaLLM
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from omnibot.embeddings.openai_embedder import get_embedding_function
+from omnibot.clients.registry import get_ollama_llm, astream_limited, limiter
 from omnibot.config.constants import (
-    PDF_CHROMA_DIR, PDF_TOP_K, MAX_CHUNK_CHARS, HISTORY_TURNS, PDF_LLM_MODEL
+    PDF_CHROMA_DIR, PDF_TOP_K, MAX_CHUNK_CHARS, HISTORY_TURNS, PDF_LLM_MODEL, SHARED_INDEX, EMBED_MODEL
 )
 from omnibot.config.prompts import BENEFITS_TEMPLATE
-from .protocols import AnswerAgent
-import os
+from .protocols import AnswerAgent, History
+from .retrieval import search_by_vectors
 
 
 class BenefitsIQ(AnswerAgent):
     """
     Implements AnswerAgent protocol:
       - retrieve(question) -> (context_str, citations)
-      - astream_answer(question, history_messages, context?) -> async token stream
+      - astream_answer(question, history, context?) -> async token stream
       - count()
     """
 
@@ -41,17 +41,23 @@ class BenefitsIQ(AnswerAgent):
         self.max_chunk_chars = int(max_chunk_chars)
         self.history_turns = int(history_turns)
 
-        # Vector store
-        self.embeddings = get_embedding_function()
-        self.db = Chroma(persist_directory=self.chroma_path, embedding_function=self.embeddings)
+        # Vector store: shared mmap export (multi-worker hosts) or a private Chroma client
+        self.embed_model = EMBED_MODEL
+        self.embeddings = get_embedding_function(self.embed_model)
+        self.index = None
+        if SHARED_INDEX:
+            from omnibot.embeddings.shared_index import load_or_export
+            self.index = load_or_export(self.chroma_path, name="pdf")
+        self.db = None if self.index is not None else Chroma(
+            persist_directory=self.chroma_path, embedding_function=self.embeddings
+        )
 
         # LLM + prompt
         kwargs = dict(num_predict=256, temperature=0.2, keep_alive="10m")
         if llm_kwargs:
             kwargs.update(llm_kwargs)
-        self.llm = OllamaLLM(model=model_name, **kwargs)
-        # base_url = os.getenv("OLLAMA_BASE_URL", "http://ollama:11434")
-        # self.llm = OllamaLLM(model=model_name, base_url=base_url, **kwargs)
+        # shared client; base_url comes from OLLAMA_BASE_URL
+        self.llm = get_ollama_llm(model_name, **kwargs)
         self.prompt = ChatPromptTemplate.from_template(BENEFITS_TEMPLATE)
         self.parser = StrOutputParser()
         self.chain = self.prompt | self.llm | self.parser
@@ -61,7 +67,21 @@ class BenefitsIQ(AnswerAgent):
         """
         Return a compact context string and citations for the given question.
         """
-        results = self.db.similarity_search_with_score(question, k=self.k)
+        if self.index is not None:
+            results = self.index.search(self.embeddings.embed_query(question), self.k)
+        else:
+            results = self.db.similarity_search_with_score(question, k=self.k)
+        return self._format(results)
+
+    def retrieve_many(self, questions: Sequence[str], vectors=None) -> List[tuple[str, List[Dict[str, Any]]]]:
+        """Batch retrieve: one embedding call (skipped when `vectors` are given) and one vector query."""
+        if not questions:
+            return []
+        if vectors is None:
+            vectors = self.embeddings.embed_documents(list(questions))
+        return [self._format(hits) for hits in search_by_vectors(self.db, self.index, vectors, self.k)]
+
+    def _format(self, results) -> tuple[str, List[Dict[str, Any]]]:
         context_chunks: List[str] = []
         citations: List[Dict[str, Any]] = []
         for doc, score in results:
@@ -70,7 +90,7 @@ class BenefitsIQ(AnswerAgent):
             md = doc.metadata or {}
             citations.append(
                 {
-                    "id": md.get("id"),
+                    "id": md.get("id") or getattr(doc, "id", None),
                     "source": md.get("source"),
                     "page": md.get("page"),
                     "score": float(score),
@@ -128,13 +148,13 @@ class BenefitsIQ(AnswerAgent):
     async def astream_answer(
             self,
             query: str,
-            history_messages: Sequence[BaseMessage],
+            history: History,
             context: Optional[str] = None,
     ) -> AsyncIterator[str]:
         if context is None:
             context, _ = self.retrieve(query)
 
-        history_block = self.history_from_messages(history_messages)
+        history_block = history if isinstance(history, str) else self.history_from_messages(history)
         if not context.strip():
             yield "I couldn't find any relevant information in the provided documents."
             return
@@ -143,50 +163,50 @@ class BenefitsIQ(AnswerAgent):
 
         # Prefer native async if available (newer LangChain/Ollama builds)
         if hasattr(self.chain, "astream"):
-            async for tok in self.chain.astream(payload):
+            async for tok in astream_limited("ollama", self.chain, payload):
                 yield tok
             return
 
         # Proper fallback: stream in a background thread and forward to async generator
         loop = asyncio.get_running_loop()
         queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        stop = threading.Event()
 
         def producer():
             try:
-                for chunk in self.chain.stream(payload):
-                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
+                with limiter("ollama").slot():
+                    for chunk in self.chain.stream(payload):
+                        if stop.is_set():
+                            break  # consumer cancelled: closing the stream aborts the HTTP call
+                        asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
             finally:
                 # signal completion
                 asyncio.run_coroutine_threadsafe(queue.put(None), loop)
 
         threading.Thread(target=producer, daemon=True).start()
 
-        while True:
-            item = await queue.get()
-            if item is None:
-                break
-            yield item
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            stop.set()
 
     # --------- Helpers ----------
     def history_from_messages(self, messages: Sequence[BaseMessage]) -> str:
         """
         Build a short transcript from a sequence of messages.
-        Keeps the last N pairs (most recent first).
+        Keeps the last N pairs (most recent first); only the tail of `messages` is scanned.
         """
-        pairs: List[Tuple[str, str]] = []
-        last_user: Optional[str] = None
-        for m in messages:
-            if isinstance(m, HumanMessage):
-                last_user = m.content if isinstance(m.content, str) else str(m.content)
-            elif isinstance(m, AIMessage) and last_user is not None:
-                pairs.append((last_user, m.content if isinstance(m.content, str) else str(m.content)))
-                last_user = None
-        recent = pairs[-self.history_turns :]
-        lines = [f"User: {u}\nAssistant: {a}" for u, a in reversed(recent)]
-        return "\n\n".join(lines) if lines else "(none)"
+        from omnibot.graph.memory import memory_from_messages, render_history
+        return render_history(memory_from_messages(messages, self.history_turns))
 
     # --------- Protocol: Stats ----------
     def count(self) -> int:
+        if self.index is not None:
+            return len(self.index)
         try:
             return int(self.db._collection.count())
         except Exception:
@@ -88,22 +88,22 @@
 from __future__ import annotations
 import asyncio
 from typing import Optional, Sequence, AsyncIterator, List, Dict, Any
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 
-from omnibot.config.constants import CLAIMS_CHROMA_DIR, CLAIMS_TOP_K, CLAIMS_LLM_MODEL, EMBED_MODEL
-from .protocols import AnswerAgent
+from omnibot.config.constants import CLAIMS_CHROMA_DIR, CLAIMS_TOP_K, CLAIMS_LLM_MODEL, EMBED_MODEL, SHARED_INDEX
+from omnibot.clients.registry import get_embeddings, get_chat_openai, astream_limited
+from .protocols import AnswerAgent, History
+from .retrieval import search_by_vectors
 
 
 class ClaimsAssist(AnswerAgent):
     """
     Implements the AnswerAgent protocol:
       - retrieve(question) -> (context_str, citations)
-      - astream_answer(question, history_messages, context?) -> async token stream
+      - astream_answer(question, history, context?) -> async token stream
       - count()
     """
 
@@ -114,9 +114,22 @@ class ClaimsAssist(AnswerAgent):
         llm_model: str = CLAIMS_LLM_MODEL,
         k: int = CLAIMS_TOP_K,
     ):
-        self.emb = OpenAIEmbeddings(model=embed_model)
-        self.db = Chroma(persist_directory=persist_dir, embedding_function=self.emb)
-        self.retriever = self.db.as_retriever(search_kwargs={"k": int(k)})
+        self.embed_model = embed_model
+        self.k = int(k)
+        self.emb = get_embeddings(embed_model)
+        # shared mmap export (multi-worker hosts) or a private Chroma client
+        self.index = None
+        if SHARED_INDEX:
+            from omnibot.embeddings.shared_index import load_or_export
+            self.index = load_or_export(persist_dir, name="claims")
+        if self.index is not None:
+            self.db = None
+            self.retriever = RunnableLambda(
+                lambda q: [doc for doc, _ in self.index.search(self.emb.embed_query(q), int(k))]
+            )
+        else:
+            self.db = Chroma(persist_directory=persist_dir, embedding_function=self.emb)
+            self.retriever = self.db.as_retriever(search_kwargs={"k": int(k)})
 
         def format_docs(docs):
             return "\n\n".join(
@@ -130,11 +143,12 @@ class ClaimsAssist(AnswerAgent):
             ("system",
              "You are a helpful claims assistant. Use the claims context to answer precisely. "
              "Do simple totals or calculations from the context when obvious."),
-            ("human", "Question: {question}\n\nContext:\n{context}")
+            ("human", "Chat history (most recent first):\n{history}\n\n"
+                      "Question: {question}\n\nContext:\n{context}")
         ])
 
         # streaming must be True to support astream_answer
-        self.llm = ChatOpenAI(model=llm_model, temperature=0, streaming=True)
+        self.llm = get_chat_openai(llm_model, temperature=0, streaming=True)
         self.parser = StrOutputParser()
 
         # RAG chain (does its own retrieval)
@@ -142,6 +156,7 @@ class ClaimsAssist(AnswerAgent):
             {
                 "context": self.retriever | self._format_docs,
                 "question": RunnablePassthrough(),
+                "history": lambda _: "(none)",
             }
             | self.prompt
             | self.llm
@@ -154,7 +169,18 @@ class ClaimsAssist(AnswerAgent):
     # ---- AnswerAgent: retrieve ----
     def retrieve(self, question: str) -> tuple[str, List[Dict[str, Any]]]:
         # sync API required by protocol
-        docs = self.retriever.invoke(question)
+        return self._format(self.retriever.invoke(question))
+
+    def retrieve_many(self, questions: Sequence[str], vectors=None) -> List[tuple[str, List[Dict[str, Any]]]]:
+        """Batch retrieve: one embedding call (skipped when `vectors` are given) and one vector query."""
+        if not questions:
+            return []
+        if vectors is None:
+            vectors = self.emb.embed_documents(list(questions))
+        hits = search_by_vectors(self.db, self.index, vectors, self.k)
+        return [self._format([doc for doc, _ in row]) for row in hits]
+
+    def _format(self, docs) -> tuple[str, List[Dict[str, Any]]]:
         context = self._format_docs(docs)
         citations = []
         for d in docs:
@@ -162,7 +188,7 @@ class ClaimsAssist(AnswerAgent):
             citations.append({
                 "source": md.get("source", "unknown"),
                 "page": md.get("page"),
-                "id": md.get("id"),
+                "id": md.get("id") or getattr(d, "id", None),
             })
         return context, citations
 
@@ -170,25 +196,31 @@ class ClaimsAssist(AnswerAgent):
     async def astream_answer(
         self,
         question: str,
-        history_messages: Sequence[BaseMessage],
+        history: History,
         context: Optional[str] = None,
     ) -> AsyncIterator[str]:
-        # We ignore history for now, but keepING the arg for API parity.
         if context is None:
-            # Let the chain handle retrieval internally
-            async for chunk in self.rag_chain.astream(question):
-                yield chunk
-            return
+            loop = asyncio.get_running_loop()
+            context, _ = await loop.run_in_executor(None, lambda: self.retrieve(question))
 
         if not context.strip():
             yield "I couldn't find that in the provided claims."
             return
 
-        async for chunk in self.gen_chain.astream({"question": question, "context": context}):
+        if isinstance(history, str):
+            history_block = history
+        else:
+            from omnibot.graph.memory import memory_from_messages, render_history
+            history_block = render_history(memory_from_messages(history))
+
+        payload = {"question": question, "context": context, "history": history_block}
+        async for chunk in astream_limited("openai-chat", self.gen_chain, payload):
             yield chunk
 
     # ---- Optional utility ----
     def count(self) -> int:
+        if self.index is not None:
+            return len(self.index)
         try:
             return int(self.db._collection.count())
         except Exception:
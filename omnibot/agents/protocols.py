@@ -1,7 +1,10 @@
 from __future__ import annotations
-from typing import Protocol, Sequence, Dict, Any, List, Optional, AsyncIterator, runtime_checkable
+from typing import Protocol, Sequence, Dict, Any, List, Optional, AsyncIterator, Union, runtime_checkable
 from langchain_core.messages import BaseMessage
 
+# Either a pre-rendered history block (see omnibot.graph.memory) or raw messages
+History = Union[str, Sequence[BaseMessage]]
+
 @runtime_checkable
 class AnswerAgent(Protocol):
     def retrieve(self, question: str) -> tuple[str, List[Dict[str, Any]]]:
@@ -12,7 +15,7 @@ class AnswerAgent(Protocol):
     async def astream_answer(
     self,
     question: str,
-    history_messages: Sequence[BaseMessage],
+    history: History,
     context: Optional[str] = None,
     ) -> AsyncIterator[str]:
         """Yield answer tokens. If context is None, do internal retrieval."""
@@ -0,0 +1,79 @@
+# omnibot/agents/registry.py
+"""
+Process-wide agent registry.
+
+Each agent (its Chroma client, HNSW segments and LLM clients) is built once per
+process on first use and shared by the graph nodes and the direct streaming path.
+Construction time and the resident-memory delta are recorded per agent.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from .protocols import AnswerAgent
+
+
+def _build_pdf() -> AnswerAgent:
+    from .benefits_iq import BenefitsIQ
+    return BenefitsIQ()
+
+
+def _build_claims() -> AnswerAgent:
+    from .claims_assist import ClaimsAssist
+    return ClaimsAssist()
+
+
+# name -> factory (imports deferred until the agent is first needed)
+AGENT_FACTORIES: Dict[str, Callable[[], AnswerAgent]] = {
+    "pdf": _build_pdf,
+    "claims": _build_claims,
+}
+
+_lock = threading.Lock()
+_build_locks: Dict[str, threading.Lock] = {}
+_agents: Dict[str, AnswerAgent] = {}
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+
+
+def get_agent(name: str) -> AnswerAgent:
+    """The shared instance for `name` ("pdf" | "claims"), built on first use."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    if name not in AGENT_FACTORIES:
+        raise KeyError(f"unknown agent: {name!r}")
+    with _lock:
+        build_lock = _build_locks.setdefault(name, threading.Lock())
+    # per-agent lock: a slow Chroma load doesn't hold up the other agent
+    with build_lock:
+        agent = _agents.get(name)
+        if agent is None:
+            rss0, t0 = rss_bytes(), time.perf_counter()
+            agent = AGENT_FACTORIES[name]()
+            _stats[name] = {
+                "name": name,
+                "class": type(agent).__name__,
+                "build_seconds": round(time.perf_counter() - t0, 4),
+                "rss_delta_bytes": rss_bytes() - rss0,
+                "built_at": time.time(),
+            }
+            _agents[name] = agent
+        return agent
+
+
+def agent_stats() -> List[Dict[str, Any]]:
+    """Construction cost of every agent built so far, plus current process RSS."""
+    rss = rss_bytes()
+    return [{**s, "process_rss_bytes": rss} for s in _stats.values()]
@@ -0,0 +1,23 @@
+# omnibot/agents/retrieval.py
+"""Batched vector queries shared by the agents (used by /chat/batch)."""
+from __future__ import annotations
+from typing import List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+Hit = Tuple[Document, float]
+
+
+def search_by_vectors(db, index, vectors: Sequence[Sequence[float]], k: int) -> List[List[Hit]]:
+    """
+    Top-k (Document, distance) per query vector: a single mat-mul on the shared mmap
+    index, or Chroma's public by-vector search per query (no re-embedding either way).
+    """
+    if not len(vectors):
+        return []
+    if index is not None:
+        return index.search_many(vectors, k)
+    return [
+        db.similarity_search_by_vector_with_relevance_scores([float(x) for x in v], k=k)
+        for v in vectors
+    ]
@@ -0,0 +1,140 @@
+# omnibot/api/admission.py
+"""
+Admission control for the answer paths.
+
+At most `max_active` agent runs (retrieval + LLM generation) execute at once; up to
+`max_queue` more wait in a priority queue for at most `max_wait_s`. Anything beyond
+that is shed immediately with a Retry-After estimate (429 on /chat, a `busy` SSE
+event on /chat/stream), so a spike degrades into fast refusals instead of every
+request slowing down until it times out.
+
+Greeting and guardrail replies never take a slot: they cost no LLM call.
+"""
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from omnibot.config.constants import ADMISSION_MAX_ACTIVE, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_S
+
+# lower value = served first
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BATCH = 2
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason            # queue_full | timeout
+        self.retry_after = retry_after  # seconds
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_active: int = ADMISSION_MAX_ACTIVE,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait_s: float = ADMISSION_MAX_WAIT_S,
+    ):
+        self.max_active = max(1, int(max_active))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait_s = float(max_wait_s)
+        self._active = 0
+        self._waiting = 0
+        self._heap: List[list] = []     # [priority, seq, future]
+        self._seq = itertools.count()
+        # stats
+        self._admitted = 0
+        self._shed = {"queue_full": 0, "timeout": 0}
+        self._peak_queue = 0
+        self._wait_total = 0.0
+        self._hold_ewma = 2.0           # seconds per admitted run, seeds Retry-After
+
+    # ---------- admission ----------
+    def retry_after(self) -> float:
+        """Rough time until a slot frees for a new arrival."""
+        backlog = self._waiting + 1
+        return self._hold_ewma * backlog / self.max_active
+
+    def check(self) -> None:
+        """Shed immediately (before any work) when the queue is already full."""
+        if self._active >= self.max_active and self._waiting >= self.max_queue:
+            self._shed["queue_full"] += 1
+            raise Overloaded("queue_full", self.retry_after())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, max_wait_s: Optional[float] = None) -> float:
+        """Wait for a slot (up to `max_wait_s`, default the controller's); returns the admission timestamp. Raises Overloaded."""
+        t0 = time.perf_counter()
+        if self._active < self.max_active and not self._waiting:
+            self._active += 1
+            self._admitted += 1
+            return t0
+        self.check()
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, [priority, next(self._seq), fut])
+        self._waiting += 1
+        self._peak_queue = max(self._peak_queue, self._waiting)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=self.max_wait_s if max_wait_s is None else max_wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # granted just as we gave up: hand the slot straight on
+                self.release(t0)
+            else:
+                fut.cancel()
+                self._waiting -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._shed["timeout"] += 1
+            raise Overloaded("timeout", self.retry_after()) from None
+        now = time.perf_counter()
+        self._admitted += 1
+        self._wait_total += now - t0
+        return now
+
+    def release(self, admitted_at: Optional[float] = None) -> None:
+        if admitted_at is not None:
+            held = time.perf_counter() - admitted_at
+            self._hold_ewma = 0.9 * self._hold_ewma + 0.1 * held
+        while self._heap:
+            _, _, fut = heapq.heappop(self._heap)
+            if fut.done():      # waiter timed out / was cancelled
+                continue
+            self._waiting -= 1
+            fut.set_result(None)
+            return              # slot handed over; active count unchanged
+        self._active -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_INTERACTIVE):
+        admitted_at = await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    # ---------- stats ----------
+    def snapshot(self) -> Dict[str, Any]:
+        admitted = self._admitted
+        return {
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "peak_queue_depth": self._peak_queue,
+            "admitted": admitted,
+            "shed": dict(self._shed),
+            "wait_avg_ms": (self._wait_total / admitted * 1000.0) if admitted else 0.0,
+            "hold_avg_s": round(self._hold_ewma, 3),
+            "retry_after_s": round(self.retry_after(), 2),
+        }
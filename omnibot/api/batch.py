@@ -0,0 +1,247 @@
+# omnibot/api/batch.py
+"""
+/chat/batch: many questions per request, results streamed back as NDJSON.
+
+Items are processed in chunks of `_CHUNK`:
+
+  1. guardrail + route for the whole chunk from ONE embedding call
+     (FusedClassifier.classify_many); guardrail replies are emitted right away
+  2. retrieval per agent with ONE vector query for all items routed to it, reusing
+     the guardrail vectors when the agent embeds with the same model
+  3. generation per item, at most `concurrency` at once per batch and each behind an
+     admission slot at batch priority (interactive traffic is served first)
+
+The next chunk is prepared while the previous one generates, so the LLM backend is
+the bottleneck rather than HTTP round-trips. Items that share a thread_id run one at
+a time in submission order and read/persist that thread's memory; items without a
+thread_id are stateless (no checkpoint reads or writes).
+
+One JSON object per line, in completion order:
+
+  {"index", "id", "thread_id", "intent", "route", "answer", "citations", "elapsed_ms", "error"}
+
+followed by a final {"done": true, ...} summary line.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+from omnibot.agents.protocols import AnswerAgent
+from omnibot.config.constants import BATCH_CONCURRENCY, BATCH_MAX_WAIT_S
+from omnibot.graph.graph_builder import compose_answer
+from omnibot.graph.memory import memory_for_state, memory_turn, render_history
+from omnibot.guardrails.messages import guardrail_reply
+from .admission import AdmissionController, Overloaded, PRIORITY_BATCH
+from .metrics import observe_generation, observe_request, observe_stage
+
+_CHUNK = 64
+_AGENTS_FOR_ROUTE = {"pdf": ("pdf",), "claims": ("claims",), "both": ("pdf", "claims")}
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _line(obj: Dict[str, Any]) -> bytes:
+    return _dumps(obj).encode("utf-8") + b"\n"
+
+
+async def run_batch(
+    items: Sequence[Dict[str, Any]],
+    *,
+    classifier,
+    agents: Dict[str, AnswerAgent],
+    graph,
+    admission: AdmissionController,
+    prepare_context: Callable[[str], str],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> AsyncIterator[bytes]:
+    """
+    `items` are {"text", "thread_id", "id"} dicts. `prepare_context` is applied to each
+    retrieved context before generation (member profile injection).
+    """
+    t_batch = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    limit = max(1, int(concurrency))
+    sem = asyncio.Semaphore(limit)
+    thread_locks: Dict[str, asyncio.Lock] = {}
+    results: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+    running: set = set()
+    starts: List[float] = [0.0] * len(items)
+
+    def _emit(i: int, **fields: Any) -> None:
+        item = items[i]
+        elapsed = time.perf_counter() - starts[i]
+        res = {
+            "index": i,
+            "id": item.get("id"),
+            "thread_id": item.get("thread_id"),
+            "intent": fields.pop("intent", None),
+            "route": fields.pop("route", None),
+            "answer": fields.pop("answer", ""),
+            "citations": fields.pop("citations", {}),
+            "elapsed_ms": round(elapsed * 1000.0, 1),
+            "error": fields.pop("error", None),
+            **fields,
+        }
+        if res["error"] is None:
+            observe_request("batch", res["route"] or "guardrail", elapsed)
+        results.put_nowait(res)
+
+    def _retrieval_vectors(agent: AnswerAgent, idx: List[int], vectors) -> Optional[list]:
+        # guardrail vectors are only valid for agents that embed with the same model
+        if getattr(agent, "embed_model", None) != classifier.cfg.embed_model:
+            return None
+        picked = [vectors[i] for i in idx]
+        return None if any(v is None for v in picked) else picked
+
+    async def _generate(i: int, route: str, contexts: Dict[str, tuple]) -> None:
+        item = items[i]
+        tid = item.get("thread_id")
+        text = item["text"]
+        lock = thread_locks.setdefault(tid, asyncio.Lock()) if tid else None
+        held = False
+        try:
+            if lock is not None:
+                await lock.acquire()
+                held = True
+            async with sem:
+                admitted_at = await admission.acquire(PRIORITY_BATCH, max_wait_s=BATCH_MAX_WAIT_S)
+                try:
+                    config = {"configurable": {"thread_id": tid}}
+                    memory = None
+                    history = ""
+                    if tid:
+                        snapshot = await graph.aget_state(config)
+                        memory = memory_for_state(snapshot.values or {})
+                        history = render_history(memory)
+
+                    async def _answer(name: str) -> str:
+                        ctx, _ = contexts[name]
+                        parts: List[str] = []
+                        t_gen, first = time.perf_counter(), 0.0
+                        async for tok in agents[name].astream_answer(text, history, context=prepare_context(ctx)):
+                            if not parts:
+                                first = time.perf_counter() - t_gen
+                            parts.append(tok)
+                        observe_generation(route, name, first, time.perf_counter() - t_gen, len(parts))
+                        return "".join(parts)
+
+                    names = list(contexts)
+                    outs = await asyncio.gather(*(_answer(n) for n in names))
+                    answer = compose_answer(route, dict(zip(names, outs)))
+                    if tid:
+                        await graph.aupdate_state(
+                            config,
+                            {
+                                "messages": [HumanMessage(content=text), AIMessage(content=answer)],
+                                "memory": memory_turn(text, answer, memory),
+                                "route": route,
+                            },
+                            as_node="combine",
+                        )
+                finally:
+                    admission.release(admitted_at)
+            _emit(i, intent="in_scope", route=route, answer=answer,
+                  citations={n: contexts[n][1] for n in names})
+        except Overloaded as e:
+            _emit(i, intent="in_scope", route=route, error="busy", retry_after=e.retry_after)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _emit(i, intent="in_scope", route=route, error=f"{type(e).__name__}: {e}")
+        finally:
+            if held:
+                lock.release()
+
+    async def _prepare(chunk: List[int]) -> None:
+        now = time.perf_counter()
+        for i in chunk:
+            starts[i] = now
+        try:
+            decisions, vectors = await classifier.classify_many([items[i]["text"] for i in chunk])
+        except Exception as e:
+            for i in chunk:
+                _emit(i, error=f"{type(e).__name__}: {e}")
+            return
+
+        # ---- guardrail replies (no LLM call) ----
+        routed: Dict[int, str] = {}
+        for i, d in zip(chunk, decisions):
+            if d.intent != "in_scope":
+                _emit(i, intent=d.intent, answer=guardrail_reply(d.intent) or "")
+            elif d.route not in _AGENTS_FOR_ROUTE:
+                _emit(i, intent=d.intent, route=d.route, error="no_route")
+            else:
+                routed[i] = d.route
+        vec_of = {i: v for i, v in zip(chunk, vectors)}
+
+        # ---- one batched retrieval per agent ----
+        contexts: Dict[int, Dict[str, tuple]] = {i: {} for i in routed}
+        for name, agent in agents.items():
+            idx = [i for i, r in routed.items() if name in _AGENTS_FOR_ROUTE[r]]
+            if not idx:
+                continue
+            qs = [items[i]["text"] for i in idx]
+            vecs = _retrieval_vectors(agent, idx, vec_of)
+            t_ret = time.perf_counter()
+            try:
+                if hasattr(agent, "retrieve_many"):
+                    rows = await loop.run_in_executor(None, lambda: agent.retrieve_many(qs, vecs))
+                else:
+                    rows = await asyncio.gather(*(loop.run_in_executor(None, agent.retrieve, q) for q in qs))
+            except Exception as e:
+                for i in idx:
+                    route = routed.pop(i, None)
+                    if route is not None:
+                        _emit(i, intent="in_scope", route=route, error=f"{type(e).__name__}: {e}")
+                continue
+            # same stage metric as the stream path; every item waited for the whole batched query
+            elapsed = time.perf_counter() - t_ret
+            for i, row in zip(idx, rows):
+                if i in routed:
+                    contexts[i][name] = row
+                    observe_stage("retrieve", elapsed, routed[i], name)
+
+        # ---- generation (bounded by `sem` and admission) ----
+        for i, route in routed.items():
+            task = asyncio.create_task(_generate(i, route, contexts[i]))
+            running.add(task)
+            task.add_done_callback(running.discard)
+
+    async def _drive() -> None:
+        try:
+            for start in range(0, len(items), _CHUNK):
+                # keep at most a couple of chunks of retrieved context in memory
+                while len(running) >= max(_CHUNK, 2 * limit):
+                    await asyncio.wait(set(running), return_when=asyncio.FIRST_COMPLETED)
+                await _prepare(list(range(start, min(start + _CHUNK, len(items)))))
+            while running:
+                await asyncio.wait(set(running))
+        finally:
+            results.put_nowait(None)
+
+    driver = asyncio.create_task(_drive())
+    done = errors = 0
+    try:
+        while True:
+            res = await results.get()
+            if res is None:
+                break
+            done += 1
+            errors += res["error"] is not None
+            yield _line(res)
+        yield _line({
+            "done": True,
+            "items": len(items),
+            "completed": done,
+            "errors": errors,
+            "elapsed_ms": round((time.perf_counter() - t_batch) * 1000.0, 1),
+        })
+    finally:
+        # client went away (or the batch finished): stop everything still running
+        driver.cancel()
+        for t in list(running):
+            t.cancel()
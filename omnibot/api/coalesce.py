@@ -0,0 +1,144 @@
+# omnibot/api/coalesce.py
+"""
+Single-flight coalescing of identical in-flight agent runs.
+
+When many members ask the same question at once, the first request (leader) runs
+retrieval + generation; every concurrent request with the same key joins that
+flight instead. Events are buffered, so a late joiner first replays the prefix and
+then follows the live token stream.
+
+Flights are reference-counted: when the last subscriber goes away (client
+disconnected) the producer task is cancelled, which aborts the upstream LLM stream.
+If the producer fails, each subscriber gets its own FlightFailed chained to the
+producer's exception, so no exception (or traceback) object is shared between tasks.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+Event = Dict[str, Any]
+Publish = Callable[[Event], None]
+Producer = Callable[[Publish], Awaitable[None]]
+
+_WS = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?!.。]+$")
+
+
+def normalize_question(text: str) -> str:
+    return _TRAILING.sub("", _WS.sub(" ", (text or "").strip().lower()))
+
+
+def scope_key(*parts: str) -> str:
+    """Short digest of everything besides the question that shapes the answer."""
+    h = hashlib.sha1()
+    for p in parts:
+        h.update((p or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+class FlightFailed(RuntimeError):
+    """The shared producer of a flight raised; `__cause__` is its exception."""
+
+
+class Flight:
+    """One running producer whose events are buffered and fanned out."""
+
+    def __init__(self, key: Optional[Hashable], on_leave: Optional[Callable[["Flight"], None]] = None):
+        self.key = key
+        self._on_leave = on_leave
+        self.events: List[Event] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, ev: Event) -> None:
+        self.events.append(ev)
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def stream(self) -> AsyncIterator[Event]:
+        """Replay the buffered prefix, then follow live events until the producer ends."""
+        self.subscribers += 1
+        try:
+            i = 0
+            while True:
+                while i < len(self.events):
+                    yield self.events[i]
+                    i += 1
+                if self.done:
+                    if isinstance(self.error, asyncio.CancelledError):
+                        raise asyncio.CancelledError() from self.error
+                    if self.error is not None:
+                        raise FlightFailed(f"{type(self.error).__name__}: {self.error}") from self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self._on_leave is not None:
+                self._on_leave(self)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self.leaders = 0
+        self.joiners = 0
+        self.cancelled = 0          # flights abandoned by every subscriber
+        self.cancelled_tokens = 0   # tokens those flights had generated before the cancel
+
+    def join(self, key: Optional[Hashable], producer: Producer) -> Tuple[AsyncIterator[Event], bool]:
+        """
+        Subscribe to the flight for `key`, starting `producer` if none is running.
+        Returns (event stream, is_leader). A key of None always runs a private flight.
+        """
+        flight = self._flights.get(key) if key is not None else None
+        leader = flight is None
+        if leader:
+            flight = Flight(key, on_leave=self._leave)
+            if key is not None:
+                self._flights[key] = flight
+                self.leaders += 1
+            flight.task = asyncio.create_task(self._run(flight, producer))
+        else:
+            self.joiners += 1
+        return flight.stream(), leader
+
+    def _leave(self, flight: Flight) -> None:
+        if flight.subscribers > 0 or flight.done or flight.task is None:
+            return
+        # nobody is listening any more: stop generating (cancels the upstream HTTP stream)
+        if flight.key is not None and self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        flight.task.cancel()
+        self.cancelled += 1
+        self.cancelled_tokens += sum(1 for ev in flight.events if ev.get("kind") == "token")
+
+    async def _run(self, flight: Flight, producer: Producer) -> None:
+        try:
+            await producer(flight.publish)
+        except BaseException as e:  # surfaced to every subscriber
+            flight.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            flight.done = True
+            flight._notify()
+            if flight.key is not None and self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "joiners": self.joiners,
+            "cancelled": self.cancelled,
+            "cancelled_tokens": self.cancelled_tokens,
+        }
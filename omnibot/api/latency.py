@@ -0,0 +1,82 @@
+# omnibot/api/latency.py
+"""Rolling time-to-first-citation / time-to-first-token stats per pipeline mode, plus disconnect counters."""
+from __future__ import annotations
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+_WINDOW = 512
+
+
+def _pct(sorted_vals: list[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(p * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+class LatencyStats:
+    """Keeps the last `window` samples of each (mode, metric) and summarizes them."""
+
+    METRICS = ("ttfc", "ttft", "total")
+
+    def __init__(self, window: int = _WINDOW):
+        self._lock = threading.Lock()
+        self._window = window
+        self._samples: Dict[str, Dict[str, Deque[float]]] = {}
+
+    def record(self, mode: str, **values: Optional[float]) -> None:
+        with self._lock:
+            per_mode = self._samples.setdefault(
+                mode, {m: deque(maxlen=self._window) for m in self.METRICS}
+            )
+            for metric, v in values.items():
+                if v is not None and metric in per_mode:
+                    per_mode[metric].append(float(v))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            snap = {mode: {m: sorted(d) for m, d in per.items()} for mode, per in self._samples.items()}
+        out: Dict[str, Any] = {}
+        for mode, per in snap.items():
+            out[mode] = {
+                m: {
+                    "n": len(vals),
+                    "p50_ms": _pct(vals, 0.50) * 1000.0,
+                    "p95_ms": _pct(vals, 0.95) * 1000.0,
+                    "mean_ms": (sum(vals) / len(vals) * 1000.0) if vals else 0.0,
+                }
+                for m, vals in per.items()
+            }
+        # gain of speculative over sequential (positive = faster), on p50
+        if "speculative" in out and "sequential" in out:
+            out["gain_ms"] = {
+                m: out["sequential"][m]["p50_ms"] - out["speculative"][m]["p50_ms"]
+                for m in self.METRICS
+                if out["sequential"][m]["n"] and out["speculative"][m]["n"]
+            }
+        return out
+
+
+class CancelStats:
+    """Streams the client abandoned mid-answer and the agent work cancelled with them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.agents_cancelled = 0
+        self.tokens_sent = 0
+
+    def record(self, *, tokens_sent: int, agents_cancelled: int) -> None:
+        with self._lock:
+            self.streams += 1
+            self.tokens_sent += tokens_sent
+            self.agents_cancelled += agents_cancelled
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "agents_cancelled": self.agents_cancelled,
+                "tokens_sent_before_disconnect": self.tokens_sent,
+            }
@@ -0,0 +1,165 @@
+# omnibot/api/metrics.py
+"""
+Per-stage latency histograms and counters, exposed at /metrics in the Prometheus
+text format (0.0.4).
+
+Stages of one answer:  guardrail -> route -> retrieve (per agent) -> generate (per agent),
+plus time-to-first-token, tokens/sec per agent and total time per path
+(stream | chat | batch). Everything is labelled by route and, where it applies, agent.
+
+A small in-process registry instead of prometheus_client: recording is a dict lookup,
+a bisect and two additions under a lock, and rendering happens only on scrape.
+Counts are per worker process; scrape each worker (or aggregate in Prometheus).
+"""
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1.0, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0, 320.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+def _le(bound: float) -> str:
+    return 'le="' + _num(bound) + '"'
+
+
+_INF = 'le="+Inf"'
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, v in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # per label set: [count per bucket (non-cumulative) ..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, s in items:
+            cum = 0.0
+            for le, c in zip(self.buckets, s):
+                cum += c
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, _le(le))} {_num(cum)}")
+            cum += s[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, _INF)} {_num(cum)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(s[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_num(cum)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[object] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        m = Counter(name, help, labelnames)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        m = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ---------- pipeline metrics ----------
+STAGE_SECONDS = REGISTRY.histogram(
+    "omnibot_stage_seconds", "Time spent per pipeline stage.", ("stage", "route", "agent"))
+TTFT_SECONDS = REGISTRY.histogram(
+    "omnibot_time_to_first_token_seconds", "Request start to first answer token.", ("path", "route"))
+TOTAL_SECONDS = REGISTRY.histogram(
+    "omnibot_request_seconds", "Request start to final answer.", ("path", "route"))
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "omnibot_tokens_per_second", "Generation throughput per agent run (after the first token).",
+    ("route", "agent"), buckets=RATE_BUCKETS)
+TOKENS = REGISTRY.counter("omnibot_tokens_total", "Answer tokens generated.", ("route", "agent"))
+REQUESTS = REGISTRY.counter("omnibot_requests_total", "Answered requests.", ("path", "route"))
+
+
+def observe_stage(stage: str, seconds: float, route: str = "", agent: str = "") -> None:
+    STAGE_SECONDS.observe(seconds, stage, route, agent)
+
+
+def observe_decision(decision, route: str = "") -> None:
+    """guardrail / route stage times carried on a FusedClassifier Decision."""
+    route = route or decision.route or decision.intent
+    for stage, seconds in decision.timings.items():
+        STAGE_SECONDS.observe(seconds, stage, route, "")
+
+
+def observe_generation(route: str, agent: str, first_token_s: float, last_token_s: float, tokens: int) -> None:
+    """One agent's generation: prompt-to-last-token time and post-first-token throughput."""
+    STAGE_SECONDS.observe(last_token_s, "generate", route, agent)
+    if tokens:
+        TOKENS.inc(route, agent, amount=tokens)
+    if tokens > 1 and last_token_s > first_token_s:
+        TOKENS_PER_SECOND.observe((tokens - 1) / (last_token_s - first_token_s), route, agent)
+
+
+def observe_request(path: str, route: str, total_s: float, ttft_s: Optional[float] = None) -> None:
+    REQUESTS.inc(path, route)
+    TOTAL_SECONDS.observe(total_s, path, route)
+    if ttft_s is not None:
+        TTFT_SECONDS.observe(ttft_s, path, route)
+
+
+def render() -> str:
+    return REGISTRY.render()
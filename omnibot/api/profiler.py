@@ -0,0 +1,152 @@
+# omnibot/api/profiler.py
+"""
+Opt-in sampling profiler for a single request.
+
+A request is profiled at random with probability RAG_PROFILE_SAMPLE_RATE, or when it
+carries `X-Omnibot-Profile: <RAG_PROFILE_TOKEN>` (the header is ignored while no token
+is configured, so clients can't force profiles on their own). While it runs, a background thread samples the
+stacks of the event-loop thread and the default executor threads (where retrieval
+runs) every RAG_PROFILE_INTERVAL_MS via sys._current_frames(). When the request ends,
+that thread writes the samples as collapsed stacks to RAG_PROFILE_DIR:
+
+    <thread name>;<outer frame>;...;<leaf frame> <count>
+
+which flamegraph.pl, speedscope or inferno render directly. Only the newest
+RAG_PROFILE_MAX_FILES profiles are kept; older ones are deleted after each write. Idle samples (loop in
+select(), pool workers waiting for work) are dropped, so the graph shows where the
+CPU actually went.
+
+The loop thread is shared, so a profile covers everything the worker did while the
+request was open; profile under low traffic (or accept the noise) for clean output.
+At most one profile runs per process; other requests are not profiled meanwhile.
+When nothing is profiled the cost is a header lookup and one random() call.
+"""
+from __future__ import annotations
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from omnibot.config.constants import (
+    PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS, PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_TOKEN,
+)
+
+_MAX_DEPTH = 128
+_slot = threading.Lock()          # one active profile per process
+_labels: Dict[object, str] = {}   # code object -> frame label
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename.replace("\\", "/")
+        i = path.rfind("/omnibot/")
+        short = path[i + 1:] if i >= 0 else path.rsplit("/", 1)[-1]
+        name = getattr(code, "co_qualname", code.co_name)
+        label = _labels.setdefault(code, f"{name} ({short})".replace(";", ":"))
+    return label
+
+
+def _idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_name == "select" and code.co_filename.endswith("selectors.py")) or \
+           (code.co_name == "_worker" and code.co_filename.endswith("thread.py"))
+
+
+class Profile:
+    def __init__(self, path: Path, interval_s: float, loop_thread: int):
+        self.path = path
+        self.interval_s = max(0.001, interval_s)
+        self.loop_thread = loop_thread
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._names: Dict[int, str] = {}   # sampled threads
+        self._seen: set = set()             # every thread ident known at the last refresh
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="omnibot-profiler", daemon=True)
+
+    def start(self) -> "Profile":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Non-blocking: the sampler thread writes the file and releases the slot."""
+        self._stop.set()
+
+    def _refresh_names(self) -> None:
+        threads = threading.enumerate()
+        self._seen = {t.ident for t in threads}
+        self._names = {
+            t.ident: t.name for t in threads
+            if t.ident == self.loop_thread or t.name.startswith(("ThreadPoolExecutor", "asyncio"))
+        }
+
+    def _run(self) -> None:
+        try:
+            self._refresh_names()
+            while not self._stop.wait(self.interval_s):
+                frames = sys._current_frames()
+                if not self._seen.issuperset(frames):
+                    self._refresh_names()
+                for tid, frame in frames.items():
+                    name = self._names.get(tid)
+                    if name is None or _idle(frame):
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < _MAX_DEPTH:
+                        stack.append(_label(frame.f_code))
+                        frame = frame.f_back
+                    stack.append("loop" if tid == self.loop_thread else name)
+                    self.counts[";".join(reversed(stack))] += 1
+                self.samples += 1
+            self._write()
+        finally:
+            _slot.release()
+
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.counts.items()):
+                f.write(f"{stack} {n}\n")
+        os.replace(tmp, self.path)
+        _prune(self.path.parent, PROFILE_MAX_FILES)
+
+
+def _prune(directory: Path, keep: int) -> None:
+    """Delete all but the newest `keep` profiles (keep <= 0: keep all)."""
+    if keep <= 0:
+        return
+    files = sorted(directory.glob("*.collapsed"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[keep:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+def _wanted(headers: Mapping[str, str]) -> bool:
+    forced = headers.get("x-omnibot-profile", "").strip()
+    if forced and PROFILE_TOKEN and hmac.compare_digest(forced.encode(), PROFILE_TOKEN.encode()):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def maybe_profile(headers: Mapping[str, str], tag: str = "") -> Optional[Profile]:
+    """Start a profile for this request if it's requested/sampled and none is running. Call on the loop thread."""
+    if not _wanted(headers) or not _slot.acquire(blocking=False):
+        return None
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    name = f"{stamp}-{os.getpid()}-{_SAFE.sub('_', tag)[:64] or 'request'}.collapsed"
+    try:
+        return Profile(Path(PROFILE_DIR) / name, PROFILE_INTERVAL_MS / 1000.0, threading.get_ident()).start()
+    except Exception:
+        _slot.release()
+        raise
@@ -3,22 +3,35 @@
 from __future__ import annotations
 import json, uuid, asyncio
 import re
+import time
 from dataclasses import dataclass
-from typing import Optional, AsyncIterator
+from typing import Any, Awaitable, Callable, List, Mapping, Optional, AsyncIterator
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 
-from omnibot.graph.graph_builder import build_graph_async
-from omnibot.guardrails.intent_semantic import IntentClassifier, IntentConfig
+from omnibot.graph.graph_builder import compose_answer
+from omnibot.graph.memory import memory_for_state, memory_turn, render_history
 from omnibot.guardrails.messages import guardrail_reply
-from omnibot.router.router import fast_route
-from omnibot.agents.benefits_iq import BenefitsIQ
-from omnibot.agents.claims_assist import ClaimsAssist
 from omnibot.agents.protocols import AnswerAgent
+from omnibot.agents.registry import get_agent, agent_stats
+from omnibot.clients.registry import backend_stats, aclose_all
+from omnibot.config.constants import (
+    SPECULATIVE_RETRIEVAL, ROUTER_MODE, COALESCE_REQUESTS, SSE_COALESCE_MS, DISCONNECT_POLL_S,
+    BATCH_CONCURRENCY, BATCH_MAX_ITEMS,
+)
+from omnibot.api.latency import LatencyStats, CancelStats
+from omnibot.api.coalesce import SingleFlight, normalize_question, scope_key
+from omnibot.api.admission import AdmissionController, Overloaded
+from omnibot.api.sse import encode_event, token_frame, TokenCoalescer, next_events, clamp_coalesce_ms
+from omnibot.api.ws import WsMux, ws_encoders
+from omnibot.api.batch import run_batch
+from omnibot.api import metrics
+from omnibot.api.trace import Trace, get_trace_log
+from omnibot.api.profiler import maybe_profile
 
 from fastapi.staticfiles import StaticFiles
 import os
@@ -52,31 +65,108 @@ def inject_profile(ctx: str, member: MemberProfile) -> str:
 # ---------- Startup ----------
 @app.on_event("startup")
 async def _startup():
+    # heavy stacks (LangGraph, Chroma, embedding/LLM clients) load here, not at import
+    from omnibot.graph.graph_builder import build_graph_async
+    from omnibot.guardrails.intent_semantic import IntentClassifier, IntentConfig
+    from omnibot.router.semantic_router import get_semantic_router
+    from omnibot.router.fused import FusedClassifier
+
     # compiling graph for /chat (one-shot) and for future use
     graph, conn = await build_graph_async()
     app.state.graph = graph
     app.state.conn = conn
-    # instantiate agents once for direct streaming
-    app.state.pdf_agent: AnswerAgent = BenefitsIQ()
-    app.state.claims_agent: AnswerAgent = ClaimsAssist()
+    # same agent instances the graph uses (one Chroma client / LLM client set per worker)
+    app.state.pdf_agent: AnswerAgent = get_agent("pdf")
+    app.state.claims_agent: AnswerAgent = get_agent("claims")
     app.state.intent = IntentClassifier(IntentConfig())
+    app.state.router = get_semantic_router() if ROUTER_MODE == "semantic" else None
+    # guardrail + route from one embedding (shares the classifiers above)
+    app.state.classifier = FusedClassifier(app.state.intent, get_semantic_router())
     app.state.member = MemberProfile(name="Maria Martinez", first="Maria")
+    app.state.latency = LatencyStats()
+    app.state.cancels = CancelStats()
+    app.state.flights = SingleFlight()
+    app.state.admission = AdmissionController()
+    # checkpoint retention / compaction in a background thread (RAG_CHECKPOINT_*)
+    from omnibot.graph.retention import CheckpointJanitor
+    app.state.janitor = CheckpointJanitor().start()
 
 @app.on_event("shutdown")
 async def _shutdown():
+    app.state.janitor.stop()
     try:
         await app.state.conn.close()
     except Exception:
         pass
+    get_trace_log().close()
+    await aclose_all()
+
+# ---------- Stats ----------
+@app.get("/stats/backends")
+async def stats_backends():
+    # per-backend concurrency cap, in-flight, FIFO queue depth and wait times
+    return {"backends": backend_stats()}
+
+@app.get("/stats/agents")
+async def stats_agents():
+    # build time and resident-memory cost of each shared agent
+    return {"agents": agent_stats()}
+
+@app.get("/stats/memory")
+async def stats_memory():
+    # this worker's unique vs shared resident memory (see omnibot.apps.memreport)
+    from omnibot.apps.memreport import memory_report
+    return memory_report()
+
+@app.get("/stats/latency")
+async def stats_latency():
+    # time-to-first-citation / time-to-first-token per mode (speculative vs sequential)
+    return {"speculative_default": SPECULATIVE_RETRIEVAL, "modes": app.state.latency.summary()}
+
+@app.get("/stats/router")
+async def stats_router():
+    # how often the local prototype router had to defer to the LLM router
+    router = app.state.router
+    return {"mode": ROUTER_MODE, **(router.stats() if router is not None else {})}
+
+@app.get("/stats/admission")
+async def stats_admission():
+    # active agent runs, queue depth and shed counts
+    return app.state.admission.snapshot()
+
+@app.get("/stats/disconnects")
+async def stats_disconnects():
+    # streams abandoned by the client and the generations cancelled with them
+    return {**app.state.cancels.summary(), "flights": app.state.flights.stats()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # per-stage latency histograms (Prometheus text format), see omnibot.api.metrics
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/stats/coalesce")
+async def stats_coalesce():
+    # identical in-flight agent runs shared between concurrent requests
+    return {"enabled": COALESCE_REQUESTS, **app.state.flights.stats()}
+
+@app.get("/stats/checkpoints")
+async def stats_checkpoints():
+    # reader pool use and group-commit batching of the checkpoint store, plus retention passes
+    saver = app.state.graph.checkpointer
+    return {"pooled": hasattr(saver, "stats"), **(saver.stats() if hasattr(saver, "stats") else {}),
+            "retention": app.state.janitor.stats()}
 
 # ---------- Helpers ----------
 def _sse(event: str, data: dict) -> bytes:
-    payload = json.dumps(data, ensure_ascii=False)
-    return (
-        f"event: {event}\n" +
-        "\n".join(f"data: {line}" for line in payload.splitlines()) +
-        "\n\n"
-    ).encode("utf-8")
+    # compact single-line JSON with a pre-encoded prefix, see omnibot.api.sse
+    return encode_event(event, data)
+
+def _overloaded(e: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Server busy, please retry.", "reason": e.reason, "retry_after": e.retry_after},
+        status_code=429,
+        headers={"Retry-After": e.retry_after_header},
+    )
 
 # ---------- Models ----------
 class ChatIn(BaseModel):
@@ -87,33 +177,147 @@ class ChatOut(BaseModel):
     thread_id: str
     answer: str
 
+class BatchItem(BaseModel):
+    text: str
+    thread_id: Optional[str] = None
+    id: Optional[str] = None
+
+class BatchIn(BaseModel):
+    items: List[BatchItem]
+    concurrency: Optional[int] = None
+
 # ---------- One-shot stays graph-driven ----------
 @app.post("/chat", response_model=ChatOut)
-async def chat(req: ChatIn):
+async def chat(request: Request, req: ChatIn):
     tid = req.thread_id or str(uuid.uuid4())
-    label, _ = app.state.intent.classify(req.text or "")
-    if label != "in_scope":
-        return {"thread_id": tid, "answer": guardrail_reply(label) or ""}
-    config = {"configurable": {"thread_id": tid}}
-    res = await app.state.graph.ainvoke({"messages": [HumanMessage(content=req.text)]}, config=config)
+    trace = Trace(thread_id=tid, path="chat")
+    profile = maybe_profile(request.headers, tid)
+    if profile is not None:
+        trace.attrs["profile"] = str(profile.path)
+    try:
+        # shed before the embedding when the queue is already full, like the stream path
+        try:
+            app.state.admission.check()
+        except Overloaded as e:
+            trace.attrs["status"] = "shed"
+            return _overloaded(e)
+        with trace.span("classify") as sp:
+            decision = await app.state.classifier.classify(req.text or "")
+        _trace_decision(trace, sp, decision)
+        metrics.observe_decision(decision)
+        if decision.intent != "in_scope":
+            trace.attrs["status"] = "guardrail"
+            return {"thread_id": tid, "answer": guardrail_reply(decision.intent) or ""}
+        # router_node reuses this decision instead of classifying again
+        config = {"configurable": {"thread_id": tid, "decision": decision}}
+        try:
+            with trace.span("admission_wait"):
+                admitted_at = await app.state.admission.acquire()
+        except Overloaded as e:
+            trace.attrs["status"] = "busy"
+            return _overloaded(e)
+        try:
+            # graph run: checkpoint read, retrieval, generation, checkpoint write
+            with trace.span("graph", route=decision.route):
+                res = await app.state.graph.ainvoke({"messages": [HumanMessage(content=req.text)]}, config=config)
+        finally:
+            app.state.admission.release(admitted_at)
+        trace.attrs["status"] = "completed"
+    finally:
+        if profile is not None:
+            profile.stop()
+        trace.finish()
+        get_trace_log().write(trace)
     msgs = res.get("messages", [])
     answer = next((m.content for m in reversed(msgs) if isinstance(m, AIMessage)), "")
     return {"thread_id": tid, "answer": answer}
 
+# ---------- Bulk: NDJSON, one line per item as it finishes ----------
+@app.post("/chat/batch")
+async def chat_batch(req: BatchIn):
+    if len(req.items) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            {"detail": f"Too many items ({len(req.items)}); max {BATCH_MAX_ITEMS} per batch."},
+            status_code=413,
+        )
+    member = app.state.member
+    # per-batch cap can only lower the server's own limit
+    concurrency = min(req.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    lines = run_batch(
+        [{"text": it.text, "thread_id": it.thread_id, "id": it.id} for it in req.items],
+        classifier=app.state.classifier,
+        agents={"pdf": app.state.pdf_agent, "claims": app.state.claims_agent},
+        graph=app.state.graph,
+        admission=app.state.admission,
+        prepare_context=lambda ctx: inject_profile(ctx, member),
+        concurrency=concurrency,
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
 # ---------- STREAMING: direct from agents ----------
 @app.get("/chat/stream")
-async def chat_stream_get(text: str = Query(...), thread_id: Optional[str] = Query(None)):
-    return await _chat_stream_direct(text=text, thread_id=thread_id)
+async def chat_stream_get(request: Request, text: str = Query(...), thread_id: Optional[str] = Query(None)):
+    return await _chat_stream_direct(text=text, thread_id=thread_id, speculative=_speculative(request),
+                                     coalesce_ms=_coalesce_ms(request), timing=_timing(request), request=request)
 
 @app.post("/chat/stream")
-async def chat_stream_post(req: ChatIn):
-    return await _chat_stream_direct(text=req.text, thread_id=req.thread_id)
-
-async def _stream_text_as_tokens(tid: str, text: str):
+async def chat_stream_post(request: Request, req: ChatIn):
+    return await _chat_stream_direct(text=req.text, thread_id=req.thread_id, speculative=_speculative(request),
+                                     coalesce_ms=_coalesce_ms(request), timing=_timing(request), request=request)
+
+@app.websocket("/ws/chat")
+async def chat_ws(websocket: WebSocket):
+    # handshake headers set the connection defaults; each `ask` may override them
+    speculative, coalesce_ms, timing = _speculative(websocket), _coalesce_ms(websocket), _timing(websocket)
+
+    def open_stream(rid: str, ask: dict):
+        encode, encode_token = ws_encoders(rid)
+        return _answer_frames(
+            text=ask["text"], thread_id=ask.get("thread_id") or None,
+            speculative=bool(ask.get("speculative", speculative)),
+            coalesce_ms=clamp_coalesce_ms(ask.get("coalesce_ms", coalesce_ms), coalesce_ms),
+            timing=bool(ask.get("timing", timing)), headers=websocket.headers,
+            encode=encode, encode_token=encode_token, path="ws",
+        )
+
+    await WsMux(websocket, open_stream).run()
+
+def _speculative(request: Request) -> bool:
+    # per-request override (A/B measurement); defaults to RAG_SPECULATIVE_RETRIEVAL
+    hdr = request.headers.get("x-omnibot-speculative")
+    if hdr is None:
+        return SPECULATIVE_RETRIEVAL
+    return hdr.strip().lower() in ("1", "true", "yes", "on")
+
+def _coalesce_ms(request: Request) -> float:
+    # per-request override of RAG_SSE_COALESCE_MS (0 = one frame per token), clamped
+    return clamp_coalesce_ms(request.headers.get("x-omnibot-coalesce-ms", SSE_COALESCE_MS))
+
+def _timing(request: Request) -> bool:
+    # opt-in trailing `timing` SSE event with this request's span tree
+    return request.headers.get("x-omnibot-timing", "").strip().lower() in ("1", "true", "yes", "on")
+
+def _trace_decision(trace: Trace, parent, decision) -> None:
+    """guardrail / route sub-spans of a classify span, from the timings on the Decision."""
+    t = parent.start
+    for stage, seconds in decision.timings.items():
+        attrs = {"intent": decision.intent} if stage == "guardrail" else {"route": decision.route, "source": decision.route_source}
+        trace.add(stage, t, t + seconds, parent, **attrs)
+        t += seconds
+
+def _discard(*futs: "asyncio.Future") -> None:
+    """Cancel speculative work we no longer need and swallow its outcome."""
+    for f in futs:
+        if f is None:
+            continue
+        f.cancel()
+        f.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+
+async def _stream_text_as_tokens(tid: str, text: str, encode=_sse):
   for i in range(0, len(text), 24):
-      yield _sse("token", {"agent": "guardrail", "token": text[i:i+24]})
+      yield encode("token", {"agent": "guardrail", "token": text[i:i+24]})
       await asyncio.sleep(0)
-  yield _sse("final", {"thread_id": tid, "answer": text})
+  yield encode("final", {"thread_id": tid, "answer": text})
 
 
 # async def _chat_stream_direct(*, text: str, thread_id: Optional[str]):
@@ -184,53 +388,167 @@ async def _stream_text_as_tokens(tid: str, text: str):
 #     }
 #     return StreamingResponse(gen(), headers=headers)
 
-async def _chat_stream_direct(*, text: str, thread_id: Optional[str]):
-    import re, uuid, asyncio
+_SSE_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+async def _chat_stream_direct(
+    *, text: str, thread_id: Optional[str], speculative: bool = SPECULATIVE_RETRIEVAL,
+    coalesce_ms: float = SSE_COALESCE_MS, timing: bool = False, request: Optional[Request] = None,
+):
+    try:
+        frames = _answer_frames(
+            text=text, thread_id=thread_id, speculative=speculative, coalesce_ms=coalesce_ms, timing=timing,
+            headers=request.headers if request is not None else {},
+            is_disconnected=request.is_disconnected if request is not None else None,
+        )
+    except Overloaded as e:
+        return _overloaded(e)
+    return StreamingResponse(frames, headers=_SSE_HEADERS)
+
+def _answer_frames(
+    *, text: str, thread_id: Optional[str], speculative: bool = SPECULATIVE_RETRIEVAL,
+    coalesce_ms: float = SSE_COALESCE_MS, timing: bool = False, headers: Mapping[str, str] = {},
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    encode: Callable[[str, Any], Any] = _sse, encode_token: Callable[[str, str], Any] = token_frame,
+    path: str = "stream",
+) -> AsyncIterator[Any]:
+    """
+    The streamed answer as frames, transport-neutral: `encode(event, data)` and
+    `encode_token(agent, text)` build the frames (SSE bytes by default; /ws/chat
+    passes its own). Raises Overloaded before any work when admission is full.
+    """
     from types import SimpleNamespace
 
     tid = thread_id or str(uuid.uuid4())
     pdf_agent: AnswerAgent = app.state.pdf_agent
     claims_agent: AnswerAgent = app.state.claims_agent
-    intent: IntentClassifier = app.state.intent
+    classifier: FusedClassifier = app.state.classifier
+    admission: AdmissionController = app.state.admission
+    graph = app.state.graph
+    config = {"configurable": {"thread_id": tid}}
 
     # --- Member "memory" (use app.state.member if set at startup; else default to Maria) ---
     member = getattr(app.state, "member", SimpleNamespace(name="Maria Martinez", first="Maria"))
 
     GREET_RE = re.compile(r"^\s*(hi|hello|hey|greetings|good\s+(morning|afternoon|evening))\b", re.I)
 
+    trace = Trace(thread_id=tid, path=path, speculative=speculative)
+    with trace.span("greeting_check"):
+        is_greeting = bool(GREET_RE.match(text or ""))
+
+    # shed before opening the stream when the queue is already full (greetings are free)
+    if not is_greeting:
+        try:
+            admission.check()
+        except Overloaded:
+            # no stream follows, but the request still gets its trace line
+            trace.attrs["status"] = "shed"
+            trace.finish()
+            get_trace_log().write(trace)
+            raise
+
     def _inject_profile(ctx: str) -> str:
         """Prefix retrieved context with a tiny member profile block (post-retrieval)."""
         header = f"Member profile:\n- Name: {member.name}\n\n"
         return f"{header}{ctx}" if ctx else header
 
-    async def gen() -> AsyncIterator[bytes]:
+    # agent tasks of this stream; cancelled as soon as the client goes away
+    tasks: list[asyncio.Task] = []
+    disconnected = asyncio.Event()
+
+    async def _watch_disconnect():
+        while not await is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_S)
+        disconnected.set()
+        for t in tasks:
+            t.cancel()
+
+    async def gen() -> AsyncIterator[Any]:
+        watcher = asyncio.create_task(_watch_disconnect()) if is_disconnected is not None else None
+        profile = maybe_profile(headers, tid)
+        if profile is not None:
+            trace.attrs["profile"] = str(profile.path)
+        try:
+            async for frame in _gen():
+                yield frame
+            trace.finish()
+            if timing and not disconnected.is_set():
+                yield encode("timing", trace.to_record())
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if profile is not None:
+                profile.stop()
+            if disconnected.is_set():
+                trace.attrs["status"] = "disconnected"
+            trace.finish()
+            get_trace_log().write(trace)
+
+    async def _gen() -> AsyncIterator[Any]:
+        t0 = time.perf_counter()
         # ---- 0) Greeting short-circuit ----
-        if GREET_RE.match(text or ""):
-            yield _sse("route", {"thread_id": tid, "route": "greet"})
+        if is_greeting:
+            trace.attrs["status"] = "greet"
+            yield encode("route", {"thread_id": tid, "route": "greet"})
             msg = (
                 f"Hi {member.first}! 👋 I’m here to help with your benefits (EOC) and claims — "
                 f"things like copays, deductibles, in-network rules, and what you owe on a claim. "
                 f"What would you like to check today?"
             )
-            async for frame in _stream_text_as_tokens(tid, msg):
+            async for frame in _stream_text_as_tokens(tid, msg, encode):
                 yield frame
+            metrics.observe_request(path, "greet", time.perf_counter() - t0)
             return
 
-        # ---- 1) Semantic guardrail (medical / off-topic) ----
-        label, scores = intent.classify(text or "")
-        if label != "in_scope":
-            reply = guardrail_reply(label) or ""
+        loop = asyncio.get_running_loop()
+
+        def _retrieve(agent: AnswerAgent) -> "asyncio.Future":
+            # retrieval: offload to thread; resolves to (ctx, cites, (start, end))
+            def run():
+                t = time.perf_counter()
+                ctx, cites = agent.retrieve(text)
+                return ctx, cites, (t, time.perf_counter())
+            return loop.run_in_executor(None, run)
+
+        # ---- Speculative mode: classification and both retrievals start together ----
+        classify_task = None
+        pre: dict[str, asyncio.Future] = {}
+        classify_span = trace.span("classify")
+        if speculative:
+            classify_task = asyncio.create_task(classifier.classify(text or ""))
+            pre = {"pdf": _retrieve(pdf_agent), "claims": _retrieve(claims_agent)}
+
+        # ---- 1) Guardrail + route in one pass (single embedding) ----
+        try:
+            decision = await classify_task if classify_task is not None else await classifier.classify(text or "")
+        except BaseException:
+            # classification failed or the stream was cancelled: the retrievals would
+            # otherwise run on (and fail) unobserved, each holding an executor thread
+            _discard(*pre.values())
+            raise
+        classify_span.finish()
+        _trace_decision(trace, classify_span, decision)
+        metrics.observe_decision(decision)
+        if decision.intent != "in_scope":
+            trace.attrs["status"] = "guardrail"
+            _discard(*pre.values())
+            reply = guardrail_reply(decision.intent) or ""
             # make it a bit more personal
             if reply and not reply.lower().startswith("hi"):
                 reply = f"Hi {member.first}! " + reply
-            yield _sse("route", {"thread_id": tid, "route": "guardrail"})
-            async for frame in _stream_text_as_tokens(tid, reply):
+            yield encode("route", {"thread_id": tid, "route": "guardrail"})
+            async for frame in _stream_text_as_tokens(tid, reply, encode):
                 yield frame
+            metrics.observe_request(path, "guardrail", time.perf_counter() - t0)
             return
 
         # ---- 2) Normal routing ----
-        route = await fast_route(text or "")
-        yield _sse("route", {"thread_id": tid, "route": route})
+        route = decision.route
+        yield encode("route", {"thread_id": tid, "route": route, "confidence": round(decision.route_confidence, 3)})
 
         # ---- 3) Choose agents ----
         selected: list[tuple[str, AnswerAgent]] = []
@@ -238,47 +556,139 @@ async def _chat_stream_direct(*, text: str, thread_id: Optional[str]):
             selected.append(("pdf", pdf_agent))
         if route in ("claims", "both"):
             selected.append(("claims", claims_agent))
+        # keep speculative retrievals that match the route; drop the rest
+        wanted = {name for name, _ in selected}
+        _discard(*(f for name, f in pre.items() if name not in wanted))
         if not selected:
-            yield _sse("final", {"thread_id": tid, "answer": f"Sorry {member.first}, I couldn't determine a suitable source to answer that."})
+            yield encode("final", {"thread_id": tid, "answer": f"Sorry {member.first}, I couldn't determine a suitable source to answer that."})
+            return
+
+        # ---- Admission: agent runs (retrieval + LLM) are the expensive part ----
+        trace.attrs["route"] = route
+        try:
+            with trace.span("admission_wait"):
+                admitted_at = await admission.acquire()
+        except Overloaded as e:
+            trace.attrs["status"] = "busy"
+            _discard(*pre.values())
+            yield encode("busy", {"thread_id": tid, "reason": e.reason, "retry_after": e.retry_after})
+            yield encode("final", {"thread_id": tid, "answer": ""})
             return
 
-        # ---- 4) Run each agent concurrently: retrieve → emit citations → stream tokens ----
-        q: asyncio.Queue[dict] = asyncio.Queue()
-
-        async def run_agent(name: str, agent: AnswerAgent):
-            loop = asyncio.get_running_loop()
-            # retrieval: offload to thread
-            ctx, cites = await loop.run_in_executor(None, lambda: agent.retrieve(text))
-            # inject personalization AFTER retrieval so search isn't skewed
-            ctx = _inject_profile(ctx)
-            # send citations ASAP
-            await q.put({"kind": "citations", "agent": name, "citations": cites})
-            # stream tokens
-            history: list[BaseMessage] = []
-            async for tok in agent.astream_answer(text, history, context=ctx):
-                await q.put({"kind": "token", "agent": name, "token": tok})
-            await q.put({"kind": "done", "agent": name})
-
-        tasks = [asyncio.create_task(run_agent(n, a)) for n, a in selected]
-
-        done = 0
-        while done < len(tasks):
-            ev = await q.get()
-            if ev["kind"] == "citations":
-                yield _sse("citations", {"agent": ev["agent"], "citations": ev["citations"]})
-            elif ev["kind"] == "token":
-                yield _sse("token", {"agent": ev["agent"], "token": ev["token"]})
-            elif ev["kind"] == "done":
-                done += 1
-
-        # ---- 5) Final marker  ----
-        yield _sse("final", {"thread_id": tid, "answer": ""})
-
-    headers = {
-        "Content-Type": "text/event-stream",
-        "Cache-Control": "no-cache",
-        "Connection": "keep-alive",
-        "X-Accel-Buffering": "no",
-    }
-    return StreamingResponse(gen(), headers=headers)
+        completed = False
+        sent_tokens = 0
+        try:
+            # ---- 4) Run each agent concurrently: retrieve → emit citations → stream tokens ----
+            # same compact history block the graph uses (bounded, no message re-scan)
+            with trace.span("checkpoint_read"):
+                snapshot = await graph.aget_state(config)
+            memory = memory_for_state(snapshot.values or {})
+            history = render_history(memory)
+            answers: dict[str, list[str]] = {name: [] for name, _ in selected}
+            q: asyncio.Queue[dict] = asyncio.Queue()
+
+            async def produce(name: str, agent: AnswerAgent, publish, span) -> None:
+                ctx, cites, (r0, r1) = await (pre.get(name) or _retrieve(agent))
+                metrics.observe_stage("retrieve", r1 - r0, route, name)
+                trace.add("retrieve", r0, r1, span, speculative=name in pre, chunks=len(cites))
+                # inject personalization AFTER retrieval so search isn't skewed
+                ctx = _inject_profile(ctx)
+                # send citations ASAP
+                publish({"kind": "citations", "citations": cites})
+                # stream tokens
+                stream_span = trace.span("stream", span)
+                t_gen = stream_span.start
+                first, n = 0.0, 0
+                try:
+                    async for tok in agent.astream_answer(text, history, context=ctx):
+                        if not n:
+                            first = time.perf_counter() - t_gen
+                        n += 1
+                        publish({"kind": "token", "token": tok})
+                finally:
+                    stream_span.finish(tokens=n, first_token_ms=round(first * 1000.0, 2))
+                metrics.observe_generation(route, name, first, stream_span.end - t_gen, n)
+
+            # identical question + same member/history => one retrieval and one generation
+            scope = scope_key(member.name, history)
+
+            async def run_agent(name: str, agent: AnswerAgent):
+                key = (name, normalize_question(text), scope) if COALESCE_REQUESTS else None
+                span = trace.span("agent", agent=name)
+                events, leader = app.state.flights.join(key, lambda publish: produce(name, agent, publish, span))
+                span.set(coalesced=not leader)
+                if not leader:
+                    _discard(pre.get(name))
+                try:
+                    async for ev in events:
+                        if ev["kind"] == "token":
+                            answers[name].append(ev["token"])
+                        await q.put({**ev, "agent": name})
+                finally:
+                    # unsubscribe now (not at GC): the last subscriber leaving cancels the flight
+                    span.finish()
+                    await events.aclose()
+                    await q.put({"kind": "done", "agent": name})
+
+            tasks.extend(asyncio.create_task(run_agent(n, a)) for n, a in selected)
+
+            # tokens are batched per agent (first token goes out immediately)
+            coalescer = TokenCoalescer(window_ms=coalesce_ms, encode_token=encode_token)
+            ttfc = ttft = None
+            done = 0
+            while done < len(tasks):
+                for ev in await next_events(q, coalescer):
+                    if ev["kind"] == "token":
+                        if ttft is None:
+                            ttft = time.perf_counter() - t0
+                        sent_tokens += 1
+                        for frame in coalescer.add(ev["agent"], ev["token"]):
+                            yield frame
+                        continue
+                    # keep per-agent ordering: pending tokens go out before any other event
+                    for frame in coalescer.flush():
+                        yield frame
+                    if ev["kind"] == "citations":
+                        if ttfc is None:
+                            ttfc = time.perf_counter() - t0
+                        yield encode("citations", {"agent": ev["agent"], "citations": ev["citations"]})
+                    elif ev["kind"] == "done":
+                        done += 1
+                if coalescer.due_in() == 0.0:
+                    for frame in coalescer.flush():
+                        yield frame
+            if disconnected.is_set():
+                return  # client is gone: don't persist a truncated turn
+            total = time.perf_counter() - t0
+            app.state.latency.record("speculative" if speculative else "sequential", ttfc=ttfc, ttft=ttft, total=total)
+            metrics.observe_request(path, route, total, ttft)
+
+            # ---- 5) Persist the turn so follow-ups on this thread see it ----
+            answer = compose_answer(route, {n: "".join(parts) for n, parts in answers.items()})
+            with trace.span("checkpoint_write"):
+                await graph.aupdate_state(
+                    config,
+                    {
+                        "messages": [HumanMessage(content=text), AIMessage(content=answer)],
+                        "memory": memory_turn(text, answer, memory),
+                        "route": route,
+                    },
+                    as_node="combine",
+                )
+
+            # ---- 6) Final marker  ----
+            completed = True
+            trace.attrs["status"] = "completed"
+            yield encode("final", {"thread_id": tid, "answer": ""})
+        finally:
+            # disconnect / error mid-answer: stop the agents (and their upstream LLM streams)
+            # before handing the slot to the next request
+            pending = [t for t in tasks if not t.done()]
+            for t in pending:
+                t.cancel()
+            admission.release(admitted_at)
+            if not completed:
+                app.state.cancels.record(tokens_sent=sent_tokens, agents_cancelled=len(pending))
+
+    return gen()
 
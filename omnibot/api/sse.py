@@ -0,0 +1,126 @@
+# omnibot/api/sse.py
+"""
+Server-Sent Events framing for the streaming endpoints.
+
+  - encode_event: compact JSON, one `data:` line (compact JSON never contains a raw
+    newline), pre-encoded `event:` prefixes.
+  - token_frame: token frames skip the dict round-trip; the per-agent prefix is
+    encoded once and only the token string goes through json.dumps.
+  - TokenCoalescer: batches tokens per agent for up to RAG_SSE_COALESCE_MS or
+    RAG_SSE_COALESCE_BYTES, so a 300-token answer becomes a few dozen frames
+    (and ASGI sends / socket writes) instead of 300. The first token of each agent
+    is always sent immediately, so time-to-first-token is unchanged. Windows are
+    capped at RAG_SSE_COALESCE_MAX_MS; clamp_coalesce_ms() validates client overrides.
+
+`python -m omnibot.bench.sse_bench` compares frames/sec and CPU per answer.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from omnibot.config.constants import SSE_COALESCE_MS, SSE_COALESCE_BYTES, SSE_COALESCE_MAX_MS
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_event_prefix: Dict[str, bytes] = {}
+_token_prefix: Dict[str, bytes] = {}
+
+
+def encode_event(event: str, data: Any) -> bytes:
+    prefix = _event_prefix.get(event)
+    if prefix is None:
+        prefix = _event_prefix.setdefault(event, f"event: {event}\ndata: ".encode("utf-8"))
+    return prefix + _dumps(data).encode("utf-8") + b"\n\n"
+
+
+def token_frame(agent: str, token: str) -> bytes:
+    """Same bytes as encode_event("token", {"agent": agent, "token": token})."""
+    prefix = _token_prefix.get(agent)
+    if prefix is None:
+        prefix = _token_prefix.setdefault(
+            agent, b"event: token\ndata: {\"agent\":" + _dumps(agent).encode("utf-8") + b",\"token\":"
+        )
+    return prefix + _dumps(token).encode("utf-8") + b"}\n\n"
+
+
+def clamp_coalesce_ms(value: Any, default: float = SSE_COALESCE_MS) -> float:
+    """Client-supplied window in ms: `default` unless it parses to a finite number, then 0..RAG_SSE_COALESCE_MAX_MS."""
+    try:
+        ms = float(value)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(ms):
+        return default
+    return min(max(ms, 0.0), SSE_COALESCE_MAX_MS)
+
+
+class TokenCoalescer:
+    """Per-agent token buffer flushed on a time window or a byte budget."""
+
+    def __init__(self, window_ms: float = SSE_COALESCE_MS, max_bytes: int = SSE_COALESCE_BYTES,
+                 encode_token: Callable[[str, str], Any] = token_frame):
+        # encode_token(agent, text) -> frame; SSE bytes by default (the WebSocket transport passes its own)
+        self.encode_token = encode_token
+        self.window_s = min(max(0.0, window_ms), SSE_COALESCE_MAX_MS) / 1000.0
+        self.max_bytes = max(1, int(max_bytes))
+        self._buf: Dict[str, List[str]] = {}
+        self._size: Dict[str, int] = {}
+        self._since: Optional[float] = None   # when the oldest pending token arrived
+        self._started: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_s > 0
+
+    def add(self, agent: str, token: str) -> List[Any]:
+        """Buffer a token; returns frames that are due now (first token, full buffer, or window off)."""
+        if not self.enabled or agent not in self._started:
+            self._started.add(agent)
+            return [self.encode_token(agent, token)]
+        self._buf.setdefault(agent, []).append(token)
+        size = self._size.get(agent, 0) + len(token)
+        self._size[agent] = size
+        if self._since is None:
+            self._since = time.perf_counter()
+        if size >= self.max_bytes:
+            return self._flush_agent(agent)
+        return []
+
+    def due_in(self) -> Optional[float]:
+        """Seconds until the pending batch must go out; None when nothing is pending."""
+        if self._since is None:
+            return None
+        return max(0.0, self._since + self.window_s - time.perf_counter())
+
+    def flush(self) -> List[Any]:
+        frames = [self.encode_token(agent, "".join(parts)) for agent, parts in self._buf.items() if parts]
+        self._buf.clear()
+        self._size.clear()
+        self._since = None
+        return frames
+
+    def _flush_agent(self, agent: str) -> List[Any]:
+        parts = self._buf.pop(agent, None)
+        self._size.pop(agent, None)
+        if not any(self._buf.values()):
+            self._since = None
+        return [self.encode_token(agent, "".join(parts))] if parts else []
+
+
+async def next_events(q: "asyncio.Queue[dict]", coalescer: TokenCoalescer) -> List[dict]:
+    """
+    Next batch of queued events. While tokens are pending the loop sleeps out the
+    rest of the window once and then drains the queue, instead of waking per token.
+    """
+    wait = coalescer.due_in()
+    if wait is None:
+        events = [await q.get()]
+    else:
+        if wait > 0:
+            await asyncio.sleep(min(wait, SSE_COALESCE_MAX_MS / 1000.0))
+        events = []
+    while not q.empty():
+        events.append(q.get_nowait())
+    return events
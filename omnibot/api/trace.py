@@ -0,0 +1,216 @@
+# omnibot/api/trace.py
+"""
+Per-request span trees, for explaining a single slow answer.
+
+Each /chat/stream request records spans (greeting check, classify -> guardrail / route,
+admission wait, checkpoint read, each agent's retrieve and stream, checkpoint write)
+on a Trace. The finished tree is
+
+  - sent to the client as a trailing `timing` SSE event when the request carries
+    `X-Omnibot-Timing: 1`
+  - appended as one JSON line to a rotating trace log (RAG_TRACE_LOG) keyed by
+    thread_id; writes go through a queue to a background thread, never the event loop
+
+    python -m omnibot.api.trace <thread_id>      # print that thread's traces
+
+Spans are explicit (parent passed in), so they work the same from tasks, executor
+threads and coalesced flights. Recording a span is two perf_counter() calls and an
+append.
+"""
+from __future__ import annotations
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from omnibot.config.constants import TRACE_LOG, TRACE_LOG_MAX_BYTES, TRACE_LOG_BACKUPS
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "start", "end", "attrs")
+
+    def __init__(self, id: int, parent: int, name: str, start: float, attrs: Dict[str, Any]):
+        self.id = id
+        self.parent = parent
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def finish(self, **attrs: Any) -> None:
+        if attrs:
+            self.attrs.update(attrs)
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.finish()
+
+
+class Trace:
+    """Flat list of spans (id 0 is the request itself), rendered as a tree on demand."""
+
+    def __init__(self, name: str = "request", **attrs: Any):
+        self.wall = time.time()
+        self.root = Span(0, -1, name, time.perf_counter(), dict(attrs))
+        self._spans: List[Span] = [self.root]
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return self.root.attrs
+
+    def span(self, name: str, parent: Optional[Span] = None, **attrs: Any) -> Span:
+        """Start a span now; finish it with `.finish()` or use it as a context manager."""
+        sp = Span(len(self._spans), parent.id if parent is not None else 0, name, time.perf_counter(), attrs)
+        self._spans.append(sp)
+        return sp
+
+    def add(self, name: str, start: float, end: float, parent: Optional[Span] = None, **attrs: Any) -> Span:
+        """Record an interval that was measured elsewhere (perf_counter timestamps)."""
+        sp = self.span(name, parent, **attrs)
+        sp.start, sp.end = start, end
+        return sp
+
+    def finish(self, **attrs: Any) -> None:
+        self.root.finish(**attrs)
+
+    # ---------- rendering ----------
+    def tree(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        t0 = self.root.start
+        nodes: Dict[int, Dict[str, Any]] = {}
+        for sp in self._spans:
+            end = sp.end if sp.end is not None else now
+            node = {"name": sp.name, "start_ms": round((sp.start - t0) * 1000.0, 2),
+                    "ms": round((end - sp.start) * 1000.0, 2), **sp.attrs}
+            if sp.end is None:
+                node["unfinished"] = True
+            nodes[sp.id] = node
+        for sp in self._spans[1:]:
+            nodes.get(sp.parent, nodes[0]).setdefault("children", []).append(nodes[sp.id])
+        return nodes[0]
+
+    def to_record(self) -> Dict[str, Any]:
+        tree = self.tree()
+        return {
+            "ts": round(self.wall, 3),
+            "thread_id": self.attrs.get("thread_id"),
+            "total_ms": tree["ms"],
+            "trace": tree,
+        }
+
+
+# ---------- rotating trace log ----------
+class TraceLog:
+    """Appends one JSON line per trace; file I/O happens on a QueueListener thread."""
+
+    def __init__(self, path=TRACE_LOG, max_bytes: int = TRACE_LOG_MAX_BYTES, backups: int = TRACE_LOG_BACKUPS):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        self._handler: Optional[QueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+        self._closed = False
+
+    def _start(self) -> logging.Logger:
+        with self._lock:
+            if self._logger is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                              backupCount=self.backups, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+                self._listener = QueueListener(q, handler)
+                self._listener.start()
+                logger = logging.getLogger("omnibot.trace")
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                self._handler = QueueHandler(q)
+                logger.addHandler(self._handler)
+                self._logger = logger
+        return self._logger
+
+    def write(self, trace: Trace) -> None:
+        if self.path is None or self._closed:
+            return  # after close(): a stream still finishing must not enqueue into an undrained queue
+        logger = self._logger or self._start()
+        logger.info(json.dumps(trace.to_record(), ensure_ascii=False, separators=(",", ":"), default=str))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._logger is not None and self._handler is not None:
+                self._logger.removeHandler(self._handler)
+                self._handler = None
+            if self._listener is not None:
+                self._listener.stop()   # drains what was already queued
+                self._listener = None
+
+    def files(self) -> List[Path]:
+        """Oldest first: requests.jsonl.N ... requests.jsonl.1, requests.jsonl."""
+        if self.path is None:
+            return []
+        rotated = [self.path.with_name(f"{self.path.name}.{i}") for i in range(self.backups, 0, -1)]
+        return [p for p in rotated + [self.path] if p.exists()]
+
+    def iter_thread(self, thread_id: str) -> Iterator[Dict[str, Any]]:
+        needle = json.dumps(thread_id)
+        for p in self.files():
+            with open(p, "r", encoding="utf-8") as f:
+                for line in f:
+                    if needle in line:
+                        rec = json.loads(line)
+                        if rec.get("thread_id") == thread_id:
+                            yield rec
+
+
+_trace_log: Optional[TraceLog] = None
+
+
+def get_trace_log() -> TraceLog:
+    global _trace_log
+    if _trace_log is None:
+        _trace_log = TraceLog()
+    return _trace_log
+
+
+def _print_tree(node: Dict[str, Any], depth: int = 0) -> None:
+    extra = {k: v for k, v in node.items() if k not in ("name", "start_ms", "ms", "children")}
+    detail = " ".join(f"{k}={v}" for k, v in extra.items())
+    print(f"{'  ' * depth}{node['name']:<{max(1, 24 - 2 * depth)}} +{node['start_ms']:>9.1f} ms "
+          f"{node['ms']:>9.1f} ms  {detail}".rstrip())
+    for child in node.get("children", []):
+        _print_tree(child, depth + 1)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        raise SystemExit("usage: python -m omnibot.api.trace <thread_id>")
+    found = False
+    for rec in get_trace_log().iter_thread(argv[0]):
+        found = True
+        print(f"\n{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rec['ts']))}  total {rec['total_ms']:.1f} ms")
+        _print_tree(rec["trace"])
+    if not found:
+        raise SystemExit(f"no traces for thread {argv[0]} in {get_trace_log().path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# omnibot/api/ws.py
+"""
+Multiplexed chat over one WebSocket (/ws/chat).
+
+Many questions share one connection; every message carries the client's request id.
+
+client -> server
+  {"type": "ask", "id": "q1", "text": "...", "thread_id": "...",      # thread_id optional
+   "credit": 64, "speculative": true, "coalesce_ms": 20, "timing": false}   # all optional
+  {"type": "cancel", "id": "q1"}
+  {"type": "credit", "id": "q1", "n": 64}
+  {"type": "ping"}
+  (text frames only; a binary frame gets an error `binary_not_supported`)
+
+server -> client
+  {"id": "q1", "event": "route" | "citations" | "token" | "busy" | "timing" | "final", "data": {...}}
+  {"id": "q1", "event": "cancelled", "data": {}}      # after a cancel; no final follows
+  {"id": "q1", "event": "error", "data": {"reason": "..."}}
+  {"event": "pong", "data": {}}
+
+Events and their data are exactly those of /chat/stream.
+
+Flow control is credit-based, per request: each `token` message spends one credit
+(initially `credit`, default RAG_WS_INITIAL_CREDIT), and the client tops it up with
+`credit` messages. While a request has no credit its tokens keep arriving from the
+model into the request's queue and are then merged by the token coalescer (when
+RAG_SSE_COALESCE_MS > 0), so a slow reader gets fewer, larger token messages and
+never stalls the other requests on the connection. Control
+events (route, citations, final, ...) don't spend credit. A request left without
+credit for RAG_WS_CREDIT_TIMEOUT_S gets an error `credit_timeout` and is cancelled,
+so a client that stops reading can't hold admission slots indefinitely.
+
+Cancelling a request (or closing the socket) cancels its agent runs exactly like an
+SSE client disconnect: the LLM streams are aborted and the turn isn't persisted.
+"""
+from __future__ import annotations
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from omnibot.config.constants import WS_MAX_INFLIGHT, WS_INITIAL_CREDIT, WS_CREDIT_TIMEOUT_S
+from .admission import Overloaded
+
+Frame = Tuple[str, str]   # (event, encoded message)
+OpenStream = Callable[[str, Dict[str, Any]], AsyncIterator[Frame]]
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def ws_message(rid: Optional[str], event: str, data: Any) -> str:
+    return _dumps({"id": rid, "event": event, "data": data})
+
+
+def ws_encoders(rid: str) -> Tuple[Callable[[str, Any], Frame], Callable[[str, str], Frame]]:
+    """(encode, encode_token) for the stream pipeline, producing (event, message) frames."""
+    prefix = '{"id":' + _dumps(rid) + ',"event":"token","data":{"agent":'
+
+    def encode(event: str, data: Any) -> Frame:
+        return event, ws_message(rid, event, data)
+
+    def encode_token(agent: str, token: str) -> Frame:
+        return "token", prefix + _dumps(agent) + ',"token":' + _dumps(token) + "}}"
+
+    return encode, encode_token
+
+
+class _Pending:
+    __slots__ = ("task", "credit", "granted")
+
+    def __init__(self, credit: int):
+        self.task: Optional[asyncio.Task] = None
+        self.credit = credit
+        self.granted = asyncio.Event()
+
+
+class WsMux:
+    def __init__(self, websocket, open_stream: OpenStream,
+                 max_inflight: int = WS_MAX_INFLIGHT, initial_credit: int = WS_INITIAL_CREDIT,
+                 credit_timeout_s: float = WS_CREDIT_TIMEOUT_S):
+        self.ws = websocket
+        self.open_stream = open_stream
+        self.max_inflight = max(1, int(max_inflight))
+        self.initial_credit = max(1, int(initial_credit))
+        self.credit_timeout_s = max(0.0, float(credit_timeout_s))
+        self._pending: Dict[str, _Pending] = {}
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+
+    async def _send(self, message: str) -> None:
+        if self._closed:
+            return
+        async with self._send_lock:
+            await self.ws.send_text(message)
+
+    async def _error(self, rid: Optional[str], reason: str, **extra: Any) -> None:
+        await self._send(ws_message(rid, "error", {"reason": reason, **extra}))
+
+    # ---------- connection ----------
+    async def run(self) -> None:
+        from starlette.websockets import WebSocketDisconnect
+
+        await self.ws.accept()
+        try:
+            while True:
+                message = await self.ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                raw = message.get("text")
+                if raw is None:   # binary frame: receive_text() would raise KeyError and drop the connection
+                    await self._error(None, "binary_not_supported")
+                    continue
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    await self._error(None, "invalid_json")
+                    continue
+                if not isinstance(msg, dict):
+                    await self._error(None, "invalid_message")
+                    continue
+                await self._dispatch(msg)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._closed = True
+            tasks = [p.task for p in self._pending.values() if p.task is not None]
+            for t in tasks:
+                t.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, msg: Dict[str, Any]) -> None:
+        kind, rid = msg.get("type"), msg.get("id")
+        if kind == "ping":
+            await self._send(ws_message(None, "pong", {}))
+            return
+        if not isinstance(rid, str) or not rid:
+            await self._error(None, "missing_id")
+            return
+        if kind == "ask":
+            await self._ask(rid, msg)
+        elif kind == "cancel":
+            p = self._pending.get(rid)
+            if p is not None and p.task is not None:
+                p.task.cancel()
+        elif kind == "credit":
+            p = self._pending.get(rid)
+            if p is not None:
+                try:
+                    p.credit += max(0, int(msg.get("n", self.initial_credit)))
+                except (TypeError, ValueError):
+                    await self._error(rid, "invalid_credit")
+                    return
+                p.granted.set()
+        else:
+            await self._error(rid, "unknown_type")
+
+    async def _ask(self, rid: str, msg: Dict[str, Any]) -> None:
+        if rid in self._pending:
+            await self._error(rid, "duplicate_id")
+            return
+        if not isinstance(msg.get("text"), str):
+            await self._error(rid, "missing_text")
+            return
+        if len(self._pending) >= self.max_inflight:
+            await self._error(rid, "too_many_inflight", max_inflight=self.max_inflight)
+            return
+        try:
+            credit = int(msg.get("credit") or self.initial_credit)
+        except (TypeError, ValueError):
+            credit = self.initial_credit
+        try:
+            frames = self.open_stream(rid, msg)
+        except Overloaded as e:
+            await self._send(ws_message(rid, "busy", {"reason": e.reason, "retry_after": e.retry_after}))
+            await self._send(ws_message(rid, "final", {"thread_id": msg.get("thread_id"), "answer": ""}))
+            return
+        p = self._pending[rid] = _Pending(max(1, credit))
+        p.task = asyncio.create_task(self._drive(rid, p, frames))
+
+    # ---------- one request ----------
+    async def _drive(self, rid: str, p: _Pending, frames: AsyncIterator[Frame]) -> None:
+        try:
+            async for event, message in frames:
+                if event == "token":
+                    while p.credit <= 0:
+                        p.granted.clear()
+                        try:
+                            await asyncio.wait_for(p.granted.wait(), self.credit_timeout_s or None)
+                        except asyncio.TimeoutError:
+                            await self._error(rid, "credit_timeout", timeout_s=self.credit_timeout_s)
+                            return
+                    p.credit -= 1
+                await self._send(message)
+        except asyncio.CancelledError:
+            await self._send(ws_message(rid, "cancelled", {}))
+        except Exception as e:
+            await self._error(rid, "internal_error", detail=type(e).__name__)
+        finally:
+            # runs the pipeline's own cleanup (agent tasks, admission slot) if it's suspended
+            await frames.aclose()
+            self._pending.pop(rid, None)
@@ -0,0 +1,101 @@
+# omnibot/apps/memreport.py
+"""
+Per-worker memory report: unique vs shared resident memory (Linux /proc).
+
+    python -m omnibot.apps.memreport               # every process running omnibot.api.server
+    python -m omnibot.apps.memreport 1234 1235     # explicit pids
+
+  unique  = Private_Clean + Private_Dirty   (pages only this worker holds)
+  shared  = Shared_Clean + Shared_Dirty     (pages also mapped by another process)
+  pss     = proportional share; summing PSS across workers gives the real host total
+  index   = RSS of the mmap'd prototype / shared-index files in this worker
+"""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from omnibot.config.constants import INDEX_CACHE_DIR, PROTO_CACHE_DIR
+
+_ROLLUP_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def smaps_rollup(pid="self") -> Dict[str, int]:
+    """Selected /proc/<pid>/smaps_rollup fields, in bytes."""
+    out: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in _ROLLUP_FIELDS:
+                out[key] = int(rest.split()[0]) * 1024
+    return out
+
+
+def mapped_rss(pid="self", prefixes: Iterable[Path] = (INDEX_CACHE_DIR, PROTO_CACHE_DIR)) -> Dict[str, int]:
+    """RSS per mapped file under `prefixes` (the read-only artifacts workers share)."""
+    roots = tuple(str(Path(p).resolve()) for p in prefixes)
+    out: Dict[str, int] = {}
+    current: Optional[str] = None
+    with open(f"/proc/{pid}/smaps", "r") as f:
+        for line in f:
+            head = line.split()
+            if not head:
+                continue
+            if "-" in head[0] and len(head) >= 5 and not head[0].endswith(":"):
+                path = head[5] if len(head) >= 6 else ""
+                current = path if path.startswith(roots) else None
+            elif current is not None and head[0] == "Rss:":
+                out[current] = out.get(current, 0) + int(head[1]) * 1024
+    return out
+
+
+def memory_report(pid="self") -> Dict[str, int]:
+    r = smaps_rollup(pid)
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss": r.get("Rss", 0),
+        "pss": r.get("Pss", 0),
+        "unique": r.get("Private_Clean", 0) + r.get("Private_Dirty", 0),
+        "shared": r.get("Shared_Clean", 0) + r.get("Shared_Dirty", 0),
+        "index": sum(mapped_rss(pid).values()),
+    }
+
+
+def find_workers(marker: str = "omnibot.api.server") -> List[int]:
+    pids = []
+    for d in Path("/proc").iterdir():
+        if not d.name.isdigit() or int(d.name) == os.getpid():
+            continue
+        try:
+            cmd = (d / "cmdline").read_bytes().replace(b"\0", b" ").decode("utf-8", "replace")
+        except OSError:
+            continue
+        if marker in cmd:
+            pids.append(int(d.name))
+    return sorted(pids)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    pids = [int(p) for p in argv] or find_workers()
+    if not pids:
+        raise SystemExit("no omnibot.api.server processes found (pass pids explicitly)")
+    mb = 2 ** 20
+    print(f"{'pid':>8}  {'rss MB':>8}  {'unique MB':>9}  {'shared MB':>9}  {'pss MB':>8}  {'index MB':>8}")
+    total_pss = total_unique = 0
+    for pid in pids:
+        try:
+            r = memory_report(pid)
+        except OSError as e:
+            print(f"{pid:>8}  ({e.strerror})")
+            continue
+        total_pss += r["pss"]
+        total_unique += r["unique"]
+        print(f"{pid:>8}  {r['rss'] / mb:8.1f}  {r['unique'] / mb:9.1f}  {r['shared'] / mb:9.1f}  "
+              f"{r['pss'] / mb:8.1f}  {r['index'] / mb:8.1f}")
+    print(f"\nhost total (sum PSS): {total_pss / mb:.1f} MB, of which unique: {total_unique / mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
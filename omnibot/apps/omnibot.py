@@ -3,6 +3,8 @@ import asyncio
 from langchain_core.messages import HumanMessage, AIMessage
 from omnibot.graph.graph_builder import build_graph_async
 
+AGENT_LABELS = {"pdf": "BenefitsIQ Agent", "claims": "Claims Agent"}
+
 async def main_async():
     app, conn = await build_graph_async()
     config = {"configurable": {"thread_id": "omnibot-thread-4"}}
@@ -14,13 +16,25 @@ async def main_async():
             if not q: continue
 
             print("\nOmnibot: ", end="", flush=True)
-            async for _ in app.astream({"messages": [HumanMessage(content=q)]}, config=config, stream_mode="values"):
-                pass
+            # tokens arrive on the custom stream; the graph state is only written at node boundaries
+            agent, streamed = None, False
+            async for ev in app.astream({"messages": [HumanMessage(content=q)]}, config=config, stream_mode="custom"):
+                if ev.get("event") != "token":
+                    continue
+                if ev["agent"] != agent:
+                    agent = ev["agent"]
+                    print(f"\n[{AGENT_LABELS.get(agent, agent)}] ", end="", flush=True)
+                print(ev["token"], end="", flush=True)
+                streamed = True
             st = await app.aget_state(config)
+            if not streamed:
+                # guardrail replies are not streamed
+                msgs = st.values.get("messages", [])
+                print(next((m.content for m in reversed(msgs) if isinstance(m, AIMessage)), ""), end="")
             print(f"\n(elapsed {st.values.get('elapsed', 0.0):.2f}s)")
     finally:
         await conn.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
\ No newline at end of file
+    asyncio.run(main_async())
@@ -0,0 +1,123 @@
+# omnibot/apps/startup_profile.py
+"""
+Startup profiler: per-module import cost and per-component init cost.
+
+    python -m omnibot.apps.startup_profile                        # import omnibot.api.server
+    python -m omnibot.apps.startup_profile -m omnibot --top 15
+    python -m omnibot.apps.startup_profile --init                 # also time agents, classifiers, graph
+
+Import cost comes from `python -X importtime` in a fresh interpreter (so nothing is
+already cached); init cost is measured in-process with the RSS delta of each step.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """[(module, self_us, cumulative_us, depth)] for `import module` in a fresh process."""
+    baseline = {name for name, *_ in _importtime("pass")}  # interpreter startup (site, encodings, ...)
+    return [row for row in _importtime(f"import {module}") if row[0] not in baseline]
+
+
+def _importtime(code: str) -> List[Tuple[str, int, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["import failed"]
+        raise SystemExit(f"{code!r} failed: {tail[0]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def _report_imports(module: str, top: int) -> None:
+    rows = import_profile(module)
+    total = sum(cum for _, _, cum, depth in rows if depth == 0)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {module}: {total / 1000:.1f} ms ({len(rows)} modules)\n")
+    print(f"{'self ms':>9}  package (sum of self time)")
+    for pkg, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{us / 1000:9.1f}  {pkg}")
+    print(f"\n{'cum ms':>9}  {'self ms':>9}  module")
+    for name, self_us, cum_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{cum_us / 1000:9.1f}  {self_us / 1000:9.1f}  {name}")
+
+
+def _init_steps() -> List[Tuple[str, Callable[[], object]]]:
+    def intent():
+        from omnibot.guardrails.intent_semantic import IntentClassifier, IntentConfig
+        return IntentClassifier(IntentConfig())
+
+    def router():
+        from omnibot.router.semantic_router import get_semantic_router
+        return get_semantic_router()
+
+    def agent(name: str):
+        def build():
+            from omnibot.agents.registry import get_agent
+            return get_agent(name)
+        return build
+
+    def graph():
+        from omnibot.graph.graph_builder import build_graph_async
+
+        async def run():
+            _, conn = await build_graph_async()
+            await conn.close()
+        asyncio.run(run())
+
+    return [
+        ("intent classifier", intent),
+        ("semantic router", router),
+        ("agent: pdf", agent("pdf")),
+        ("agent: claims", agent("claims")),
+        ("graph + checkpointer", graph),
+    ]
+
+
+def _report_init() -> None:
+    from omnibot.agents.registry import rss_bytes
+
+    print(f"\n{'init ms':>9}  {'rss MB':>8}  component")
+    for label, step in _init_steps():
+        rss0, t0 = rss_bytes(), time.perf_counter()
+        try:
+            step()
+            note = ""
+        except Exception as e:  # keep profiling the remaining components
+            note = f"  (failed: {type(e).__name__}: {e})"
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{ms:9.1f}  {(rss_bytes() - rss0) / 2**20:8.1f}  {label}{note}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Per-module import and per-component init cost.")
+    ap.add_argument("-m", "--module", default="omnibot.api.server", help="module to import (default: %(default)s)")
+    ap.add_argument("--top", type=int, default=25, help="rows per table")
+    ap.add_argument("--init", action="store_true", help="also time agent / classifier / graph construction")
+    args = ap.parse_args(argv)
+
+    _report_imports(args.module, args.top)
+    if args.init:
+        _report_init()
+
+
+if __name__ == "__main__":
+    main()
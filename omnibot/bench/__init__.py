@@ -0,0 +1,2 @@
+"""Offline benchmarks (run with python -m omnibot.bench.<name>)."""
+__all__: list[str] = []
@@ -0,0 +1,182 @@
+# omnibot/bench/checkpoint_bench.py
+"""
+Checkpoint write amplification of a graph turn: checkpoints, pending writes and bytes
+that the SQLite checkpointer stores per turn.
+
+    python -m omnibot.bench.checkpoint_bench
+    python -m omnibot.bench.checkpoint_bench --turns 20 --threads 2
+
+Runs the same questions through the compiled graph (router -> combine) under two modes:
+
+  legacy     combine_node as an async generator yielding a state update per token
+             ({"stream_event": ...}), as before
+  custom     combine_node returning one update; tokens go out on the custom stream
+
+Both modes stream with stream_mode=["updates", "custom"]; "tokens" counts the tokens
+the caller actually received. Per turn it reports checkpointer calls (aput /
+aput_writes), blob bytes added to the `checkpoints` and `writes` tables, and wall time.
+
+Fully offline like omnibot.bench.loadgen (fake LLM and embeddings, stores under
+--workdir). Each mode runs in a fresh process against its own checkpoint DB.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from omnibot.config.constants import BASE_DIR
+from omnibot.bench.loadgen import QUESTIONS, ensure_stores, offline_env
+
+MODES = ("legacy", "custom")
+
+
+# ---------- previous combine node (per-token state updates) ----------
+async def legacy_combine_node(state):
+    from langchain_core.messages import AIMessage, HumanMessage
+    from omnibot.agents.registry import get_agent
+    from omnibot.graph import graph_builder as gb
+
+    t0 = time.perf_counter()
+    q = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
+    route = state.get("route", "pdf")
+    memory = gb.memory_for_state(state)
+    yield {"route": route}
+    if route == "guardrail":
+        msg = gb.guardrail_reply(state.get("intent", "off_topic")) or ""
+        yield {"messages": [AIMessage(content=msg)], "memory": gb.memory_turn(q, msg, memory),
+               "elapsed": time.perf_counter() - t0}
+        return
+    selected = [(n, get_agent(n)) for n in ("pdf", "claims") if route in (n, "both")]
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(gb._run_agents(q, route, gb.render_history(memory), selected, queue.put_nowait, t0))
+    while not (task.done() and queue.empty()):
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not getter.done():
+            getter.cancel()
+            continue
+        ev = getter.result()
+        if ev["event"] == "token":
+            yield {"stream_event": {"agent": ev["agent"], "token": ev["token"]}}
+        else:
+            yield {f"context_ids_{ev['agent']}": gb.context_refs(ev["citations"])}
+    answers, _, _ = task.result()
+    combined = gb.compose_answer(route, answers)
+    yield {"messages": [AIMessage(content=combined)], "memory": gb.memory_turn(q, combined, memory),
+           "elapsed": time.perf_counter() - t0}
+
+
+# ---------- one mode, in its own process ----------
+def _db_totals(path: str) -> Dict[str, int]:
+    con = sqlite3.connect(path)
+    try:
+        cp_rows, cp_bytes = con.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints").fetchone()
+        wr_rows, wr_bytes = con.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM writes").fetchone()
+    finally:
+        con.close()
+    return {"checkpoint_rows": cp_rows, "checkpoint_bytes": cp_bytes, "write_rows": wr_rows, "write_bytes": wr_bytes}
+
+
+async def _run_mode(mode: str, questions: List[str], threads: int) -> Dict[str, Any]:
+    from langchain_core.messages import HumanMessage
+    from omnibot.config.constants import CHECKPOINT_DB
+    from omnibot.graph import graph_builder as gb
+
+    if mode == "legacy":
+        gb.combine_node = legacy_combine_node
+    app, conn = await gb.build_graph_async()
+    saver = app.checkpointer
+    calls = {"aput": 0, "aput_writes": 0, "writes": 0}
+    aput, aput_writes = saver.aput, saver.aput_writes
+
+    async def counted_aput(*args, **kwargs):
+        calls["aput"] += 1
+        return await aput(*args, **kwargs)
+
+    async def counted_aput_writes(config, writes, *args, **kwargs):
+        calls["aput_writes"] += 1
+        calls["writes"] += len(writes)
+        return await aput_writes(config, writes, *args, **kwargs)
+
+    saver.aput, saver.aput_writes = counted_aput, counted_aput_writes
+    tokens = 0
+    t0 = time.perf_counter()
+    try:
+        for i, q in enumerate(questions):
+            config = {"configurable": {"thread_id": f"bench-{mode}-{i % threads}"}}
+            async for kind, chunk in app.astream({"messages": [HumanMessage(content=q)]}, config=config,
+                                                 stream_mode=["updates", "custom"]):
+                if kind == "custom":
+                    tokens += chunk.get("event") == "token"
+                else:
+                    tokens += sum(isinstance(u, dict) and "stream_event" in u for u in chunk.values())
+        wall = time.perf_counter() - t0
+    finally:
+        await conn.close()
+    return {"mode": mode, "turns": len(questions), "tokens": tokens, "wall_s": wall, **calls,
+            **_db_totals(str(CHECKPOINT_DB)), "db_file_bytes": os.path.getsize(CHECKPOINT_DB)}
+
+
+def _worker(mode: str, questions: List[str], threads: int) -> Dict[str, Any]:
+    return asyncio.run(_run_mode(mode, questions, threads))
+
+
+# ---------- report ----------
+def print_report(results: List[Dict[str, Any]]) -> None:
+    cols = [("aput", "checkpoints"), ("aput_writes", "put_writes"), ("writes", "writes"),
+            ("checkpoint_bytes", "ckpt bytes"), ("write_bytes", "write bytes"), ("tokens", "tokens")]
+    print(f"{'per turn':<10}" + "".join(f"{label:>14}" for _, label in cols) + f"{'ms':>10}")
+    for r in results:
+        n = max(1, r["turns"])
+        row = "".join(f"{r[key] / n:>14.1f}" for key, _ in cols)
+        print(f"{r['mode']:<10}{row}{r['wall_s'] * 1000.0 / n:>10.1f}")
+    if len(results) == 2 and results[1]["checkpoint_bytes"] + results[1]["write_bytes"]:
+        before, after = results
+        ratio = (before["checkpoint_bytes"] + before["write_bytes"]) / (after["checkpoint_bytes"] + after["write_bytes"])
+        print(f"\nbytes written per turn: {ratio:.1f}x less with {after['mode']}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", type=int, default=12, help="graph turns per mode")
+    ap.add_argument("--threads", type=int, default=2, help="conversation threads the turns rotate over")
+    ap.add_argument("--modes", default=",".join(MODES), help=f"comma-separated subset of {','.join(MODES)}")
+    ap.add_argument("--workdir", default=str(BASE_DIR / ".omnibot_cache" / "loadgen"),
+                    help="offline stores (shared with loadgen) and the per-mode checkpoint DBs")
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = ap.parse_args(argv)
+
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    env = offline_env(workdir)
+    ensure_stores(workdir, env)
+    pool = QUESTIONS["pdf"] + QUESTIONS["claims"] + QUESTIONS["both"]
+    questions = [pool[i % len(pool)] for i in range(args.turns)]
+
+    # spawned children import omnibot.config afresh, so they see the offline env
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            raise SystemExit(f"unknown mode {mode!r}; choose from {', '.join(MODES)}")
+        db = workdir / f"checkpoint-bench-{mode}.sqlite3"
+        for p in (db, db.with_name(db.name + "-wal"), db.with_name(db.name + "-shm")):
+            p.unlink(missing_ok=True)
+        os.environ.update(env, RAG_CHECKPOINT_DB=str(db))
+        with ctx.Pool(1) as p:
+            results.append(p.apply(_worker, (mode, questions, max(1, args.threads))))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# omnibot/bench/checkpoint_store_bench.py
+"""
+Checkpoint store throughput and latency under concurrent conversation threads.
+
+    python -m omnibot.bench.checkpoint_store_bench
+    python -m omnibot.bench.checkpoint_store_bench --threads 64 --turns 40 --payload-kb 16
+
+Each simulated turn does what the graph does per turn: read the thread's latest
+checkpoint (aget_tuple), then write a new checkpoint (aput) and its pending writes
+(aput_writes). `--threads` conversations run their turns concurrently, against:
+
+  single      AsyncSqliteSaver on one aiosqlite connection (the previous setup)
+  single-wal  the same single connection with WAL and RAG_CHECKPOINT_PRAGMAS
+  pooled      omnibot.graph.checkpoint.PooledSqliteSaver (reader pool, group commit)
+
+Reports turns/sec and p50/p95/p99 read and write latency; for `pooled` also the
+number of COMMITs and the average commit batch. Each mode gets a fresh DB file.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from omnibot.config.constants import CHECKPOINT_READERS, CHECKPOINT_COMMIT_MS, CHECKPOINT_COMMIT_MAX, CHECKPOINT_PRAGMAS
+from omnibot.graph.checkpoint import PooledSqliteSaver, parse_pragmas
+
+MODES = ("single", "single-wal", "pooled")
+
+
+def _pct(sorted_vals: List[float], p: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))]
+
+
+async def _open(mode: str, path: Path, args):
+    if mode == "pooled":
+        saver = await PooledSqliteSaver.open(path, readers=args.readers, commit_ms=args.commit_ms,
+                                             commit_max=args.commit_max)
+        return saver, saver.close
+    conn = await aiosqlite.connect(str(path))
+    if mode == "single-wal":
+        await conn.execute("PRAGMA journal_mode=WAL")
+        for name, value in parse_pragmas(CHECKPOINT_PRAGMAS).items():
+            await conn.execute(f"PRAGMA {name}={value}")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver, conn.close
+
+
+async def _conversation(saver, thread_id: str, turns: int, payload: str,
+                        reads: List[float], writes: List[float]) -> None:
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    for step in range(turns):
+        t0 = time.perf_counter()
+        latest = await saver.aget_tuple(config)
+        t1 = time.perf_counter()
+        if latest is not None:
+            config = latest.config
+        cp = empty_checkpoint()
+        cp["channel_values"] = {"messages": [payload] * 2, "route": "pdf", "memory": {"summary": payload[:512]}}
+        new_config = await saver.aput(config, cp, {"source": "update", "step": step, "writes": {}}, {})
+        await saver.aput_writes(new_config, [("messages", payload), ("route", "pdf")], f"task-{step}")
+        t2 = time.perf_counter()
+        reads.append(t1 - t0)
+        writes.append(t2 - t1)
+        config = new_config
+
+
+async def run_mode(mode: str, workdir: Path, args) -> Dict[str, Any]:
+    path = workdir / f"checkpoint-store-{mode}.sqlite3"
+    for p in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        p.unlink(missing_ok=True)
+    saver, close = await _open(mode, path, args)
+    payload = "x" * (args.payload_kb * 1024)
+    reads: List[float] = []
+    writes: List[float] = []
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            _conversation(saver, f"bench-{i}", args.turns, payload, reads, writes) for i in range(args.threads)
+        ))
+        wall = time.perf_counter() - t0
+        extra = saver.stats() if hasattr(saver, "stats") else {}
+    finally:
+        await close()
+    reads.sort()
+    writes.sort()
+    ms = lambda v: round(v * 1000.0, 2) if v is not None else None
+    return {
+        "mode": mode, "threads": args.threads, "turns": len(writes), "wall_s": round(wall, 3),
+        "turns_per_s": round(len(writes) / wall, 1) if wall > 0 else None,
+        "read_ms": {f"p{p}": ms(_pct(reads, p)) for p in (50, 95, 99)},
+        "write_ms": {f"p{p}": ms(_pct(writes, p)) for p in (50, 95, 99)},
+        **({"commits": extra["commits"], "avg_batch": extra["avg_batch"]} if extra else {}),
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'mode':<12}{'turns/s':>10}{'read p50':>10}{'p95':>8}{'p99':>8}{'write p50':>11}{'p95':>8}{'p99':>8}"
+          f"{'commits':>9}{'batch':>7}")
+    for r in results:
+        rd, wr = r["read_ms"], r["write_ms"]
+        print(f"{r['mode']:<12}{r['turns_per_s']:>10}{rd['p50']:>10}{rd['p95']:>8}{rd['p99']:>8}"
+              f"{wr['p50']:>11}{wr['p95']:>8}{wr['p99']:>8}{r.get('commits', '-'):>9}{r.get('avg_batch', '-'):>7}")
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for m in modes:
+        if m not in MODES:
+            raise SystemExit(f"unknown mode {m!r}; choose from {', '.join(MODES)}")
+    with tempfile.TemporaryDirectory(prefix="omnibot-ckpt-", dir=args.workdir) as tmp:
+        return [await run_mode(m, Path(tmp), args) for m in modes]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threads", type=int, default=32, help="concurrent conversation threads")
+    ap.add_argument("--turns", type=int, default=25, help="turns per thread")
+    ap.add_argument("--payload-kb", type=int, default=8, help="approximate state size written per turn")
+    ap.add_argument("--modes", default=",".join(MODES), help=f"comma-separated subset of {','.join(MODES)}")
+    ap.add_argument("--readers", type=int, default=CHECKPOINT_READERS)
+    ap.add_argument("--commit-ms", type=float, default=CHECKPOINT_COMMIT_MS)
+    ap.add_argument("--commit-max", type=int, default=CHECKPOINT_COMMIT_MAX)
+    ap.add_argument("--workdir", default=None, help="where the scratch DBs go (default: system temp)")
+    ap.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = ap.parse_args(argv)
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
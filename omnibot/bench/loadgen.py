@@ -0,0 +1,465 @@
+# omnibot/bench/loadgen.py
+"""
+End-to-end load generator for the API (/chat and /chat/stream).
+
+    python -m omnibot.bench.loadgen --concurrency 16 --duration 60
+    python -m omnibot.bench.loadgen --rate 20 --duration 60 --endpoint stream
+    python -m omnibot.bench.loadgen --url http://host:8000 --rate 5 --mix pdf=1,claims=1
+    python -m omnibot.bench.loadgen --concurrency 32 --compare before.json
+
+Without --url it spawns `uvicorn omnibot.api.server:app` on a free port, fully offline:
+RAG_LLM_BACKEND=fake and RAG_EMBED_BACKEND=fake, with every store path pinned under
+--workdir so the fake-embedded Chroma stores, prototype cache and checkpoint DB never
+touch the live ones. The stores are ingested from RAG_DATA_DIR on first use. Fake-backend
+timings come from the RAG_FAKE_* settings and can be overridden by
+exporting them before running.
+
+Load shapes:
+  --concurrency C   closed loop: C clients, each sends its next request when the last ends
+  --rate R          open loop: Poisson arrivals at R req/s regardless of response times
+
+Questions are drawn from --mix (greet, guardrail, pdf, claims, both). Per request it
+records time-to-first-token (stream: first `token` event; chat: none), total latency,
+tokens/sec after the first token (whitespace tokens of the streamed text), and the
+outcome: ok, busy (429 / `busy` event), or error. The JSON report (--out) has a fixed
+schema so runs can be diffed with --compare.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from omnibot.config.constants import BASE_DIR, DATA_DIR, FLAT_DIR
+
+REPORT_VERSION = 1
+_WS = re.compile(r"\S+")
+
+QUESTIONS: Dict[str, List[str]] = {
+    "greet": [
+        "Hi there", "Hello!", "Good morning", "hey", "Greetings, I have a question",
+    ],
+    "guardrail": [
+        "What's the best pizza in town?", "Can you write me a poem about the ocean?",
+        "Should I double my metformin dose tonight?", "What medication should I take for chest pain?",
+        "Who won the football game yesterday?",
+    ],
+    "pdf": [
+        "What is my copay for a specialist visit?", "Is acupuncture covered under my plan?",
+        "What is the out-of-pocket maximum for in-network care?", "Do I need a referral to see a dermatologist?",
+        "How much is an emergency room visit?", "Are preventive care visits covered at no cost?",
+    ],
+    "claims": [
+        "What is the status of my last claim?", "How much did I owe on my most recent claim?",
+        "Why was my claim from March denied?", "What was the allowed amount on my last lab claim?",
+        "Which provider billed my latest claim?",
+    ],
+    "both": [
+        "My last claim was for physical therapy; what does my plan say about PT coverage and what did I pay?",
+        "Compare what my plan says about imaging copays with what I was charged on my MRI claim.",
+        "Was my specialist claim billed at the copay my benefits document lists?",
+    ],
+}
+DEFAULT_MIX = "greet=1,guardrail=1,pdf=4,claims=3,both=1"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, w = part.partition("=")
+        if kind not in QUESTIONS:
+            raise SystemExit(f"unknown question kind {kind!r} (choose from {', '.join(QUESTIONS)})")
+        mix[kind] = float(w or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise SystemExit("empty --mix")
+    return mix
+
+
+def _pct(sorted_vals: List[float], p: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    idx = min(len(sorted_vals) - 1, int(round(p * (len(sorted_vals) - 1))))
+    return round(sorted_vals[idx], 4)
+
+
+def _dist(values: List[float]) -> Dict[str, Optional[float]]:
+    vals = sorted(v for v in values if v is not None)
+    return {
+        "n": len(vals),
+        "p50": _pct(vals, 0.50),
+        "p95": _pct(vals, 0.95),
+        "p99": _pct(vals, 0.99),
+        "mean": round(sum(vals) / len(vals), 4) if vals else None,
+    }
+
+
+# ---------- one request ----------
+async def _stream_request(client: httpx.AsyncClient, text: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    rec: Dict[str, Any] = {"ttft": None, "total": None, "tokens": 0, "tps": None, "outcome": "ok"}
+    first = last = None
+    parts: List[str] = []
+    async with client.stream("POST", "/chat/stream", json={"text": text}, headers=headers) as r:
+        if r.status_code != 200:
+            await r.aread()
+            rec["outcome"] = "busy" if r.status_code == 429 else "error"
+            rec["status"] = r.status_code
+            rec["total"] = time.perf_counter() - t0
+            return rec
+        event = None
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: ") and event == "token":
+                now = time.perf_counter()
+                if first is None:
+                    first = now
+                last = now
+                parts.append(json.loads(line[6:]).get("token", ""))
+            elif line.startswith("data: ") and event == "busy":
+                rec["outcome"] = "busy"
+    end = time.perf_counter()
+    rec["total"] = end - t0
+    if first is not None:
+        rec["ttft"] = first - t0
+        rec["tokens"] = len(_WS.findall("".join(parts)))
+        if rec["tokens"] > 1 and last > first:
+            rec["tps"] = (rec["tokens"] - 1) / (last - first)
+    return rec
+
+
+async def _chat_request(client: httpx.AsyncClient, text: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    r = await client.post("/chat", json={"text": text}, headers=headers)
+    rec: Dict[str, Any] = {"ttft": None, "total": time.perf_counter() - t0, "tokens": 0, "tps": None, "outcome": "ok"}
+    if r.status_code != 200:
+        rec["outcome"] = "busy" if r.status_code == 429 else "error"
+        rec["status"] = r.status_code
+    else:
+        rec["tokens"] = len(_WS.findall(r.json().get("answer", "")))
+    return rec
+
+
+class LoadGen:
+    def __init__(self, base_url: str, mix: Dict[str, float], endpoint: str, seed: int,
+                 headers: Optional[Dict[str, str]] = None, timeout: float = 120.0):
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=256),
+        )
+        self.kinds = list(mix)
+        self.weights = [mix[k] for k in self.kinds]
+        self.endpoint = endpoint
+        self.rng = random.Random(seed)
+        self.headers = headers or {}
+        self.records: List[Dict[str, Any]] = []
+
+    def _pick(self):
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        endpoint = self.endpoint if self.endpoint != "mixed" else self.rng.choice(("stream", "chat"))
+        return kind, endpoint, self.rng.choice(QUESTIONS[kind])
+
+    async def one(self) -> None:
+        kind, endpoint, text = self._pick()
+        started = time.perf_counter()
+        try:
+            if endpoint == "stream":
+                rec = await _stream_request(self.client, text, self.headers)
+            else:
+                rec = await _chat_request(self.client, text, self.headers)
+        except (httpx.HTTPError, ValueError) as e:
+            rec = {"ttft": None, "total": time.perf_counter() - started, "tokens": 0, "tps": None,
+                   "outcome": "error", "error": type(e).__name__}
+        rec.update(kind=kind, endpoint=endpoint, started=started)
+        self.records.append(rec)
+
+    async def closed_loop(self, concurrency: int, duration: float, requests: Optional[int]) -> None:
+        deadline = time.perf_counter() + duration
+        budget = [requests if requests else None]
+
+        async def client_loop():
+            while time.perf_counter() < deadline:
+                if budget[0] is not None:
+                    if budget[0] <= 0:
+                        return
+                    budget[0] -= 1
+                await self.one()
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+
+    async def open_loop(self, rate: float, duration: float, max_inflight: int) -> int:
+        """Poisson arrivals; returns how many arrivals were dropped at the in-flight cap."""
+        inflight: set = set()
+        dropped = 0
+        t_end = time.perf_counter() + duration
+        next_at = time.perf_counter()
+        while True:
+            next_at += self.rng.expovariate(rate)
+            if next_at >= t_end:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if len(inflight) >= max_inflight:
+                dropped += 1
+                continue
+            task = asyncio.create_task(self.one())
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        if inflight:
+            await asyncio.wait(set(inflight))
+        return dropped
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# ---------- report ----------
+def summarize(records: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    def block(recs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        n = len(recs)
+        ok = [r for r in recs if r["outcome"] == "ok"]
+        return {
+            "requests": n,
+            "ok": len(ok),
+            "busy": sum(r["outcome"] == "busy" for r in recs),
+            "errors": sum(r["outcome"] == "error" for r in recs),
+            "error_rate": round(sum(r["outcome"] != "ok" for r in recs) / n, 4) if n else 0.0,
+            "throughput_rps": round(len(ok) / wall, 3) if wall else 0.0,
+            "ttft_s": _dist([r["ttft"] for r in ok]),
+            "total_s": _dist([r["total"] for r in ok]),
+            "tokens_per_s": _dist([r["tps"] for r in ok]),
+        }
+
+    out = {"overall": block(records), "by_kind": {}, "by_endpoint": {}}
+    for key, field in (("by_kind", "kind"), ("by_endpoint", "endpoint")):
+        for name in sorted({r[field] for r in records}):
+            out[key][name] = block([r for r in records if r[field] == name])
+    return out
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    def ms(v):
+        return f"{v * 1000:8.0f}" if v is not None else f"{'-':>8}"
+
+    print(f"\n{'':<12} {'reqs':>6} {'err%':>6} {'rps':>7} {'ttft p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'total p50':>9} {'p95':>8} {'p99':>8} {'tok/s p50':>9}")
+    rows = [("overall", report["results"]["overall"])]
+    rows += [(k, v) for k, v in report["results"]["by_kind"].items()]
+    for name, b in rows:
+        t, tot, tps = b["ttft_s"], b["total_s"], b["tokens_per_s"]
+        print(f"{name:<12} {b['requests']:>6} {b['error_rate'] * 100:6.1f} {b['throughput_rps']:7.2f} "
+              f"{ms(t['p50'])} {ms(t['p95'])} {ms(t['p99'])} "
+              f"{ms(tot['p50']):>9} {ms(tot['p95'])} {ms(tot['p99'])} "
+              f"{(tps['p50'] or 0):9.1f}")
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    print(f"\ncompare vs {old.get('label') or old.get('started_at')}")
+    a, b = old["results"]["overall"], new["results"]["overall"]
+    for metric in ("ttft_s", "total_s", "tokens_per_s"):
+        for p in ("p50", "p95", "p99"):
+            x, y = a[metric][p], b[metric][p]
+            if x is None or y is None:
+                continue
+            delta = (y - x) / x * 100 if x else 0.0
+            print(f"  {metric:<13} {p}: {x:.4f} -> {y:.4f}  ({delta:+.1f}%)")
+    print(f"  error_rate:   {a['error_rate']:.4f} -> {b['error_rate']:.4f}")
+    print(f"  throughput:   {a['throughput_rps']:.2f} -> {b['throughput_rps']:.2f} req/s")
+
+
+# ---------- local server ----------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def offline_env(workdir: Path) -> Dict[str, str]:
+    # every store path is pinned explicitly: .env (loaded by the server) would otherwise
+    # point the fake-embedded server at the live Chroma dirs and checkpoint DB
+    cache = workdir / ".omnibot_cache"
+    env = dict(os.environ)
+    env.update({
+        "RAG_LLM_BACKEND": "fake",
+        "RAG_EMBED_BACKEND": "fake",
+        "RAG_HOME": str(workdir),
+        "RAG_DATA_DIR": str(DATA_DIR),
+        "RAG_FLAT_DIR": str(FLAT_DIR),
+        "RAG_PDF_CHROMA_DIR": str(workdir / "Chroma"),
+        "RAG_CLAIMS_CHROMA_DIR": str(workdir / "TestVec3"),
+        "RAG_CHECKPOINT_DB": str(workdir / "omnibot_checkpoints.sqlite3"),
+        "RAG_PROTO_CACHE_DIR": str(cache / "prototypes"),
+        "RAG_INDEX_CACHE_DIR": str(cache / "index"),
+        "RAG_TRACE_LOG": str(cache / "traces" / "requests.jsonl"),
+        "RAG_PROFILE_DIR": str(cache / "profiles"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).resolve().parents[2]),
+                                                    env.get("PYTHONPATH")])),
+    })
+    return env
+
+
+def ensure_stores(workdir: Path, env: Dict[str, str]) -> None:
+    """Ingest the fake-embedded stores once per workdir."""
+    for module, store in (("omnibot.ingest.pdf_ingest", "Chroma"), ("omnibot.ingest.claims_ingest", "TestVec3")):
+        if (workdir / store / "chroma.sqlite3").exists():
+            continue
+        print(f"ingesting {store} with fake embeddings ({module}) ...", flush=True)
+        subprocess.run([sys.executable, "-m", module], env=env, check=True)
+
+
+class LocalServer:
+    def __init__(self, workdir: Path, workers: int = 1, log_path: Optional[Path] = None):
+        self.workdir = workdir
+        self.workers = workers
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = log_path or workdir / "loadgen-server.log"
+        self.proc: Optional[subprocess.Popen] = None
+
+    def start(self, env: Dict[str, str]) -> None:
+        self._log = open(self.log_path, "ab")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "omnibot.api.server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning"],
+            env=env, cwd=str(self.workdir), stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    async def wait_ready(self, timeout: float = 180.0) -> None:
+        deadline = time.perf_counter() + timeout
+        async with httpx.AsyncClient(base_url=self.url, timeout=2.0) as c:
+            while time.perf_counter() < deadline:
+                if self.proc.poll() is not None:
+                    raise SystemExit(f"server exited with {self.proc.returncode}; see {self.log_path}")
+                try:
+                    if (await c.get("/stats/admission")).status_code == 200:
+                        return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.25)
+        raise SystemExit(f"server not ready after {timeout:.0f}s; see {self.log_path}")
+
+    def stop(self) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        if getattr(self, "_log", None):
+            self._log.close()
+
+
+async def _fetch(url: str, path: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=5.0) as c:
+            r = await c.get(path)
+            return r.json() if r.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+# ---------- main ----------
+async def run(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    server = None
+    url = args.url
+    if url is None:
+        workdir = Path(args.workdir).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+        env = offline_env(workdir)
+        if not args.no_ingest:
+            ensure_stores(workdir, env)
+        server = LocalServer(workdir, workers=args.workers)
+        server.start(env)
+        url = server.url
+    try:
+        if server is not None:
+            await server.wait_ready()
+        headers = {}
+        if args.coalesce_ms is not None:
+            headers["x-omnibot-coalesce-ms"] = str(args.coalesce_ms)
+        gen = LoadGen(url, mix, args.endpoint, args.seed, headers=headers)
+        if args.warmup > 0:
+            await gen.closed_loop(min(4, args.concurrency or 4), args.warmup, None)
+            gen.records.clear()
+        started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        t0 = time.perf_counter()
+        dropped = 0
+        if args.rate:
+            dropped = await gen.open_loop(args.rate, args.duration, args.max_inflight)
+        else:
+            await gen.closed_loop(args.concurrency, args.duration, args.requests)
+        wall = time.perf_counter() - t0
+        await gen.aclose()
+        report = {
+            "version": REPORT_VERSION,
+            "label": args.label,
+            "started_at": started_at,
+            "target": "spawned" if server is not None else url,
+            "config": {
+                "mode": "open" if args.rate else "closed",
+                "rate": args.rate, "concurrency": None if args.rate else args.concurrency,
+                "duration_s": args.duration, "requests": args.requests, "endpoint": args.endpoint,
+                "mix": mix, "seed": args.seed, "workers": args.workers if server is not None else None,
+                "coalesce_ms": args.coalesce_ms,
+                "fake_backends": {k: v for k, v in os.environ.items() if k.startswith("RAG_FAKE_")},
+            },
+            "wall_s": round(wall, 3),
+            "client_dropped": dropped,
+            "results": summarize(gen.records, wall),
+            "server": {"admission": await _fetch(url, "/stats/admission"),
+                       "backends": await _fetch(url, "/stats/backends")},
+        }
+        return report
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    shape = ap.add_mutually_exclusive_group()
+    shape.add_argument("--concurrency", type=int, default=8, help="closed loop: concurrent clients")
+    shape.add_argument("--rate", type=float, default=None, help="open loop: arrivals per second")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    ap.add_argument("--requests", type=int, default=None, help="closed loop: stop after N requests")
+    ap.add_argument("--warmup", type=float, default=3.0, help="seconds of unrecorded warm-up load")
+    ap.add_argument("--max-inflight", type=int, default=1000, help="open loop: client-side in-flight cap")
+    ap.add_argument("--endpoint", choices=("stream", "chat", "mixed"), default="stream")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"question kinds and weights (default {DEFAULT_MIX})")
+    ap.add_argument("--coalesce-ms", type=float, default=None, help="X-Omnibot-Coalesce-Ms for stream requests")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--url", default=None, help="target an already running server instead of spawning one")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    ap.add_argument("--workdir", default=str(BASE_DIR / ".omnibot_cache" / "loadgen"),
+                    help="RAG_HOME of the spawned server (fake-embedded stores live here)")
+    ap.add_argument("--no-ingest", action="store_true", help="don't build missing stores in --workdir")
+    ap.add_argument("--label", default=None, help="free-form run label stored in the report")
+    ap.add_argument("--out", default=None, help="report path (default <workdir>/reports/loadgen-<time>.json)")
+    ap.add_argument("--compare", default=None, help="previous report to diff against")
+    args = ap.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    out = Path(args.out) if args.out else (
+        Path(args.workdir) / "reports" / f"loadgen-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print_summary(report)
+    if report["client_dropped"]:
+        print(f"\nclient dropped {report['client_dropped']} arrivals at --max-inflight {args.max_inflight}")
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report)
+    print(f"\nreport: {out}")
+
+
+if __name__ == "__main__":
+    main()
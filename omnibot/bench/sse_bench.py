@@ -0,0 +1,137 @@
+# omnibot/bench/sse_bench.py
+"""
+SSE framing benchmark: frames/sec and CPU per streamed answer.
+
+    python -m omnibot.bench.sse_bench
+    python -m omnibot.bench.sse_bench --streams 200 --tokens 300 --tps 60 --window-ms 20
+
+Runs the /chat/stream token loop (queue -> frame -> send) for `--streams` concurrent
+answers whose tokens arrive at `--tps` with jitter, under three modes:
+
+  legacy     the previous _sse (json.dumps + splitlines + join + encode) per token
+  fast       omnibot.api.sse.token_frame per token
+  coalesced  token_frame + TokenCoalescer (--window-ms / --max-bytes)
+
+"sends" is the number of frames handed to the ASGI server, i.e. network writes.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from omnibot.api.sse import TokenCoalescer, next_events, token_frame
+
+
+def legacy_sse(event: str, data: dict) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False)
+    return (
+        f"event: {event}\n" +
+        "\n".join(f"data: {line}" for line in payload.splitlines()) +
+        "\n\n"
+    ).encode("utf-8")
+
+
+def _tokens(n: int, rng: random.Random) -> List[str]:
+    words = ["your", "copay", "for", "a", "specialist", "visit", "is", "$40", "after", "the", "deductible",
+             "coinsurance", "applies", "in-network", "claim", "allowed", "amount", "ñ", "—", "“covered”"]
+    return [(" " if i else "") + rng.choice(words) for i in range(n)]
+
+
+async def _producer(q: asyncio.Queue, agent: str, tokens: List[str], tps: float, rng: random.Random):
+    base = 1.0 / tps
+    for tok in tokens:
+        await asyncio.sleep(base * rng.uniform(0.3, 1.7))
+        await q.put({"kind": "token", "agent": agent, "token": tok})
+    await q.put({"kind": "done", "agent": agent})
+
+
+async def _stream(mode: str, tokens: List[str], tps: float, window_ms: float, max_bytes: int,
+                  seed: int, sink: Dict[str, int]) -> None:
+    rng = random.Random(seed)
+    q: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_producer(q, "pdf", tokens, tps, rng))
+    coalescer = TokenCoalescer(window_ms=window_ms if mode == "coalesced" else 0, max_bytes=max_bytes)
+
+    def send(frame: bytes) -> None:
+        sink["sends"] += 1
+        sink["bytes"] += len(frame)
+
+    finished = False
+    while not finished:
+        for ev in await next_events(q, coalescer):
+            if ev["kind"] == "token":
+                if mode == "legacy":
+                    send(legacy_sse("token", {"agent": ev["agent"], "token": ev["token"]}))
+                else:
+                    for f in coalescer.add(ev["agent"], ev["token"]):
+                        send(f)
+                continue
+            for f in coalescer.flush():
+                send(f)
+            finished = True
+        if coalescer.due_in() == 0.0:
+            for f in coalescer.flush():
+                send(f)
+    await task
+
+
+async def run_mode(mode: str, args) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    answers = [_tokens(args.tokens, rng) for _ in range(args.streams)]
+    sink = {"sends": 0, "bytes": 0}
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(
+        _stream(mode, toks, args.tps, args.window_ms, args.max_bytes, args.seed + i, sink)
+        for i, toks in enumerate(answers)
+    ))
+    wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    return {
+        "sends": sink["sends"],
+        "sends_per_answer": sink["sends"] / args.streams,
+        "frames_per_sec": sink["sends"] / wall,
+        "bytes_per_answer": sink["bytes"] / args.streams,
+        "cpu_ms_per_answer": cpu * 1000 / args.streams,
+        "wall_s": wall,
+    }
+
+
+def encoder_microbench(n: int = 200_000) -> Dict[str, float]:
+    """Pure encode cost per token frame (ns), without the event loop."""
+    out = {}
+    encoders: Dict[str, Callable[[], bytes]] = {
+        "legacy": lambda: legacy_sse("token", {"agent": "pdf", "token": " deductible"}),
+        "fast": lambda: token_frame("pdf", " deductible"),
+    }
+    for name, fn in encoders.items():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        out[name] = (time.perf_counter() - t0) / n * 1e9
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--streams", type=int, default=100)
+    ap.add_argument("--tokens", type=int, default=300)
+    ap.add_argument("--tps", type=float, default=60.0, help="tokens/sec per stream")
+    ap.add_argument("--window-ms", type=float, default=20.0)
+    ap.add_argument("--max-bytes", type=int, default=512)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    ns = encoder_microbench()
+    print(f"encode per token frame: legacy {ns['legacy']:.0f} ns, fast {ns['fast']:.0f} ns\n")
+    print(f"{args.streams} streams x {args.tokens} tokens @ {args.tps:g} tok/s")
+    print(f"{'mode':<10} {'sends/ans':>10} {'frames/s':>10} {'KB/ans':>8} {'cpu ms/ans':>11} {'wall s':>7}")
+    for mode in ("legacy", "fast", "coalesced"):
+        r = asyncio.run(run_mode(mode, args))
+        print(f"{mode:<10} {r['sends_per_answer']:10.1f} {r['frames_per_sec']:10.0f} "
+              f"{r['bytes_per_answer'] / 1024:8.1f} {r['cpu_ms_per_answer']:11.2f} {r['wall_s']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
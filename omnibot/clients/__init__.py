@@ -0,0 +1,19 @@
+"""Shared LLM / embedding clients with per-backend concurrency limits."""
+
+from omnibot._lazy import lazy_exports
+
+_EXPORTS = {
+    "BackendLimiter": (".limits", "BackendLimiter"),
+    "limiter": (".registry", "limiter"),
+    "backend_stats": (".registry", "backend_stats"),
+    "http_clients": (".registry", "http_clients"),
+    "aclose_all": (".registry", "aclose_all"),
+    "get_embeddings": (".registry", "get_embeddings"),
+    "get_ollama_llm": (".registry", "get_ollama_llm"),
+    "get_chat_openai": (".registry", "get_chat_openai"),
+    "astream_limited": (".registry", "astream_limited"),
+    "ainvoke_limited": (".registry", "ainvoke_limited"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,175 @@
+# omnibot/clients/fake.py
+"""
+Offline, deterministic stand-ins for the remote backends (load tests, CI, profiling).
+
+  - HashingEmbeddings: feature-hashed word + char-trigram vectors with the same
+    dimensionality as the live model, so lexical neighbours stay close and the
+    guardrail / router / Chroma all behave sensibly without OpenAI.
+  - FakeStreamingLLM / FakeStreamingChatModel: drop-in replacements for OllamaLLM
+    and ChatOpenAI that stream a deterministic answer with a configurable
+    time-to-first-token, tokens/sec and jitter.
+
+Select them with RAG_EMBED_BACKEND=fake and/or RAG_LLM_BACKEND=fake. Don't mix
+vector stores built with fake and live embeddings: ingest into separate dirs.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, GenerationChunk
+
+from omnibot.config.constants import (
+    EMBED_DIM, FAKE_EMBED_LATENCY_MS,
+    FAKE_LLM_TTFT_MS, FAKE_LLM_TOKENS_PER_SEC, FAKE_LLM_JITTER, FAKE_LLM_MAX_TOKENS,
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# ---------- Embeddings ----------
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dim: int = EMBED_DIM, latency_ms: float = FAKE_EMBED_LATENCY_MS):
+        self.dim = int(dim)
+        self.latency_s = max(0.0, latency_ms) / 1000.0
+
+    def _vector(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        words = _WORD.findall((text or "").lower())
+        feats = [(w, 1.0) for w in words]
+        for w in words:
+            padded = f" {w} "
+            feats.extend((padded[i:i + 3], 0.5) for i in range(len(padded) - 2))
+        for feat, weight in feats:
+            h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += weight if (h >> 63) & 1 else -weight
+        norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+        return [x / norm for x in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self._vector(text)
+
+
+# ---------- Streaming LLMs ----------
+def _plan(prompt: str, max_tokens: int, ttft_ms: float, tps: float, jitter: float):
+    """Deterministic (tokens, per-token delays) for a prompt."""
+    rng = random.Random(hashlib.sha1(prompt.encode("utf-8")).digest())
+    vocab = [w for w in _WORD.findall(prompt) if len(w) > 2] or ["ok"]
+    n = max(1, min(max_tokens, rng.randint(max_tokens // 2 or 1, max_tokens)))
+    tokens = [(" " if i else "") + rng.choice(vocab) for i in range(n)]
+    base = 1.0 / tps if tps > 0 else 0.0
+
+    def vary(x: float) -> float:
+        return max(0.0, x * (1.0 + rng.uniform(-jitter, jitter)))
+
+    delays = [vary(ttft_ms / 1000.0)] + [vary(base) for _ in range(n - 1)]
+    return tokens, delays
+
+
+def _messages_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+
+class FakeStreamingLLM(LLM):
+    """Completion-style stand-in for OllamaLLM."""
+
+    model: str = "fake"
+    ttft_ms: float = FAKE_LLM_TTFT_MS
+    tokens_per_sec: float = FAKE_LLM_TOKENS_PER_SEC
+    jitter: float = FAKE_LLM_JITTER
+    max_tokens: int = FAKE_LLM_MAX_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "omnibot-fake"
+
+    def _plan(self, prompt: str):
+        return _plan(prompt, self.max_tokens, self.ttft_ms, self.tokens_per_sec, self.jitter)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return "".join(c.text for c in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return "".join([c.text async for c in self._astream(prompt, stop, run_manager, **kwargs)])
+
+    def _stream(self, prompt: str, stop=None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        tokens, delays = self._plan(prompt)
+        for tok, d in zip(tokens, delays):
+            time.sleep(d)
+            if run_manager:
+                run_manager.on_llm_new_token(tok)
+            yield GenerationChunk(text=tok)
+
+    async def _astream(self, prompt: str, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        tokens, delays = self._plan(prompt)
+        for tok, d in zip(tokens, delays):
+            await asyncio.sleep(d)
+            if run_manager:
+                await run_manager.on_llm_new_token(tok)
+            yield GenerationChunk(text=tok)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat-style stand-in for ChatOpenAI."""
+
+    model: str = "fake"
+    ttft_ms: float = FAKE_LLM_TTFT_MS
+    tokens_per_sec: float = FAKE_LLM_TOKENS_PER_SEC
+    jitter: float = FAKE_LLM_JITTER
+    max_tokens: int = FAKE_LLM_MAX_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "omnibot-fake-chat"
+
+    def _plan(self, prompt: str):
+        return _plan(prompt, self.max_tokens, self.ttft_ms, self.tokens_per_sec, self.jitter)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text = "".join(c.message.content for c in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        parts = [c.message.content async for c in self._astream(messages, stop, run_manager, **kwargs)]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(parts)))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens, delays = self._plan(_messages_text(messages))
+        for tok, d in zip(tokens, delays):
+            time.sleep(d)
+            if run_manager:
+                run_manager.on_llm_new_token(tok)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, delays = self._plan(_messages_text(messages))
+        for tok, d in zip(tokens, delays):
+            await asyncio.sleep(d)
+            if run_manager:
+                await run_manager.on_llm_new_token(tok)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
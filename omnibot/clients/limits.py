@@ -0,0 +1,151 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+
+class _Waiter:
+    """One queued caller. Either a thread (Event) or a coroutine (Future on its loop)."""
+
+    __slots__ = ("event", "loop", "fut", "granted")
+
+    def __init__(self, *, event: Optional[threading.Event] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 fut: Optional[asyncio.Future] = None):
+        self.event = event
+        self.loop = loop
+        self.fut = fut
+        self.granted = False
+
+    def wake(self) -> bool:
+        if self.event is not None:
+            self.event.set()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.fut)
+            return True
+        except RuntimeError:
+            # loop already closed: nobody is left to take the slot
+            return False
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class BackendLimiter:
+    """
+    Max-concurrency gate with a strict FIFO wait queue.
+
+    Works for both sync callers (retrieval in executor threads) and async callers
+    (token streaming on the event loop). A released slot is handed directly to the
+    head of the queue, so late arrivals can't jump ahead of queued requests.
+    """
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        # stats
+        self._acquired = 0
+        self._queued = 0
+        self._peak_queue = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- acquire / release ----------
+    def _enter_or_enqueue(self, waiter: _Waiter) -> bool:
+        """Take a free slot (True) or join the queue (False). Caller holds the lock."""
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return True
+        self._waiters.append(waiter)
+        self._queued += 1
+        self._peak_queue = max(self._peak_queue, len(self._waiters))
+        return False
+
+    def _record(self, waited: float) -> None:
+        with self._lock:
+            self._acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def acquire(self) -> None:
+        t0 = time.perf_counter()
+        waiter = _Waiter(event=threading.Event())
+        with self._lock:
+            entered = self._enter_or_enqueue(waiter)
+        if not entered:
+            waiter.event.wait()
+        self._record(time.perf_counter() - t0)
+
+    async def acquire_async(self) -> None:
+        t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop=loop, fut=loop.create_future())
+        with self._lock:
+            entered = self._enter_or_enqueue(waiter)
+        if not entered:
+            try:
+                await waiter.fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._waiters.remove(waiter)
+                if granted:
+                    # slot was handed to us just as we got cancelled: pass it on
+                    self.release()
+                raise
+        self._record(time.perf_counter() - t0)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                if waiter.wake():
+                    return  # slot handed over; in-flight count unchanged
+            self._in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # ---------- stats ----------
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            acquired = self._acquired
+            return {
+                "backend": self.name,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "peak_queue_depth": self._peak_queue,
+                "acquired": acquired,
+                "queued": self._queued,
+                "wait_avg_ms": (self._wait_total / acquired * 1000.0) if acquired else 0.0,
+                "wait_max_ms": self._wait_max * 1000.0,
+            }
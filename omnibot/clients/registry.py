@@ -0,0 +1,183 @@
+# omnibot/clients/registry.py
+"""
+Process-wide registry of LLM / embedding clients.
+
+Every agent, the router and the guardrail ask this module for their clients, so a
+worker holds exactly one keep-alive HTTP pool per service (OpenAI, Ollama) and one
+client object per (model, kwargs). Each backend is also fronted by a FIFO
+`BackendLimiter`, which caps concurrent calls and queues the rest.
+
+RAG_LLM_BACKEND / RAG_EMBED_BACKEND=fake swap in the offline stand-ins from
+omnibot.clients.fake; limiters still apply, so queueing behaves as in production.
+"""
+from __future__ import annotations
+import threading
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+from omnibot.config.constants import (
+    EMBED_MODEL, OLLAMA_BASE_URL, LLM_BACKEND, EMBED_BACKEND,
+    OLLAMA_MAX_CONCURRENCY, OPENAI_CHAT_MAX_CONCURRENCY, OPENAI_EMBED_MAX_CONCURRENCY,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP_TIMEOUT,
+)
+from .limits import BackendLimiter
+
+# limiter name -> max concurrency
+_BACKEND_LIMITS: Dict[str, int] = {
+    "ollama": OLLAMA_MAX_CONCURRENCY,
+    "openai-chat": OPENAI_CHAT_MAX_CONCURRENCY,
+    "openai-embed": OPENAI_EMBED_MAX_CONCURRENCY,
+}
+
+_lock = threading.RLock()
+_limiters: Dict[str, BackendLimiter] = {}
+_pools: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+_clients: Dict[Tuple[Any, ...], Any] = {}
+
+
+# ---------- Limiters ----------
+def limiter(backend: str) -> BackendLimiter:
+    with _lock:
+        lim = _limiters.get(backend)
+        if lim is None:
+            lim = BackendLimiter(backend, _BACKEND_LIMITS.get(backend, OLLAMA_MAX_CONCURRENCY))
+            _limiters[backend] = lim
+        return lim
+
+
+def backend_stats() -> List[Dict[str, Any]]:
+    """Queue depth / wait-time snapshot for every backend that has been used."""
+    with _lock:
+        lims = list(_limiters.values())
+    return [lim.snapshot() for lim in lims]
+
+
+# ---------- HTTP pools ----------
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def http_clients(service: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """One (sync, async) keep-alive pool pair per remote service."""
+    with _lock:
+        pair = _pools.get(service)
+        if pair is None:
+            pair = (
+                httpx.Client(limits=_http_limits(), timeout=HTTP_TIMEOUT),
+                httpx.AsyncClient(limits=_http_limits(), timeout=HTTP_TIMEOUT),
+            )
+            _pools[service] = pair
+        return pair
+
+
+async def aclose_all() -> None:
+    """Close pooled connections (app shutdown)."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _clients.clear()
+    for sync_client, async_client in pools:
+        sync_client.close()
+        await async_client.aclose()
+
+
+def _cached(key: Tuple[Any, ...], factory):
+    with _lock:
+        obj = _clients.get(key)
+        if obj is None:
+            obj = factory()
+            _clients[key] = obj
+        return obj
+
+
+def _kwargs_key(kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+
+
+# ---------- Embeddings ----------
+class LimitedEmbeddings(Embeddings):
+    """Embeddings wrapper that takes a backend slot around every remote call."""
+
+    def __init__(self, inner: Embeddings, backend: str):
+        self.inner = inner
+        self.limiter = limiter(backend)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.limiter.slot():
+            return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.limiter.slot():
+            return self.inner.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        async with self.limiter.aslot():
+            return await self.inner.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        async with self.limiter.aslot():
+            return await self.inner.aembed_query(text)
+
+
+def get_embeddings(model: str | None = None) -> Embeddings:
+    model = model or EMBED_MODEL
+
+    def build():
+        if EMBED_BACKEND == "fake":
+            from .fake import HashingEmbeddings
+            return LimitedEmbeddings(HashingEmbeddings(), "openai-embed")
+        from langchain_openai import OpenAIEmbeddings
+        sync_client, async_client = http_clients("openai")
+        inner = OpenAIEmbeddings(model=model, http_client=sync_client, http_async_client=async_client)
+        return LimitedEmbeddings(inner, "openai-embed")
+
+    return _cached(("embeddings", model), build)
+
+
+# ---------- Chat / LLM ----------
+def get_ollama_llm(model: str, **kwargs: Any):
+    """Shared OllamaLLM per (model, kwargs); one keep-alive pool per client."""
+    def build():
+        if LLM_BACKEND == "fake":
+            from .fake import FakeStreamingLLM
+            return FakeStreamingLLM(model=model, max_tokens=int(kwargs.get("num_predict", 120)))
+        from langchain_ollama import OllamaLLM
+        return OllamaLLM(
+            model=model,
+            base_url=OLLAMA_BASE_URL,
+            client_kwargs={"limits": _http_limits(), "timeout": HTTP_TIMEOUT},
+            **kwargs,
+        )
+
+    return _cached(("ollama", model, _kwargs_key(kwargs)), build)
+
+
+def get_chat_openai(model: str, **kwargs: Any):
+    def build():
+        if LLM_BACKEND == "fake":
+            from .fake import FakeStreamingChatModel
+            return FakeStreamingChatModel(model=model)
+        from langchain_openai import ChatOpenAI
+        sync_client, async_client = http_clients("openai")
+        return ChatOpenAI(model=model, http_client=sync_client, http_async_client=async_client, **kwargs)
+
+    return _cached(("openai-chat", model, _kwargs_key(kwargs)), build)
+
+
+# ---------- Limited invocation helpers ----------
+async def astream_limited(backend: str, runnable, payload: Any) -> AsyncIterator[Any]:
+    """Stream `runnable` while holding one slot of `backend` for the whole generation."""
+    async with limiter(backend).aslot():
+        async for chunk in runnable.astream(payload):
+            yield chunk
+
+
+async def ainvoke_limited(backend: str, runnable, payload: Any) -> Any:
+    async with limiter(backend).aslot():
+        return await runnable.ainvoke(payload)
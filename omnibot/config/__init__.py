@@ -4,8 +4,19 @@ from .constants import (
     BASE_DIR, DATA_DIR, FLAT_DIR, RAW_FHIR_GLOB,
     CLAIMS_CHROMA_DIR, PDF_CHROMA_DIR,
     EMBED_MODEL, CLAIMS_LLM_MODEL, PDF_LLM_MODEL, ROUTER_MODEL,
-    PDF_TOP_K, CLAIMS_TOP_K, MAX_CHUNK_CHARS, HISTORY_TURNS,
-    ROUTER_KWARGS, CHECKPOINT_DB, CHUNK_SIZE, CHUNK_OVERLAP, WRITE_JSONL,
+    PDF_TOP_K, CLAIMS_TOP_K, MAX_CHUNK_CHARS, HISTORY_TURNS, HISTORY_SUMMARY_LINES, HISTORY_TURN_CHARS,
+    ROUTER_KWARGS, ROUTER_MODE, CHECKPOINT_DB, CHUNK_SIZE, CHUNK_OVERLAP, WRITE_JSONL,
+    OLLAMA_BASE_URL, OLLAMA_MAX_CONCURRENCY, OPENAI_CHAT_MAX_CONCURRENCY, OPENAI_EMBED_MAX_CONCURRENCY,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP_TIMEOUT,
+    LLM_BACKEND, EMBED_BACKEND, EMBED_DIM, FAKE_EMBED_LATENCY_MS,
+    FAKE_LLM_TTFT_MS, FAKE_LLM_TOKENS_PER_SEC, FAKE_LLM_JITTER, FAKE_LLM_MAX_TOKENS,
+    PROTO_CACHE_DIR, SHARED_INDEX, INDEX_CACHE_DIR, SPECULATIVE_RETRIEVAL, COALESCE_REQUESTS,
+    ADMISSION_MAX_ACTIVE, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_S, SSE_COALESCE_MS, SSE_COALESCE_BYTES,
+    SSE_COALESCE_MAX_MS, DISCONNECT_POLL_S, BATCH_CONCURRENCY, BATCH_MAX_ITEMS, BATCH_MAX_WAIT_S,
+    TRACE_LOG, TRACE_LOG_MAX_BYTES, TRACE_LOG_BACKUPS, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS, PROFILE_DIR,
+    PROFILE_MAX_FILES, PROFILE_TOKEN, WS_MAX_INFLIGHT, WS_INITIAL_CREDIT, WS_CREDIT_TIMEOUT_S,
+    CHECKPOINT_POOL, CHECKPOINT_READERS, CHECKPOINT_COMMIT_MS, CHECKPOINT_COMMIT_MAX, CHECKPOINT_PRAGMAS,
+    MESSAGES_KEEP, CHECKPOINT_KEEP, CHECKPOINT_TTL_DAYS, CHECKPOINT_JANITOR_INTERVAL_S, CHECKPOINT_VACUUM_FREE,
 )
 from .prompts import ROUTER_PROMPT, CLAIMS_ASSIST_SYSTEM, BENEFITS_TEMPLATE
 
@@ -14,8 +25,19 @@ __all__ = [
     "BASE_DIR", "DATA_DIR", "FLAT_DIR", "RAW_FHIR_GLOB",
     "CLAIMS_CHROMA_DIR", "PDF_CHROMA_DIR",
     "EMBED_MODEL", "CLAIMS_LLM_MODEL", "PDF_LLM_MODEL", "ROUTER_MODEL",
-    "PDF_TOP_K", "CLAIMS_TOP_K", "MAX_CHUNK_CHARS", "HISTORY_TURNS",
-    "ROUTER_KWARGS", "CHECKPOINT_DB", "CHUNK_SIZE", "CHUNK_OVERLAP", "WRITE_JSONL",
+    "PDF_TOP_K", "CLAIMS_TOP_K", "MAX_CHUNK_CHARS", "HISTORY_TURNS", "HISTORY_SUMMARY_LINES", "HISTORY_TURN_CHARS",
+    "ROUTER_KWARGS", "ROUTER_MODE", "CHECKPOINT_DB", "CHUNK_SIZE", "CHUNK_OVERLAP", "WRITE_JSONL",
+    "OLLAMA_BASE_URL", "OLLAMA_MAX_CONCURRENCY", "OPENAI_CHAT_MAX_CONCURRENCY", "OPENAI_EMBED_MAX_CONCURRENCY",
+    "HTTP_MAX_CONNECTIONS", "HTTP_MAX_KEEPALIVE", "HTTP_KEEPALIVE_EXPIRY", "HTTP_TIMEOUT",
+    "LLM_BACKEND", "EMBED_BACKEND", "EMBED_DIM", "FAKE_EMBED_LATENCY_MS",
+    "FAKE_LLM_TTFT_MS", "FAKE_LLM_TOKENS_PER_SEC", "FAKE_LLM_JITTER", "FAKE_LLM_MAX_TOKENS",
+    "PROTO_CACHE_DIR", "SHARED_INDEX", "INDEX_CACHE_DIR", "SPECULATIVE_RETRIEVAL", "COALESCE_REQUESTS",
+    "ADMISSION_MAX_ACTIVE", "ADMISSION_MAX_QUEUE", "ADMISSION_MAX_WAIT_S", "SSE_COALESCE_MS", "SSE_COALESCE_BYTES",
+    "SSE_COALESCE_MAX_MS", "DISCONNECT_POLL_S", "BATCH_CONCURRENCY", "BATCH_MAX_ITEMS", "BATCH_MAX_WAIT_S",
+    "TRACE_LOG", "TRACE_LOG_MAX_BYTES", "TRACE_LOG_BACKUPS", "PROFILE_SAMPLE_RATE", "PROFILE_INTERVAL_MS", "PROFILE_DIR",
+    "PROFILE_MAX_FILES", "PROFILE_TOKEN", "WS_MAX_INFLIGHT", "WS_INITIAL_CREDIT", "WS_CREDIT_TIMEOUT_S",
+    "CHECKPOINT_POOL", "CHECKPOINT_READERS", "CHECKPOINT_COMMIT_MS", "CHECKPOINT_COMMIT_MAX", "CHECKPOINT_PRAGMAS",
+    "MESSAGES_KEEP", "CHECKPOINT_KEEP", "CHECKPOINT_TTL_DAYS", "CHECKPOINT_JANITOR_INTERVAL_S", "CHECKPOINT_VACUUM_FREE",
     # prompts
     "ROUTER_PROMPT", "CLAIMS_ASSIST_SYSTEM", "BENEFITS_TEMPLATE",
 ]
@@ -6,8 +6,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # -------- Base & Data Paths --------
-BASE_DIR = Path(os.getenv("RAG_HOME"))
-DATA_DIR = Path(os.getenv("RAG_DATA_DIR"))
+# RAG_HOME defaults to the repo checkout so importing the package never requires it
+BASE_DIR = Path(os.getenv("RAG_HOME") or Path(__file__).resolve().parents[2])
+DATA_DIR = Path(os.getenv("RAG_DATA_DIR") or BASE_DIR / "data")
 FLAT_DIR = Path(os.getenv("RAG_FLAT_DIR", DATA_DIR / "flat2"))
 RAW_FHIR_GLOB = os.getenv("RAG_RAW_FHIR_GLOB")
 
@@ -26,11 +27,109 @@ PDF_TOP_K = int(os.getenv("RAG_PDF_TOP_K", 5))
 CLAIMS_TOP_K = int(os.getenv("RAG_CLAIMS_TOP_K", 4))
 MAX_CHUNK_CHARS = int(os.getenv("RAG_MAX_CHUNK_CHARS", 900))
 HISTORY_TURNS = int(os.getenv("RAG_HISTORY_TURNS", 4))
+HISTORY_SUMMARY_LINES = int(os.getenv("RAG_HISTORY_SUMMARY_LINES", 6))  # 0 disables the summarized tail
+HISTORY_TURN_CHARS = int(os.getenv("RAG_HISTORY_TURN_CHARS", 1200))
+# raw `messages` kept per thread in the graph state (older ones are removed; 0 keeps all)
+MESSAGES_KEEP = int(os.getenv("RAG_MESSAGES_KEEP", 2 * HISTORY_TURNS))
 
 # Router & graph
 ROUTER_KWARGS = {"num_predict": 8, "temperature": 0.0, "keep_alive": "10m"}
+ROUTER_MODE = os.getenv("RAG_ROUTER_MODE", "semantic").lower()  # semantic (LLM only when unsure) | llm
 CHECKPOINT_DB = Path(os.getenv("RAG_CHECKPOINT_DB", BASE_DIR / "omnibot_checkpoints.sqlite3"))
 
+# Backend clients (shared pools + concurrency caps)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("RAG_OLLAMA_MAX_CONCURRENCY", 4))
+OPENAI_CHAT_MAX_CONCURRENCY = int(os.getenv("RAG_OPENAI_CHAT_MAX_CONCURRENCY", 16))
+OPENAI_EMBED_MAX_CONCURRENCY = int(os.getenv("RAG_OPENAI_EMBED_MAX_CONCURRENCY", 16))
+HTTP_MAX_CONNECTIONS = int(os.getenv("RAG_HTTP_MAX_CONNECTIONS", 32))
+HTTP_MAX_KEEPALIVE = int(os.getenv("RAG_HTTP_MAX_KEEPALIVE", 16))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("RAG_HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_TIMEOUT = float(os.getenv("RAG_HTTP_TIMEOUT", 120))
+
+# Offline stand-ins (load tests / CI): "live" or "fake", see omnibot.clients.fake
+LLM_BACKEND = os.getenv("RAG_LLM_BACKEND", "live").lower()
+EMBED_BACKEND = os.getenv("RAG_EMBED_BACKEND", "live").lower()
+EMBED_DIM = int(os.getenv("RAG_EMBED_DIM", 1536))  # text-embedding-3-small
+FAKE_EMBED_LATENCY_MS = float(os.getenv("RAG_FAKE_EMBED_LATENCY_MS", 60))
+FAKE_LLM_TTFT_MS = float(os.getenv("RAG_FAKE_LLM_TTFT_MS", 300))
+FAKE_LLM_TOKENS_PER_SEC = float(os.getenv("RAG_FAKE_LLM_TOKENS_PER_SEC", 30))
+FAKE_LLM_JITTER = float(os.getenv("RAG_FAKE_LLM_JITTER", 0.25))
+FAKE_LLM_MAX_TOKENS = int(os.getenv("RAG_FAKE_LLM_MAX_TOKENS", 120))
+
+# Guardrail / router prototype artifacts (memory-mapped at startup)
+PROTO_CACHE_DIR = Path(os.getenv("RAG_PROTO_CACHE_DIR", BASE_DIR / ".omnibot_cache" / "prototypes"))
+
+# Multi-worker deployments: serve retrieval from read-only mmap exports of the Chroma
+# stores, so every worker on a host shares one copy through the page cache
+SHARED_INDEX = os.getenv("RAG_SHARED_INDEX", "false").lower() == "true"
+INDEX_CACHE_DIR = Path(os.getenv("RAG_INDEX_CACHE_DIR", BASE_DIR / ".omnibot_cache" / "index"))
+
+# Serving pipeline
+# start guardrail, router and both retrievals at once; keep only what the final route needs
+SPECULATIVE_RETRIEVAL = os.getenv("RAG_SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+# share one retrieval + generation between concurrent identical questions (off until measured)
+COALESCE_REQUESTS = os.getenv("RAG_COALESCE_REQUESTS", "false").lower() == "true"
+
+# SSE token coalescing: batch tokens per agent for up to N ms / N bytes (0 ms disables)
+SSE_COALESCE_MS = float(os.getenv("RAG_SSE_COALESCE_MS", 20))
+SSE_COALESCE_BYTES = int(os.getenv("RAG_SSE_COALESCE_BYTES", 512))
+# upper bound for any window, including the per-request x-omnibot-coalesce-ms override
+SSE_COALESCE_MAX_MS = float(os.getenv("RAG_SSE_COALESCE_MAX_MS", 250))
+
+# how often an open stream checks whether its client is still connected
+DISCONNECT_POLL_S = float(os.getenv("RAG_DISCONNECT_POLL_S", 0.5))
+
+# Admission control: concurrent agent runs, queued runs and max queue wait before shedding
+ADMISSION_MAX_ACTIVE = int(os.getenv("RAG_ADMISSION_MAX_ACTIVE", 32))
+ADMISSION_MAX_QUEUE = int(os.getenv("RAG_ADMISSION_MAX_QUEUE", 64))
+ADMISSION_MAX_WAIT_S = float(os.getenv("RAG_ADMISSION_MAX_WAIT_S", 5.0))
+
+# /chat/batch: concurrent items per batch, max items per request, and how long a batch
+# item may queue for an admission slot (batch items yield to interactive traffic)
+BATCH_CONCURRENCY = int(os.getenv("RAG_BATCH_CONCURRENCY", 8))
+BATCH_MAX_ITEMS = int(os.getenv("RAG_BATCH_MAX_ITEMS", 5000))
+BATCH_MAX_WAIT_S = float(os.getenv("RAG_BATCH_MAX_WAIT_S", 60.0))
+
+# Per-request span trees (see omnibot.api.trace); RAG_TRACE_LOG="" disables the log file
+TRACE_LOG = os.getenv("RAG_TRACE_LOG", str(BASE_DIR / ".omnibot_cache" / "traces" / "requests.jsonl")) or None
+TRACE_LOG_MAX_BYTES = int(os.getenv("RAG_TRACE_LOG_MAX_BYTES", 20 * 1024 * 1024))
+TRACE_LOG_BACKUPS = int(os.getenv("RAG_TRACE_LOG_BACKUPS", 5))
+
+# Sampling profiler (see omnibot.api.profiler): fraction of requests profiled in place,
+# stack sampling interval, output directory and how many profiles it keeps (0 = all).
+# X-Omnibot-Profile: <RAG_PROFILE_TOKEN> forces a profile; an empty token disables the header.
+PROFILE_SAMPLE_RATE = float(os.getenv("RAG_PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_INTERVAL_MS = float(os.getenv("RAG_PROFILE_INTERVAL_MS", 5.0))
+PROFILE_DIR = Path(os.getenv("RAG_PROFILE_DIR", BASE_DIR / ".omnibot_cache" / "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("RAG_PROFILE_MAX_FILES", 50))
+PROFILE_TOKEN = os.getenv("RAG_PROFILE_TOKEN", "")
+
+# /ws/chat: concurrent questions per connection and the default per-question token credit
+WS_MAX_INFLIGHT = int(os.getenv("RAG_WS_MAX_INFLIGHT", 8))
+WS_INITIAL_CREDIT = int(os.getenv("RAG_WS_INITIAL_CREDIT", 64))
+# a question whose client sends no credit for this long is cancelled (0 = wait forever)
+WS_CREDIT_TIMEOUT_S = float(os.getenv("RAG_WS_CREDIT_TIMEOUT_S", 30))
+
+# Checkpoint store (see omnibot.graph.checkpoint): WAL with a pool of reader connections,
+# one writer and group commit (RAG_CHECKPOINT_POOL=false keeps one shared connection)
+CHECKPOINT_POOL = os.getenv("RAG_CHECKPOINT_POOL", "true").lower() == "true"
+CHECKPOINT_READERS = int(os.getenv("RAG_CHECKPOINT_READERS", 4))
+CHECKPOINT_COMMIT_MS = float(os.getenv("RAG_CHECKPOINT_COMMIT_MS", 2.0))
+CHECKPOINT_COMMIT_MAX = int(os.getenv("RAG_CHECKPOINT_COMMIT_MAX", 64))
+CHECKPOINT_PRAGMAS = os.getenv(
+    "RAG_CHECKPOINT_PRAGMAS",
+    "synchronous=NORMAL,busy_timeout=5000,cache_size=-16000,temp_store=MEMORY,mmap_size=134217728,wal_autocheckpoint=1000",
+)
+
+# Checkpoint retention (see omnibot.graph.retention): checkpoints kept per thread, idle
+# threads dropped after N days, janitor interval (0 = no background janitor) and the free
+# page fraction that triggers an incremental reclaim (full VACUUM: CLI only). 0 disables KEEP / TTL.
+CHECKPOINT_KEEP = int(os.getenv("RAG_CHECKPOINT_KEEP", 20))
+CHECKPOINT_TTL_DAYS = float(os.getenv("RAG_CHECKPOINT_TTL_DAYS", 30))
+CHECKPOINT_JANITOR_INTERVAL_S = float(os.getenv("RAG_CHECKPOINT_JANITOR_INTERVAL_S", 600))
+CHECKPOINT_VACUUM_FREE = float(os.getenv("RAG_CHECKPOINT_VACUUM_FREE", 0.25))
+
 # Splitting
 CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", 800))
 CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", 100))
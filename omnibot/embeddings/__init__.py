@@ -1,5 +1,10 @@
 """Embedding factories (OpenAI by default)."""
 
-from .openai_embedder import get_embedding_function
+from omnibot._lazy import lazy_exports
 
-__all__ = ["get_embedding_function"]
\ No newline at end of file
+_EXPORTS = {
+    "get_embedding_function": (".openai_embedder", "get_embedding_function"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
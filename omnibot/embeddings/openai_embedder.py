@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 
-from omnibot.config.constants import EMBED_MODEL
+from omnibot.clients.registry import get_embeddings
 
 
-def get_embedding_function(model: str | None = None) -> OpenAIEmbeddings:
-   return OpenAIEmbeddings(model=model or EMBED_MODEL)
\ No newline at end of file
+def get_embedding_function(model: str | None = None) -> Embeddings:
+   # Shared, concurrency-limited client (one pool per process)
+   return get_embeddings(model)
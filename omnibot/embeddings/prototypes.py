@@ -0,0 +1,172 @@
+# omnibot/embeddings/prototypes.py
+"""
+Labelled prototype (seed) embeddings for nearest-prototype classifiers.
+
+All seeds are embedded in one call, L2-normalized once and stacked into a single
+float32 matrix, so scoring a query is one matrix-vector product plus a max per label.
+
+Matrices are persisted under RAG_PROTO_CACHE_DIR as `<name>-<key>.npy` plus a JSON
+manifest, where key = hash(format version, embed backend, embed model, RAG_EMBED_DIM,
+seeds). Workers memory-map the artifact at startup and only re-embed when one changes.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from omnibot.config.constants import PROTO_CACHE_DIR, EMBED_BACKEND, EMBED_DIM
+
+PROTO_FORMAT_VERSION = 1
+
+
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class PrototypeSet:
+    def __init__(self, matrix: np.ndarray, spans: Dict[str, Tuple[int, int]]):
+        self.matrix = matrix            # (n_seeds, dim), rows unit-norm float32
+        self.spans = dict(spans)        # label -> [start, end) rows
+        self.labels: List[str] = list(self.spans)
+
+    @classmethod
+    def from_seeds(cls, embeddings, seeds: Dict[str, Sequence[str]]) -> "PrototypeSet":
+        texts: List[str] = []
+        spans: Dict[str, Tuple[int, int]] = {}
+        for label, items in seeds.items():
+            spans[label] = (len(texts), len(texts) + len(items))
+            texts.extend(items)
+        matrix = l2_normalize(np.array(embeddings.embed_documents(texts), dtype=np.float32))
+        return cls(matrix, spans)
+
+    # ---------- persistence ----------
+    @classmethod
+    def load_or_build(
+        cls,
+        embeddings,
+        seeds: Dict[str, Sequence[str]],
+        *,
+        name: str,
+        model: str,
+        cache_dir: Path = PROTO_CACHE_DIR,
+    ) -> "PrototypeSet":
+        """Memory-map a cached artifact for (model, seeds), or embed and persist it."""
+        key = artifact_key(seeds, model)
+        base = Path(cache_dir) / f"{name}-{key}"
+        cached = cls.load(base, expect_key=key)
+        if cached is not None:
+            return cached
+        protos = cls.from_seeds(embeddings, seeds)
+        try:
+            protos.save(base, key=key, name=name, model=model)
+        except OSError:
+            pass  # read-only cache dir: keep the in-memory copy
+        return protos
+
+    def save(self, base: Path, *, key: str, name: str, model: str) -> None:
+        base.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "version": PROTO_FORMAT_VERSION,
+            "key": key,
+            "name": name,
+            "model": model,
+            "backend": EMBED_BACKEND,
+            "shape": list(self.matrix.shape),
+            "spans": {label: list(span) for label, span in self.spans.items()},
+        }
+        # write-then-rename so concurrent workers never see a partial file
+        _atomic_write(base.with_suffix(".npy"), lambda f: np.save(f, np.ascontiguousarray(self.matrix)))
+        _atomic_write(base.with_suffix(".json"), lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+
+    @classmethod
+    def load(cls, base: Path, expect_key: Optional[str] = None) -> Optional["PrototypeSet"]:
+        npy, meta = base.with_suffix(".npy"), base.with_suffix(".json")
+        if not (npy.exists() and meta.exists()):
+            return None
+        try:
+            manifest = json.loads(meta.read_text(encoding="utf-8"))
+            if manifest.get("version") != PROTO_FORMAT_VERSION:
+                return None
+            if expect_key is not None and manifest.get("key") != expect_key:
+                return None
+            matrix = np.load(npy, mmap_mode="r")
+            if list(matrix.shape) != manifest["shape"] or matrix.dtype != np.float32:
+                return None
+            spans = {label: (int(a), int(b)) for label, (a, b) in manifest["spans"].items()}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(matrix, spans)
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def scores(self, vector) -> Dict[str, float]:
+        """Max cosine similarity per label for a single query vector."""
+        sims = self.matrix @ l2_normalize(vector)
+        return {
+            label: float(sims[a:b].max()) if b > a else 0.0
+            for label, (a, b) in self.spans.items()
+        }
+
+    def scores_many(self, vectors) -> Dict[str, np.ndarray]:
+        """Same as `scores` for a batch: one (n_queries x n_seeds) matrix multiply."""
+        sims = l2_normalize(vectors) @ self.matrix.T
+        n = sims.shape[0]
+        return {
+            label: sims[:, a:b].max(axis=1) if b > a else np.zeros(n, dtype=np.float32)
+            for label, (a, b) in self.spans.items()
+        }
+
+
+def top_two(scores: Dict[str, float]) -> Tuple[str, float, float]:
+    """(best label, best score, margin over the runner-up)."""
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    best, s1 = ranked[0]
+    s2 = ranked[1][1] if len(ranked) > 1 else 0.0
+    return best, s1, s1 - s2
+
+
+def artifact_key(seeds: Dict[str, Sequence[str]], model: str) -> str:
+    h = hashlib.sha256()
+    # EMBED_DIM: the fake/hash backends' width is config, not implied by the model name
+    h.update(f"v{PROTO_FORMAT_VERSION}|{EMBED_BACKEND}|{model}|{EMBED_DIM}|".encode("utf-8"))
+    h.update(json.dumps({k: list(v) for k, v in seeds.items()}, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _atomic_write(path: Path, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def main():
+    """Precompute guardrail and router prototype artifacts (e.g. at image build time)."""
+    from omnibot.guardrails.intent_semantic import IntentClassifier, IntentConfig
+    from omnibot.router.semantic_router import SemanticRouter
+
+    IntentClassifier(IntentConfig())
+    SemanticRouter()
+    for p in sorted(Path(PROTO_CACHE_DIR).glob("*.json")):
+        print(p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# omnibot/embeddings/shared_index.py
+"""
+Read-only, memory-mapped export of a Chroma store for multi-worker hosts.
+
+Each uvicorn worker normally opens its own Chroma client and loads its own copy of
+the HNSW segments, so index memory grows with the worker count. With
+RAG_SHARED_INDEX=true the agents instead search an export laid out as flat files:
+
+  <name>-<key>.vectors.npy   (n, dim) float32, rows unit-norm
+  <name>-<key>.offsets.npy   (n + 1,) int64 byte offsets into docs.bin
+  <name>-<key>.docs.bin      concatenated UTF-8 JSON {"page_content", "metadata", "id"}
+  <name>-<key>.json          manifest (shape, source signature)
+
+All three are np.load(mmap_mode="r") / mmap'd, so the pages live once in the OS page
+cache and every worker attaches zero-copy. Search is an exact mat-vec + argpartition
+(the stores are a few thousand chunks); only the top-k documents are decoded.
+
+The export is keyed on the Chroma persist dir and invalidated when its sqlite file
+changes. Pre-build with `python -m omnibot.embeddings.shared_index` before starting
+workers (e.g. in the image or the supervisor's pre-start hook).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from omnibot.config.constants import INDEX_CACHE_DIR, PDF_CHROMA_DIR, CLAIMS_CHROMA_DIR
+from .prototypes import l2_normalize, _atomic_write
+
+INDEX_FORMAT_VERSION = 1
+CHROMA_COLLECTION = "langchain"  # langchain_chroma's default collection name
+_EXPORT_BATCH = 2000
+
+
+def source_signature(persist_dir) -> Optional[Dict[str, Any]]:
+    """Size + mtime of the Chroma sqlite file; None when the store doesn't exist."""
+    db = Path(persist_dir) / "chroma.sqlite3"
+    try:
+        st = db.stat()
+    except OSError:
+        return None
+    return {"path": str(db.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _base(persist_dir, name: str, cache_dir) -> Path:
+    key = hashlib.sha256(f"v{INDEX_FORMAT_VERSION}|{Path(persist_dir).resolve()}".encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"{name}-{key}"
+
+
+def _suffixed(base: Path, suffix: str) -> Path:
+    return base.with_name(base.name + suffix)
+
+
+class SharedIndex:
+    def __init__(self, vectors: np.ndarray, offsets: np.ndarray, docs: mmap.mmap, manifest: Dict[str, Any]):
+        self.vectors = vectors      # (n, dim) float32, read-only mmap
+        self.offsets = offsets      # (n + 1,) int64, read-only mmap
+        self._docs = docs
+        self.manifest = manifest
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    # ---------- export ----------
+    @staticmethod
+    def export_collection(collection, base: Path, *, name: str, source: Dict[str, Any]) -> None:
+        """Dump a chromadb collection (embeddings, documents, metadata) into the flat layout."""
+        total = collection.count()
+        vecs: List[np.ndarray] = []
+        blobs: List[bytes] = []
+        for offset in range(0, total, _EXPORT_BATCH):
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=_EXPORT_BATCH, offset=offset,
+            )
+            vecs.append(np.asarray(page["embeddings"], dtype=np.float32))
+            for rid, doc, md in zip(page["ids"], page["documents"], page["metadatas"]):
+                blobs.append(json.dumps({"id": rid, "page_content": doc or "", "metadata": md or {}},
+                                        ensure_ascii=False).encode("utf-8"))
+        matrix = l2_normalize(np.concatenate(vecs)) if vecs else np.zeros((0, 0), dtype=np.float32)
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+
+        base.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "name": name,
+            "shape": list(matrix.shape),
+            "source": source,
+        }
+        _atomic_write(_suffixed(base, ".vectors.npy"), lambda f: np.save(f, np.ascontiguousarray(matrix)))
+        _atomic_write(_suffixed(base, ".offsets.npy"), lambda f: np.save(f, offsets))
+        _atomic_write(_suffixed(base, ".docs.bin"), lambda f: f.writelines(blobs))
+        # manifest last: its presence marks a complete export
+        _atomic_write(_suffixed(base, ".json"), lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+
+    # ---------- load ----------
+    @classmethod
+    def load(cls, base: Path, expect_source: Optional[Dict[str, Any]] = None) -> Optional["SharedIndex"]:
+        meta = _suffixed(base, ".json")
+        try:
+            manifest = json.loads(meta.read_text(encoding="utf-8"))
+            if manifest.get("version") != INDEX_FORMAT_VERSION:
+                return None
+            if expect_source is not None and manifest.get("source") != expect_source:
+                return None
+            vectors = np.load(_suffixed(base, ".vectors.npy"), mmap_mode="r")
+            offsets = np.load(_suffixed(base, ".offsets.npy"), mmap_mode="r")
+            if list(vectors.shape) != manifest["shape"] or len(offsets) != vectors.shape[0] + 1:
+                return None
+            with open(_suffixed(base, ".docs.bin"), "rb") as f:
+                size = int(offsets[-1])
+                docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else mmap.mmap(-1, 1)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(vectors, offsets, docs, manifest)
+
+    # ---------- search ----------
+    def document(self, i: int) -> Dict[str, Any]:
+        a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+        return json.loads(self._docs[a:b].decode("utf-8"))
+
+    def search(self, query_vector, k: int) -> List[Tuple[Any, float]]:
+        """
+        Top-k (Document, distance) like Chroma's similarity_search_with_score; distance
+        is squared L2 between unit vectors (2 - 2·cos), matching Chroma's default space.
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+        return self._hits(self.vectors @ l2_normalize(query_vector), k)
+
+    def search_many(self, query_vectors, k: int) -> List[List[Tuple[Any, float]]]:
+        """Batch `search`: one (queries x n) matrix multiply."""
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        if len(self) == 0 or k <= 0:
+            return [[] for _ in range(len(query_vectors))]
+        sims = l2_normalize(query_vectors) @ self.vectors.T
+        return [self._hits(row, k) for row in sims]
+
+    def _hits(self, sims: np.ndarray, k: int) -> List[Tuple[Any, float]]:
+        from langchain_core.documents import Document
+
+        k = min(k, len(self))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        out = []
+        for i in top:
+            d = self.document(int(i))
+            out.append((Document(page_content=d["page_content"], metadata=d["metadata"], id=d["id"]),
+                        float(2.0 - 2.0 * sims[i])))
+        return out
+
+
+def load_or_export(persist_dir, *, name: str, cache_dir: Path = INDEX_CACHE_DIR) -> Optional[SharedIndex]:
+    """Attach to the export for `persist_dir`, (re)exporting it from Chroma when missing or stale."""
+    source = source_signature(persist_dir)
+    if source is None:
+        return None
+    base = _base(persist_dir, name, cache_dir)
+    index = SharedIndex.load(base, expect_source=source)
+    if index is not None:
+        return index
+    import chromadb
+    client = chromadb.PersistentClient(path=str(persist_dir))
+    SharedIndex.export_collection(client.get_collection(CHROMA_COLLECTION), base, name=name, source=source)
+    del client
+    return SharedIndex.load(base, expect_source=source)
+
+
+def main():
+    """Export both Chroma stores (run once per host before starting the workers)."""
+    for name, persist_dir in (("pdf", PDF_CHROMA_DIR), ("claims", CLAIMS_CHROMA_DIR)):
+        index = load_or_export(persist_dir, name=name)
+        print(f"{name}: {'missing store ' + str(persist_dir) if index is None else f'{len(index)} chunks'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 """LangGraph setup and compiled apps builder."""
 
-from .graph_builder import build_graph_async
+from omnibot._lazy import lazy_exports
 
-__all__ = ["build_graph_async"]
+_EXPORTS = {
+    "build_graph_async": (".graph_builder", "build_graph_async"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
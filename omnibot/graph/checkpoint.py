@@ -0,0 +1,236 @@
+# omnibot/graph/checkpoint.py
+"""
+Pooled SQLite checkpoint store for the graph.
+
+A single aiosqlite connection serializes every checkpoint read and write in the
+process. PooledSqliteSaver splits them:
+
+  - readers   RAG_CHECKPOINT_READERS connections (each its own thread) serve
+              aget_tuple / alist; with WAL they never wait on the writer
+  - writer    one connection for aput / aput_writes; its commit() calls are
+              grouped, so concurrent turns share one COMMIT (and one WAL fsync)
+              instead of taking turns. A batch closes after RAG_CHECKPOINT_COMMIT_MS
+              or RAG_CHECKPOINT_COMMIT_MAX commits, whichever comes first.
+
+Both sides are langgraph's own AsyncSqliteSaver, so the schema and serialization are
+unchanged and existing checkpoint files keep working. AsyncSqliteSaver commits in
+aput but not in aput_writes, so aput_writes joins the group commit here as well:
+every write (checkpoint or pending writes) returns only after its COMMIT, so a read
+that follows it sees it and the writer never sits on an open transaction.
+
+Pragmas come from RAG_CHECKPOINT_PRAGMAS ("name=value,..."); journal_mode is always WAL.
+
+`python -m omnibot.bench.checkpoint_store_bench` compares it with the single connection.
+"""
+from __future__ import annotations
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from omnibot.config.constants import (
+    CHECKPOINT_READERS, CHECKPOINT_COMMIT_MS, CHECKPOINT_COMMIT_MAX, CHECKPOINT_PRAGMAS,
+)
+
+_PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+_WRITER_ONLY = {"synchronous", "wal_autocheckpoint", "journal_size_limit"}   # writer-side only
+
+
+def parse_pragmas(spec: str) -> Dict[str, str]:
+    """'synchronous=NORMAL,busy_timeout=5000' -> {'synchronous': 'NORMAL', 'busy_timeout': '5000'}"""
+    pragmas: Dict[str, str] = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        name, _, value = part.partition("=")
+        name, value = name.strip().lower(), value.strip()
+        if not _PRAGMA_NAME.match(name) or not _PRAGMA_VALUE.match(value):
+            raise ValueError(f"invalid checkpoint pragma {part!r}")
+        pragmas[name] = value
+    pragmas.pop("journal_mode", None)
+    return pragmas
+
+
+async def _connect(path: str, pragmas: Dict[str, str]) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(path)
+    for name, value in pragmas.items():
+        await conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class _NoLock:
+    """Stands in for AsyncSqliteSaver.lock on the writer: aiosqlite already runs
+    statements one at a time, and holding a lock across commit() would stop
+    concurrent writes from ever sharing a COMMIT."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class _Batch:
+    __slots__ = ("done", "full", "size")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.done = loop.create_future()
+        self.full = asyncio.Event()
+        self.size = 0
+
+
+class GroupCommit:
+    """Proxy for the writer's connection whose commit() joins the open batch."""
+
+    def __init__(self, conn: aiosqlite.Connection, window_ms: float = CHECKPOINT_COMMIT_MS,
+                 max_batch: int = CHECKPOINT_COMMIT_MAX):
+        self._conn = conn
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._batch: Optional[_Batch] = None
+        self._tasks: set = set()
+        self.commits = 0    # COMMITs issued
+        self.grouped = 0    # commit() calls they covered
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    async def commit(self) -> None:
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch(asyncio.get_running_loop())
+            task = asyncio.create_task(self._commit(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.size += 1
+        if batch.size >= self.max_batch:
+            self._batch = None
+            batch.full.set()
+        # a cancelled caller must not cancel the COMMIT the others are waiting on
+        await asyncio.shield(batch.done)
+
+    async def _commit(self, batch: _Batch) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window_s)
+        except asyncio.TimeoutError:
+            pass
+        if self._batch is batch:
+            self._batch = None
+        try:
+            await self._conn.commit()
+        except asyncio.CancelledError:
+            batch.done.cancel()
+            raise
+        except Exception as e:
+            # the batch's statements are still in the open transaction; without this the
+            # next successful COMMIT would persist writes their callers saw fail
+            try:
+                await self._conn.rollback()
+            except Exception:
+                pass
+            batch.done.set_exception(e)
+            batch.done.exception()   # mark retrieved if every waiter has gone
+        else:
+            batch.done.set_result(None)
+        finally:
+            self.commits += 1
+            self.grouped += batch.size
+
+    async def flush(self) -> None:
+        """Wait for every batch that is still open or committing."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class PooledSqliteSaver(BaseCheckpointSaver):
+    def __init__(self, writer: AsyncSqliteSaver, readers: List[AsyncSqliteSaver], group: GroupCommit):
+        super().__init__(serde=writer.serde)
+        self.writer = writer
+        self.group = group
+        self._all_readers = list(readers)
+        self._readers: "asyncio.Queue[AsyncSqliteSaver]" = asyncio.Queue()
+        for r in readers:
+            self._readers.put_nowait(r)
+        self.reads = 0
+        self.read_waits = 0   # reads that had to wait for a free reader
+
+    @classmethod
+    async def open(cls, path, readers: int = CHECKPOINT_READERS, pragmas: Optional[Dict[str, str]] = None,
+                   commit_ms: float = CHECKPOINT_COMMIT_MS, commit_max: int = CHECKPOINT_COMMIT_MAX) -> "PooledSqliteSaver":
+        pragmas = parse_pragmas(CHECKPOINT_PRAGMAS) if pragmas is None else pragmas
+        path = str(path)
+        conn = await _connect(path, pragmas)
+        await conn.execute("PRAGMA journal_mode=WAL")
+        writer = AsyncSqliteSaver(conn)
+        await writer.setup()                  # schema, before any reader opens
+        group = GroupCommit(conn, commit_ms, commit_max)
+        writer.conn, writer.lock = group, _NoLock()
+        reader_pragmas = {k: v for k, v in pragmas.items() if k not in _WRITER_ONLY}
+        pool = []
+        for _ in range(max(1, int(readers))):
+            r = AsyncSqliteSaver(await _connect(path, reader_pragmas))
+            r.is_setup = True
+            pool.append(r)
+        return cls(writer, pool, group)
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[AsyncSqliteSaver]:
+        self.reads += 1
+        if self._readers.empty():
+            self.read_waits += 1
+        r = await self._readers.get()
+        try:
+            yield r
+        finally:
+            self._readers.put_nowait(r)
+
+    # ---------- reads ----------
+    async def aget_tuple(self, config):
+        async with self._reader() as r:
+            return await r.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async with self._reader() as r:
+            async for item in r.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    # ---------- writes ----------
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self.writer.aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, *args, **kwargs):
+        # AsyncSqliteSaver leaves these rows uncommitted; readers and the janitor would
+        # not see them and the WAL write lock would stay held until the next aput
+        result = await self.writer.aput_writes(config, writes, task_id, *args, **kwargs)
+        await self.group.commit()
+        return result
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.writer.adelete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.writer.get_next_version(current, channel)
+
+    # ---------- lifecycle ----------
+    def stats(self) -> Dict[str, Any]:
+        g = self.group
+        return {
+            "readers": len(self._all_readers),
+            "readers_idle": self._readers.qsize(),
+            "reads": self.reads,
+            "read_waits": self.read_waits,
+            "commits": g.commits,
+            "commit_calls": g.grouped,
+            "avg_batch": round(g.grouped / g.commits, 2) if g.commits else 0.0,
+            "commit_window_ms": g.window_s * 1000.0,
+            "commit_max": g.max_batch,
+        }
+
+    async def close(self) -> None:
+        await self.group.flush()
+        for r in self._all_readers:
+            await r.conn.close()
+        await self.group._conn.close()
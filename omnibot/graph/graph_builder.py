@@ -120,63 +120,72 @@
 # omnibot/graph/graph_builder.py
 from __future__ import annotations
 import time, asyncio
-from typing import List, Sequence, Optional
+from typing import Any, Dict, List, Sequence, Optional
 
-from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
-import aiosqlite
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
 
-from omnibot.agents.benefits_iq import BenefitsIQ
-from omnibot.agents.claims_assist import ClaimsAssist
 from omnibot.agents.protocols import AnswerAgent
-from omnibot.router.router import fast_route
-from omnibot.config.constants import CHECKPOINT_DB
+from omnibot.agents.registry import get_agent
+from omnibot.guardrails.messages import guardrail_reply
+from omnibot.config.constants import CHECKPOINT_DB, CHECKPOINT_POOL
 from omnibot.graph.state import AgentState
+from omnibot.graph.memory import memory_for_state, memory_turn, render_history
+from omnibot.api.metrics import observe_decision, observe_generation, observe_request, observe_stage
 
-# Instantiate agents once per process
-pdf_core: AnswerAgent = BenefitsIQ()
-claims_core: AnswerAgent = ClaimsAssist()
+# Agents come from the process-wide registry (built on first use, shared with the API)
 
 # ---------------- Nodes ----------------
 
-async def router_node(state: AgentState): # -> AgentState:
+async def router_node(state: AgentState, config: RunnableConfig): # -> AgentState:
     question = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
-    route = await fast_route(question or "")
+    # one embedding -> guardrail label + route; callers that already classified pass it in
+    decision = (config.get("configurable") or {}).get("decision")
+    if decision is None:
+        from omnibot.router.fused import get_fused_classifier
+        decision = await get_fused_classifier().classify(question or "")
+        observe_decision(decision)
+    route = decision.route if decision.intent == "in_scope" else "guardrail"
     # return {"route": route}
-    yield {"route": route}
+    yield {"route": route, "intent": decision.intent}
     return
 
 async def retrieve_pdf_node(state: AgentState):# -> AgentState:
     if state.get("route") not in ("pdf", "both"):
         # return {"context_pdf": "", "citations_pdf": []}
-        yield {"context_pdf": "", "citations_pdf": []}
+        yield {"context_ids_pdf": []}
         return
     q = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
     if not q:
         # return {"context_pdf": "", "citations_pdf": []}
-        yield {"context_pdf": "", "citations_pdf": []}
+        yield {"context_ids_pdf": []}
         return
-    ctx, cites = pdf_core.retrieve(q)
+    ctx, cites = get_agent("pdf").retrieve(q)
     # return {"context_pdf": ctx, "citations_pdf": cites}
-    yield {"context_pdf": ctx, "citations_pdf": cites}
+    yield {"context_ids_pdf": context_refs(cites)}
     return
 
 async def retrieve_claims_node(state: AgentState):# -> AgentState:
     if state.get("route") not in ("claims", "both"):
         # return {"context_claims": "", "citations_claims": []}
-        yield {"context_claims": "", "citations_claims": []}
+        yield {"context_ids_claims": []}
         return
     q = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
     if not q:
         # return {"context_claims": "", "citations_claims": []}
-        yield {"context_claims": "", "citations_claims": []}
+        yield {"context_ids_claims": []}
         return
     # 🔁 protocol-compliant retrieval (replaces retrieve_formatted)
-    ctx, cites = claims_core.retrieve(q)
+    ctx, cites = get_agent("claims").retrieve(q)
     # return {"context_claims": ctx, "citations_claims": cites}
-    yield {"context_claims": ctx, "citations_claims": cites}
+    yield {"context_ids_claims": context_refs(cites)}
     return
+
+
+def context_refs(citations: Sequence[Dict[str, Any]]) -> List[str]:
+    """Chunk ids of a retrieval, which is all the state keeps of it."""
+    return [str(c["id"]) for c in citations if c.get("id") is not None]
+
 # -------- Generic agent streamer (protocol-based) --------
 async def _astream_agent(
     agent: AnswerAgent,
@@ -309,83 +318,120 @@ async def _astream_agent(
 #     yield {"messages": [AIMessage(content=combined)], "elapsed": time.perf_counter() - t0}
 #     return
 
-async def combine_node(state: AgentState):
+def _no_writer(_chunk) -> None:
+    pass
+
+
+async def _run_agents(
+    q: str, route: str, history_block: str, selected: Sequence[tuple[str, AnswerAgent]], emit, t0: float,
+) -> tuple[dict[str, str], dict[str, list], Optional[float]]:
+    """Run the selected agents concurrently; citations and tokens go to `emit` as they arrive."""
+    citations: dict[str, list] = {}
+    ttft: list[float] = []
+
+    async def run_agent(name: str, agent: AnswerAgent) -> str:
+        # 1) retrieval — run in thread so we don't block the event loop
+        loop = asyncio.get_running_loop()
+        t_ret = time.perf_counter()
+        ctx, cites = await loop.run_in_executor(None, lambda: agent.retrieve(q))
+        observe_stage("retrieve", time.perf_counter() - t_ret, route, name)
+
+        # 2) emit citations immediately
+        citations[name] = cites
+        emit({"event": "citations", "agent": name, "citations": cites})
+
+        # 3) stream tokens
+        t_gen = time.perf_counter()
+        first, n = 0.0, 0
+        parts: List[str] = []
+        async for tok in agent.astream_answer(q, history_block, context=ctx):
+            if not n:
+                first = time.perf_counter() - t_gen
+                ttft.append(time.perf_counter() - t0)
+            n += 1
+            parts.append(tok)
+            emit({"event": "token", "agent": name, "token": tok})
+        observe_generation(route, name, first, time.perf_counter() - t_gen, n)
+        return "".join(parts)
+
+    results = await asyncio.gather(*(run_agent(name, agent) for name, agent in selected))
+    answers = {name: text for (name, _), text in zip(selected, results)}
+    return answers, citations, (min(ttft) if ttft else None)
+
+
+async def combine_node(state: AgentState, writer=None):
+    # Tokens and citations leave through LangGraph's custom stream (`writer` is injected;
+    # read it with stream_mode="custom"). The node returns one state update, so the
+    # checkpointer only sees node-boundary state, never per-token updates.
+    emit = writer or _no_writer
     t0 = time.perf_counter()
     q = next((m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), "")
     if not q:
-        yield {"messages": [AIMessage(content="(no question)")], "elapsed": 0.0}
-        return
+        return {"messages": [AIMessage(content="(no question)")], "elapsed": 0.0}
 
     route = state.get("route", "pdf")
-    history_msgs: Sequence[BaseMessage] = state.get("messages", [])
-    yield {"route": route}
+    memory = memory_for_state(state)
+    history_block = render_history(memory)
+    emit({"event": "route", "route": route})
+
+    if route == "guardrail":
+        msg = guardrail_reply(state.get("intent", "off_topic")) or ""
+        observe_request("graph", route, time.perf_counter() - t0)
+        return {
+            "messages": [AIMessage(content=msg)],
+            "memory": memory_turn(q, msg, memory),
+            "elapsed": time.perf_counter() - t0,
+        }
 
     selected: list[tuple[str, AnswerAgent]] = []
     if route in ("pdf", "both"):
-        selected.append(("pdf", pdf_core))
+        selected.append(("pdf", get_agent("pdf")))
     if route in ("claims", "both"):
-        selected.append(("claims", claims_core))
+        selected.append(("claims", get_agent("claims")))
 
     if not selected:
         msg = "I couldn't determine a suitable source to answer that."
-        yield {"messages": [AIMessage(content=msg)], "elapsed": time.perf_counter() - t0}
-        return
+        return {"messages": [AIMessage(content=msg)], "elapsed": time.perf_counter() - t0}
 
-    queue: asyncio.Queue[dict] = asyncio.Queue()
-    results = {name: [] for name, _ in selected}
+    answers, citations, ttft = await _run_agents(q, route, history_block, selected, emit, t0)
 
-    async def run_agent(name: str, agent: AnswerAgent):
-        # 1) retrieval — run in thread so we don't block the event loop
-        loop = asyncio.get_running_loop()
-        ctx, cites = await loop.run_in_executor(None, lambda: agent.retrieve(q))
+    # Final message
+    combined = compose_answer(route, answers)
+    observe_request("graph", route, time.perf_counter() - t0, ttft)
 
-        # 2) emit citations immediately
-        if name == "pdf":
-            await queue.put({"kind": "citations_pdf", "citations": cites})
-        else:
-            await queue.put({"kind": "citations_claims", "citations": cites})
+    return {
+        "messages": [AIMessage(content=combined)],
+        "memory": memory_turn(q, combined, memory),
+        "context_ids_pdf": context_refs(citations.get("pdf", [])),
+        "context_ids_claims": context_refs(citations.get("claims", [])),
+        "elapsed": time.perf_counter() - t0,
+    }
 
-        # 3) stream tokens
-        async for tok in agent.astream_answer(q, history_msgs, context=ctx):
-            await queue.put({"kind": "token", "agent": name, "token": tok})
-
-        await queue.put({"kind": "done", "agent": name})
-
-    tasks = [asyncio.create_task(run_agent(name, agent)) for name, agent in selected]
-
-    done = 0
-    while done < len(tasks):
-        ev = await queue.get()
-        k = ev["kind"]
-        if k == "token":
-            results[ev["agent"]].append(ev["token"])
-            # forward as SSE "token"
-            yield {"stream_event": {"agent": ev["agent"], "token": ev["token"]}}
-        elif k == "citations_pdf":
-            yield {"citations_pdf": ev["citations"]}
-        elif k == "citations_claims":
-            yield {"citations_claims": ev["citations"]}
-        elif k == "done":
-            done += 1
 
-    # Final message
+def compose_answer(route: str, answers: dict[str, str]) -> str:
+    """Merge per-agent answers into the single assistant message we persist."""
     if route == "both":
-        combined = (
-            f"**From PDF:**\n{''.join(results['pdf'])}\n\n"
-            f"**From Claims:**\n{''.join(results['claims'])}"
+        return (
+            f"**From PDF:**\n{answers.get('pdf', '')}\n\n"
+            f"**From Claims:**\n{answers.get('claims', '')}"
         )
-    elif route == "pdf":
-        combined = "".join(results["pdf"])
-    else:
-        combined = "".join(results["claims"])
-
-    yield {"messages": [AIMessage(content=combined)], "elapsed": time.perf_counter() - t0}
-    return
+    if route == "pdf":
+        return answers.get("pdf", "")
+    return answers.get("claims", "")
 
 # ---------------- Build/compile ----------------
 
 async def build_graph_async():
+    # LangGraph / sqlite are only needed once the graph is actually built
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    import aiosqlite
+
     print("Building graph...")
+    # build both agents (Chroma client, LLM clients) on executor threads now, so the
+    # first combine_node doesn't construct them inline on the event loop
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(None, get_agent, name) for name in ("pdf", "claims")))
     # graph = StateGraph(AgentState)
     # graph.add_node("router", router_node)
     # graph.add_node("retrieve_pdf", retrieve_pdf_node)
@@ -407,6 +453,12 @@ async def build_graph_async():
     graph.add_edge("router", "combine")
     graph.add_edge("combine", END)
 
+    if CHECKPOINT_POOL:
+        # WAL + reader pool + group-committed writer; closed like a connection
+        from omnibot.graph.checkpoint import PooledSqliteSaver
+        checkpointer = await PooledSqliteSaver.open(CHECKPOINT_DB)
+        return graph.compile(checkpointer=checkpointer), checkpointer
+
     conn = await aiosqlite.connect(str(CHECKPOINT_DB))
     checkpointer = AsyncSqliteSaver(conn)
     return graph.compile(checkpointer=checkpointer), conn
@@ -0,0 +1,142 @@
+# omnibot/graph/memory.py
+"""
+Bounded per-thread conversation memory, stored in AgentState["memory"].
+
+Instead of re-walking the whole `messages` list every turn, we keep:
+  - turns:   ring buffer of the last HISTORY_TURNS (user, assistant) pairs
+  - summary: optional one-line digests of turns that fell out of the buffer
+  - total:   number of turns seen on the thread
+
+Every structure is bounded, so updating and rendering cost O(1) per turn no matter
+how long the thread gets. The memory is a plain dict so the checkpointer can
+serialize it as-is. Writers send memory_turn() deltas, which the merge_memory
+reducer applies to the state being written, so concurrent turns on one thread
+don't overwrite each other's turn with a memory read before they generated.
+
+`messages` itself is bounded the same way: AgentState reduces it with
+add_bounded_messages(), which merges like add_messages and then keeps only the last
+RAG_MESSAGES_KEEP, so checkpoints stop growing with the thread.
+"""
+from __future__ import annotations
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import HumanMessage, AIMessage, BaseMessage, RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES, add_messages
+
+from omnibot.config.constants import HISTORY_TURNS, HISTORY_SUMMARY_LINES, HISTORY_TURN_CHARS, MESSAGES_KEEP
+
+Memory = Dict[str, Any]
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def empty_memory() -> Memory:
+    return {"turns": [], "summary": [], "total": 0}
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _digest(user: str, assistant: str) -> str:
+    first = _SENTENCE.split((assistant or "").strip(), maxsplit=1)[0]
+    return f"- User asked: {_clip(user, 120)} → {_clip(first, 160)}"
+
+
+def push_turn(
+    memory: Optional[Memory],
+    user: str,
+    assistant: str,
+    max_turns: int = HISTORY_TURNS,
+    summary_lines: int = HISTORY_SUMMARY_LINES,
+    turn_chars: int = HISTORY_TURN_CHARS,
+) -> Memory:
+    """Return a new memory with (user, assistant) appended; evicted turns go to the summary."""
+    memory = memory or empty_memory()
+    turns: List[List[str]] = list(memory.get("turns") or [])
+    summary: List[str] = list(memory.get("summary") or [])
+
+    turns.append([_clip(user, turn_chars), _clip(assistant, turn_chars)])
+    while len(turns) > max(0, max_turns):
+        u, a = turns.pop(0)
+        if summary_lines > 0:
+            summary.append(_digest(u, a))
+
+    return {
+        "turns": turns,
+        "summary": summary[-summary_lines:] if summary_lines > 0 else [],
+        "total": int(memory.get("total", 0)) + 1,
+    }
+
+
+def memory_turn(user: str, assistant: str, base: Optional[Memory] = None) -> Memory:
+    """
+    `memory` update that appends one turn at merge time (see merge_memory).
+    `base` is only used when the thread has no memory yet (bootstrapped threads).
+    """
+    return {"push": [user, assistant], "base": base}
+
+
+def merge_memory(current: Optional[Memory], update: Optional[Memory]) -> Memory:
+    """`memory` reducer: applies a memory_turn() delta to the current value; anything else replaces it."""
+    if isinstance(update, dict) and "push" in update:
+        user, assistant = update["push"]
+        return push_turn(current or update.get("base"), user, assistant)
+    return update if update is not None else (current or empty_memory())
+
+
+def render_history(memory: Optional[Memory]) -> str:
+    """Compact history block shared by every agent (most recent first)."""
+    if not memory:
+        return "(none)"
+    lines = [f"User: {u}\nAssistant: {a}" for u, a in reversed(memory.get("turns") or [])]
+    summary = memory.get("summary") or []
+    if summary:
+        lines.append("Earlier in this conversation:\n" + "\n".join(summary))
+    return "\n\n".join(lines) if lines else "(none)"
+
+
+def memory_from_messages(messages: Sequence[BaseMessage], max_turns: int = HISTORY_TURNS) -> Memory:
+    """
+    Bootstrap memory for threads checkpointed before `memory` existed.
+    Walks backwards and stops after `max_turns` pairs, so it never scans the full thread.
+    """
+    pairs: List[List[str]] = []
+    pending_ai: Optional[str] = None
+    for m in reversed(messages):
+        if len(pairs) >= max_turns:
+            break
+        content = m.content if isinstance(m.content, str) else str(m.content)
+        if isinstance(m, AIMessage):
+            pending_ai = content
+        elif isinstance(m, HumanMessage) and pending_ai is not None:
+            pairs.append([_clip(content, HISTORY_TURN_CHARS), _clip(pending_ai, HISTORY_TURN_CHARS)])
+            pending_ai = None
+    pairs.reverse()
+    return {"turns": pairs, "summary": [], "total": len(pairs)}
+
+
+def memory_for_state(state: Dict[str, Any]) -> Memory:
+    """Memory from state, falling back to a bounded bootstrap from `messages`."""
+    mem = state.get("memory")
+    if mem:
+        return mem
+    return memory_from_messages(state.get("messages") or [])
+
+
+def add_bounded_messages(left: Any, right: Any, keep: int = MESSAGES_KEEP) -> List[BaseMessage]:
+    """
+    `messages` reducer: add_messages, then only the last `keep` messages (keep <= 0: no trim).
+    It runs at merge time against the state actually being written, so a turn that
+    persists after another one on the same thread can't trim from a stale snapshot;
+    a RemoveMessage for an id that is already gone is dropped instead of raising.
+    """
+    left = list(left) if isinstance(left, (list, tuple)) else ([left] if left else [])
+    right = list(right) if isinstance(right, (list, tuple)) else [right]
+    present = {getattr(m, "id", None) for m in (*left, *right) if not isinstance(m, RemoveMessage)}
+    present.add(REMOVE_ALL_MESSAGES)
+    right = [m for m in right if not (isinstance(m, RemoveMessage) and m.id not in present)]
+    merged = add_messages(left, right)
+    return merged[-keep:] if 0 < keep < len(merged) else merged
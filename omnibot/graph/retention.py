@@ -0,0 +1,253 @@
+# omnibot/graph/retention.py
+"""
+Checkpoint retention and compaction for the SQLite checkpoint store.
+
+Every graph step writes a full checkpoint, so without cleanup the file grows with
+every turn of every thread. The janitor enforces:
+
+  - keep      only the newest RAG_CHECKPOINT_KEEP checkpoints (and their pending
+              writes) per thread / namespace; the newest one holds the whole state
+  - ttl       threads idle for RAG_CHECKPOINT_TTL_DAYS are deleted outright; the
+              last activity is read from the newest checkpoint id (a time-ordered uuid6)
+  - reclaim   when at least RAG_CHECKPOINT_VACUUM_FREE of the pages are free after
+              a pass, they are released with `incremental_vacuum` in small steps
+              (only once the file is in auto_vacuum=INCREMENTAL mode, see --vacuum)
+
+Deletes run on their own connection in a daemon thread, in short per-thread
+transactions, and the WAL is only checkpointed PASSIVE, so the background janitor
+never holds the write lock for more than one thread's deletes or one reclaim step.
+With several API workers on one database only the worker holding `<db>.janitor.lock`
+runs the background janitor; the others leave it alone.
+A full VACUUM rewrites the whole file under the lock, so it is never run in the
+background, only by hand:
+
+    python -m omnibot.graph.retention              # one pass against RAG_CHECKPOINT_DB
+    python -m omnibot.graph.retention --vacuum     # ... then a full VACUUM (API stopped), which
+                                                   # also switches the file to auto_vacuum=INCREMENTAL
+"""
+from __future__ import annotations
+import argparse
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no cross-process lock, every process runs its own janitor
+    fcntl = None
+
+from omnibot.config.constants import (
+    CHECKPOINT_DB, CHECKPOINT_KEEP, CHECKPOINT_TTL_DAYS, CHECKPOINT_JANITOR_INTERVAL_S, CHECKPOINT_VACUUM_FREE,
+)
+
+_GREGORIAN_TO_UNIX_100NS = 0x01B21DD213814000
+_RECLAIM_STEP = 1024          # pages per incremental_vacuum statement
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def checkpoint_time(checkpoint_id: str) -> Optional[float]:
+    """Unix time encoded in a checkpoint id (uuid6, or uuid1 for old checkpoints)."""
+    try:
+        u = uuid.UUID(checkpoint_id)
+    except (TypeError, ValueError):
+        return None
+    if u.version == 6:
+        n = u.int
+        ts = ((n >> 96) << 28) | (((n >> 80) & 0xFFFF) << 12) | ((n >> 64) & 0x0FFF)
+    elif u.version == 1:
+        ts = u.time
+    else:
+        return None
+    return (ts - _GREGORIAN_TO_UNIX_100NS) / 1e7
+
+
+class CheckpointJanitor:
+    def __init__(self, path=CHECKPOINT_DB, keep: int = CHECKPOINT_KEEP, ttl_days: float = CHECKPOINT_TTL_DAYS,
+                 interval_s: float = CHECKPOINT_JANITOR_INTERVAL_S, vacuum_free: float = CHECKPOINT_VACUUM_FREE):
+        self.path = Path(path)
+        self.keep = int(keep)
+        self.ttl_s = float(ttl_days) * 86400.0
+        self.interval_s = float(interval_s)
+        self.vacuum_free = float(vacuum_free)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_fd: Optional[int] = None
+        self.last: Dict[str, Any] = {}
+        self.totals = {"runs": 0, "checkpoints_deleted": 0, "writes_deleted": 0, "threads_expired": 0,
+                       "pages_reclaimed": 0, "vacuums": 0}
+
+    # ---------- background ----------
+    def start(self) -> "CheckpointJanitor":
+        if self.interval_s > 0 and self._thread is None:
+            if not self._acquire_lock():
+                return self   # another worker owns the janitor for this database
+            self._thread = threading.Thread(target=self._run, name="omnibot-checkpoint-janitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)   # releases the flock
+            self._lock_fd = None
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fd = os.open(f"{self.path}.janitor.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            self.last = {"error": f"{type(e).__name__}: {e}", "ts": time.time()}
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                self.last = {"error": f"{type(e).__name__}: {e}", "ts": time.time()}
+
+    # ---------- one pass ----------
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        con.execute("PRAGMA busy_timeout=30000")
+        return con
+
+    def run_once(self, vacuum: bool = False) -> Dict[str, Any]:
+        """One retention pass. `vacuum` adds a full VACUUM: only with the API stopped (CLI)."""
+        t0 = time.perf_counter()
+        report = {"checkpoints_deleted": 0, "writes_deleted": 0, "threads_expired": 0, "pages_reclaimed": 0,
+                  "vacuumed": False}
+        if not self.path.exists():
+            return report
+        con = self._connect()
+        try:
+            tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if {"checkpoints", "writes"} <= tables:
+                if self.ttl_s > 0:
+                    self._expire(con, report)
+                if self.keep > 0:
+                    self._trim(con, report)
+            if vacuum:
+                con.execute(f"PRAGMA auto_vacuum={_AUTO_VACUUM_INCREMENTAL}")   # takes effect with the VACUUM
+                con.execute("VACUUM")
+                con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                report["vacuumed"] = True
+            else:
+                self._reclaim(con, report)
+            report["free_pages"] = con.execute("PRAGMA freelist_count").fetchone()[0]
+            report["pages"] = con.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            con.close()
+        report["ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        report["ts"] = time.time()
+        self.last = report
+        self.totals["runs"] += 1
+        self.totals["checkpoints_deleted"] += report["checkpoints_deleted"]
+        self.totals["writes_deleted"] += report["writes_deleted"]
+        self.totals["threads_expired"] += report["threads_expired"]
+        self.totals["pages_reclaimed"] += report["pages_reclaimed"]
+        self.totals["vacuums"] += int(report["vacuumed"])
+        return report
+
+    def _expire(self, con: sqlite3.Connection, report: Dict[str, Any]) -> None:
+        cutoff = time.time() - self.ttl_s
+        expired: List[str] = [
+            tid for tid, newest in con.execute("SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id")
+            if (checkpoint_time(newest) or cutoff) < cutoff
+        ]
+        for tid in expired:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # the thread may have had a turn since the scan above
+                newest = con.execute("SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?", (tid,)).fetchone()[0]
+                if newest is None or (checkpoint_time(newest) or cutoff) >= cutoff:
+                    con.execute("COMMIT")
+                    continue
+                report["writes_deleted"] += con.execute("DELETE FROM writes WHERE thread_id = ?", (tid,)).rowcount
+                report["checkpoints_deleted"] += con.execute("DELETE FROM checkpoints WHERE thread_id = ?", (tid,)).rowcount
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            report["threads_expired"] += 1
+
+    def _trim(self, con: sqlite3.Connection, report: Dict[str, Any]) -> None:
+        over = con.execute(
+            "SELECT thread_id, checkpoint_ns FROM checkpoints GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?",
+            (self.keep,),
+        ).fetchall()
+        for tid, ns in over:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # oldest checkpoint id we keep; everything before it goes
+                row = con.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                    (tid, ns, self.keep - 1),
+                ).fetchone()
+                if row is not None:
+                    args = (tid, ns, row[0])
+                    report["writes_deleted"] += con.execute(
+                        "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", args).rowcount
+                    report["checkpoints_deleted"] += con.execute(
+                        "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", args).rowcount
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+
+    def _reclaim(self, con: sqlite3.Connection, report: Dict[str, Any]) -> None:
+        if self.vacuum_free <= 0:
+            return
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+            return  # full VACUUM only, which is left to the CLI
+        free, pages = con.execute("PRAGMA freelist_count").fetchone()[0], con.execute("PRAGMA page_count").fetchone()[0]
+        if not pages or free / pages < self.vacuum_free:
+            return
+        # each step is its own short write transaction
+        while free > 0 and not self._stop.is_set():
+            con.execute(f"PRAGMA incremental_vacuum({min(free, _RECLAIM_STEP)})").fetchall()
+            left = con.execute("PRAGMA freelist_count").fetchone()[0]
+            if left >= free:
+                break
+            report["pages_reclaimed"] += free - left
+            free = left
+        con.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keep": self.keep, "ttl_days": self.ttl_s / 86400.0, "interval_s": self.interval_s,
+            "vacuum_free": self.vacuum_free, "running": self._thread is not None and not self._stop.is_set(),
+            **self.totals, "last": self.last,
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=str(CHECKPOINT_DB))
+    ap.add_argument("--keep", type=int, default=CHECKPOINT_KEEP, help="checkpoints kept per thread (0 = all)")
+    ap.add_argument("--ttl-days", type=float, default=CHECKPOINT_TTL_DAYS, help="drop threads idle this long (0 = never)")
+    ap.add_argument("--vacuum", action="store_true",
+                    help="full VACUUM and switch to auto_vacuum=INCREMENTAL; stop the API first")
+    args = ap.parse_args(argv)
+    size = lambda p: sum(f.stat().st_size for f in (p, Path(f"{p}-wal")) if f.exists())
+    db = Path(args.db)
+    before = size(db)
+    report = CheckpointJanitor(db, keep=args.keep, ttl_days=args.ttl_days).run_once(vacuum=args.vacuum)
+    print({**report, "bytes_before": before, "bytes_after": size(db)})
+
+
+if __name__ == "__main__":
+    main()
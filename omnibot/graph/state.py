@@ -1,14 +1,16 @@
 from typing import TypedDict, Annotated, Sequence, List, Dict, Any
 
 from langchain_core.messages import BaseMessage
-from langgraph.graph.message import add_messages
+
+from omnibot.graph.memory import add_bounded_messages, merge_memory
 
 
 class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    messages: Annotated[Sequence[BaseMessage], add_bounded_messages]   # keeps the last RAG_MESSAGES_KEEP
     route: str
-    context_pdf: str
-    citations_pdf: List[Dict[str, Any]]
-    context_claims: str
-    citations_claims: List[Dict[str, Any]]
+    intent: str              # guardrail label for the current turn
+    # retrieved chunks are kept by reference (chunk ids), never as inline context text
+    context_ids_pdf: List[str]
+    context_ids_claims: List[str]
+    memory: Annotated[Dict[str, Any], merge_memory]   # bounded rolling history, see omnibot.graph.memory
     elapsed: float
\ No newline at end of file
@@ -1,11 +1,15 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Tuple, Literal, Optional
-import os, math
+from typing import List, Tuple, Literal, Optional, Sequence
+import asyncio
+import os
+import re
 import numpy as np
-from langchain_openai import OpenAIEmbeddings
 
-Label = Literal["in_scope", "medical", "off_topic"]
+from omnibot.clients.registry import get_embeddings
+from omnibot.embeddings.prototypes import PrototypeSet
+
+Label = Literal["in_scope", "medical", "off_topic", "unavailable"]
 
 # ---- Seeds  ----
 SEEDS_IN_SCOPE: List[str] = [
@@ -114,31 +118,106 @@ class IntentConfig:
     th_in_scope: float = float(os.getenv("INTENT_TH_IN_SCOPE", "0.30"))
     th_medical: float = float(os.getenv("INTENT_TH_MEDICAL", "0.30"))
     th_off_topic: float = float(os.getenv("INTENT_TH_OFF_TOPIC", "0.30"))
+    # async path (aclassify, FusedClassifier)
+    lexical_fast_path: bool = os.getenv("INTENT_LEXICAL_FAST_PATH", "true").lower() == "true"
+    lexical_prior: float = float(os.getenv("INTENT_LEXICAL_PRIOR", "0.05"))  # cosine bonus for the lexical label
+    timeout_s: float = float(os.getenv("INTENT_TIMEOUT_S", "2.0"))
+    fail_mode: str = os.getenv("INTENT_FAIL_MODE", "open").lower()  # open -> in_scope | closed -> unavailable
+
+# ---- Lexical fast-path ----
+# Only high-precision phrases: benefits/claims vocabulary (-> in_scope) and explicit
+# dosing instructions (-> medical). Topic words alone ("diagnosis", "drug", "music",
+# "news") are left to the embedding, since plan questions use them all the time.
+_LEX_IN_SCOPE = re.compile(
+    r"\b(claims?|eobs?|explanation of benefits?|deductibles?|co-?pays?|coinsurance|out[- ]of[- ]pocket|oopm|"
+    r"prior auth\w*|pre-?auth\w*|formulary|in[- ]network|out[- ]of[- ]network|evidence of coverage|eoc|"
+    r"covered|coverage|member id|reclamos?|deducible|copagos?)\b",
+    re.I,
+)
+_LEX_DOSAGE = re.compile(
+    r"\b(how (much|many)\b[^?.!]{0,40}\bshould i (take|give)|how often should i take|"
+    r"(double|triple|skip|increase|decrease|raise|lower|change) my (dose|dosage)|"
+    r"what (dose|dosage) (of|should))\b",
+    re.I,
+)
+
+def lexical_label(text: str) -> Optional[Label]:
+    """Cheap regex decision for unambiguous cases; None (embed it) otherwise."""
+    text = text or ""
+    in_scope, dosage = bool(_LEX_IN_SCOPE.search(text)), bool(_LEX_DOSAGE.search(text))
+    if in_scope == dosage:
+        return None
+    return "in_scope" if in_scope else "medical"
 
-def _cos_sim(a: np.ndarray, b: np.ndarray) -> float:
-    na = np.linalg.norm(a); nb = np.linalg.norm(b)
-    if na == 0 or nb == 0: return 0.0
-    return float(np.dot(a, b) / (na * nb))
+# one prototype group per label; PrototypeSet normalizes them once (float32)
+INTENT_SEEDS = {"in_scope": SEEDS_IN_SCOPE, "medical": SEEDS_MEDICAL, "off_topic": SEEDS_OFF_TOPIC}
+_SCORE_ORDER: Tuple[Label, ...] = ("in_scope", "medical", "off_topic")   # argument order of _decide
 
 class IntentClassifier:
     def __init__(self, cfg: IntentConfig):
         self.cfg = cfg
-        self._emb = OpenAIEmbeddings(model=cfg.embed_model)
-        self._proto_in  = np.array(self._emb.embed_documents(SEEDS_IN_SCOPE),  dtype=float)
-        self._proto_med = np.array(self._emb.embed_documents(SEEDS_MEDICAL),   dtype=float)
-        self._proto_off = np.array(self._emb.embed_documents(SEEDS_OFF_TOPIC), dtype=float)  # NEW
+        self._emb = get_embeddings(cfg.embed_model)
+        # memory-mapped from the on-disk artifact; re-embedded only when seeds/model change
+        self.protos = PrototypeSet.load_or_build(self._emb, INTENT_SEEDS, name="intent", model=cfg.embed_model)
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.asarray(self._emb.embed_query(text), dtype=np.float32)
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self._emb.embed_documents(list(texts)), dtype=np.float32)
 
     def classify(self, text: str) -> Tuple[Label, dict]:
-        v = np.array(self._emb.embed_query(text), dtype=float)
+        return self.classify_vector(self.embed(text))
 
-        sims_in  = [_cos_sim(v, p) for p in self._proto_in]
-        sims_md  = [_cos_sim(v, p) for p in self._proto_med]
-        sims_off = [_cos_sim(v, p) for p in self._proto_off]
+    async def aclassify(self, text: str) -> Tuple[Label, dict]:
+        label, scores, _ = await self.aclassify_with_vector(text)
+        return label, scores
 
-        s_in  = max(sims_in)  if sims_in  else 0.0
-        s_md  = max(sims_md)  if sims_md  else 0.0
-        s_off = max(sims_off) if sims_off else 0.0
+    async def aclassify_with_vector(self, text: str) -> Tuple[Label, dict, Optional[np.ndarray]]:
+        """
+        Non-blocking guardrail for the async handlers, with the same semantics as
+        FusedClassifier.classify: async embedding bounded by `timeout_s` (failing
+        open/closed per `fail_mode`), a lexical hit only biasing the scores. The
+        vector (if any) is returned so the router can reuse it.
+        """
+        lex = lexical_label(text) if self.cfg.lexical_fast_path else None
+        try:
+            raw = await asyncio.wait_for(self._emb.aembed_query(text), timeout=self.cfg.timeout_s)
+        except Exception as e:  # timeout or embedding backend error
+            label: Label = "in_scope" if self.cfg.fail_mode == "open" else "unavailable"
+            return label, {"source": "timeout" if isinstance(e, asyncio.TimeoutError) else "error"}, None
+        v = np.asarray(raw, dtype=np.float32)
+        label, scores = self.classify_vector(v, lex)
+        return label, {**scores, "source": "lexical+embedding" if lex is not None else "embedding"}, v
 
+    def classify_vector(self, v: np.ndarray, prior: Optional[Label] = None) -> Tuple[Label, dict]:
+        """
+        Classify an already-embedded query (lets the router reuse the same vector).
+        `prior` (a lexical label) adds `lexical_prior` to that label's score.
+        """
+        s = self.protos.scores(v)
+        return self._decide(*self._boost((s["in_scope"], s["medical"], s["off_topic"]), prior))
+
+    def classify_many(self, texts: Sequence[str]) -> List[Tuple[Label, dict]]:
+        """Batch classify: one embedding call and one matrix multiply for all texts."""
+        if not texts:
+            return []
+        return self.classify_vectors(self.embed_many(texts))
+
+    def classify_vectors(self, vectors: np.ndarray, priors: Sequence[Optional[Label]] = ()) -> List[Tuple[Label, dict]]:
+        s = self.protos.scores_many(vectors)
+        return [
+            self._decide(*self._boost((float(a), float(b), float(c)), priors[j] if j < len(priors) else None))
+            for j, (a, b, c) in enumerate(zip(s["in_scope"], s["medical"], s["off_topic"]))
+        ]
+
+    def _boost(self, scores: Tuple[float, float, float], prior: Optional[Label]) -> Tuple[float, float, float]:
+        if prior not in _SCORE_ORDER:
+            return scores
+        i = _SCORE_ORDER.index(prior)
+        return tuple(v + self.cfg.lexical_prior if k == i else v for k, v in enumerate(scores))  # type: ignore[return-value]
+
+    def _decide(self, s_in: float, s_md: float, s_off: float) -> Tuple[Label, dict]:
         # Picking the strongest class if it clears its threshold
         if s_md >= self.cfg.th_medical and s_md >= s_in and s_md >= s_off:
             label: Label = "medical"
@@ -151,4 +230,3 @@ class IntentClassifier:
             label = "off_topic" if max(s_off, s_md, s_in) == s_off else ("medical" if s_md >= s_in else "in_scope")
 
         return label, {"score_in_scope": s_in, "score_medical": s_md, "score_off_topic": s_off}
-
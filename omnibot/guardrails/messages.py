@@ -1,5 +1,5 @@
 from typing import Optional, Literal
-Label = Literal["in_scope", "medical", "off_topic"]
+Label = Literal["in_scope", "medical", "off_topic", "unavailable"]
 
 def guardrail_reply(kind: Label) -> Optional[str]:
     if kind == "off_topic":
@@ -18,4 +18,8 @@ def guardrail_reply(kind: Label) -> Optional[str]:
             "through Zocdoc. If this might be urgent (e.g., chest pain or trouble breathing), please "
             "seek in-person care or call your local emergency number."
         )
+    if kind == "unavailable":
+        return (
+            "I’m having trouble checking your question right now. Please try again in a moment."
+        )
     return None
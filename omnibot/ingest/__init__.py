@@ -1,6 +1,11 @@
 """Ingestion entry points to build vector stores."""
 
-from .claims_ingest import main as build_claims_store
-from .pdf_ingest import main as build_pdf_store
+from omnibot._lazy import lazy_exports
 
-__all__ = ["build_claims_store", "build_pdf_store"]
+_EXPORTS = {
+    "build_claims_store": (".claims_ingest", "main"),
+    "build_pdf_store": (".pdf_ingest", "main"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
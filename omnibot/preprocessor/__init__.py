@@ -1,17 +1,14 @@
 """FHIR preprocessing utilities (JSON Bundle → flat text)."""
 
-from .fhir_preprocessor import (
-    flatten_eob_bundle,
-    extract_patient_from_eob_bundle,
-    derive_eob_summary,
-    flatten,
-    main as preprocess_fhir,
-)
+from omnibot._lazy import lazy_exports
 
-__all__ = [
-    "flatten_eob_bundle",
-    "extract_patient_from_eob_bundle",
-    "derive_eob_summary",
-    "flatten",
-    "preprocess_fhir",
-]
+_EXPORTS = {
+    "flatten_eob_bundle": (".fhir_preprocessor", "flatten_eob_bundle"),
+    "extract_patient_from_eob_bundle": (".fhir_preprocessor", "extract_patient_from_eob_bundle"),
+    "derive_eob_summary": (".fhir_preprocessor", "derive_eob_summary"),
+    "flatten": (".fhir_preprocessor", "flatten"),
+    "preprocess_fhir": (".fhir_preprocessor", "main"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -1,5 +1,18 @@
 """Routing utilities: decides between pdf | claims | both."""
 
-from .router import fast_route
+from omnibot._lazy import lazy_exports
 
-__all__ = ["fast_route"]
+_EXPORTS = {
+    "fast_route": (".router", "fast_route"),
+    "get_router_chain": (".router", "get_router_chain"),
+    "SemanticRouter": (".semantic_router", "SemanticRouter"),
+    "RouterConfig": (".semantic_router", "RouterConfig"),
+    "get_semantic_router": (".semantic_router", "get_semantic_router"),
+    "route_question": (".semantic_router", "route_question"),
+    "FusedClassifier": (".fused", "FusedClassifier"),
+    "Decision": (".fused", "Decision"),
+    "get_fused_classifier": (".fused", "get_fused_classifier"),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,188 @@
+# omnibot/router/fused.py
+"""
+Single-pass guardrail + router: intent (in_scope | medical | off_topic) and route
+(pdf | claims | both) from ONE query embedding.
+
+Both decisions are nearest-prototype lookups against memory-mapped seed matrices,
+so after the embedding they cost two mat-vecs. Confidences are temperature-scaled
+softmaxes over the per-class max cosine scores (RAG_FUSED_TEMPERATURE); tune the
+temperature on labelled traffic so that e.g. 0.8 means right ~80% of the time.
+
+The lexical fast-path is a prior, not a decision: its label gets INTENT_LEXICAL_PRIOR
+added to its cosine score before the intent is picked. The LLM router is only called
+when the local route is unsure (or RAG_ROUTER_MODE=llm).
+"""
+from __future__ import annotations
+import asyncio
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from omnibot.config.constants import ROUTER_MODE
+from omnibot.guardrails.intent_semantic import IntentClassifier, IntentConfig, Label, lexical_label
+from .router import fast_route
+from .semantic_router import SemanticRouter, get_semantic_router
+
+FUSED_TEMPERATURE = float(os.getenv("RAG_FUSED_TEMPERATURE", "0.05"))
+
+
+def softmax_confidence(scores: Dict[str, float], label: str, temperature: float = FUSED_TEMPERATURE) -> float:
+    """P(label) under softmax(scores / T); cosine gaps are small, so T << 1."""
+    if label not in scores:
+        return 0.0
+    t = max(temperature, 1e-6)
+    top = max(scores.values())
+    exps = {k: math.exp((v - top) / t) for k, v in scores.items()}
+    return exps[label] / sum(exps.values())
+
+
+@dataclass
+class Decision:
+    intent: Label
+    intent_confidence: float
+    route: Optional[str]                  # None unless intent == "in_scope"
+    route_confidence: float
+    source: str                           # embedding | lexical+embedding | timeout | error
+    route_source: str = ""                # local | llm
+    scores: Dict[str, float] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage: guardrail, route
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class FusedClassifier:
+    def __init__(self, intent: Optional[IntentClassifier] = None, router: Optional[SemanticRouter] = None):
+        self.intent = intent or IntentClassifier(IntentConfig())
+        self.router = router or get_semantic_router()
+        self.cfg = self.intent.cfg
+        self._emb = self.intent._emb
+        # one query embedding feeds both prototype sets, so they must share its model and width
+        if self.cfg.embed_model != self.router.cfg.embed_model:
+            raise ValueError(
+                f"intent model {self.cfg.embed_model!r} != router model {self.router.cfg.embed_model!r}; "
+                "set INTENT_EMBED_MODEL and RAG_EMBED_MODEL to the same model"
+            )
+        if self.intent.protos.matrix.shape[1] != self.router.protos.matrix.shape[1]:
+            raise ValueError(
+                f"intent prototypes are {self.intent.protos.matrix.shape[1]}-d, "
+                f"router prototypes {self.router.protos.matrix.shape[1]}-d"
+            )
+
+    # ---------- sync (vector already known) ----------
+    def decide_vector(self, vector: np.ndarray, prior: Optional[Label] = None) -> Decision:
+        """Both decisions from one vector; route is None when the local router is unsure."""
+        label, iscores = self.intent.classify_vector(vector, prior)
+        return self._decide(label, iscores, self.router.protos.scores(vector), prior)
+
+    def decide_vectors(self, vectors: np.ndarray, priors: Sequence[Optional[Label]] = ()) -> List[Decision]:
+        """Batch form of `decide_vector`: one matrix multiply per prototype set."""
+        intents = self.intent.classify_vectors(vectors, priors)
+        routes = self.router.protos.scores_many(vectors)
+        return [
+            self._decide(label, iscores, {k: float(v[j]) for k, v in routes.items()},
+                         priors[j] if j < len(priors) else None)
+            for j, (label, iscores) in enumerate(intents)
+        ]
+
+    def _decide(self, label: Label, iscores: Dict[str, float], rscores: Dict[str, float],
+                prior: Optional[Label]) -> Decision:
+        intent_scores = {k[len("score_"):]: v for k, v in iscores.items()}
+        scores = {**intent_scores, **{f"route_{k}": v for k, v in rscores.items()}}
+        conf = softmax_confidence(intent_scores, label)
+        source = "lexical+embedding" if prior is not None else "embedding"
+        if label != "in_scope":
+            return Decision(label, conf, None, 0.0, source, scores=scores)
+        route, _, _ = self.router.route_scores(rscores)
+        if route is None:
+            return Decision(label, conf, None, 0.0, source, scores=scores)
+        return Decision(label, conf, route, softmax_confidence(rscores, route), source, "local", scores)
+
+    # ---------- async (request path) ----------
+    async def classify(self, text: str) -> Decision:
+        """
+        One async embedding (bounded by the guardrail timeout) feeds both decisions;
+        a lexical hit only biases the intent scores.
+        """
+        t0 = time.perf_counter()
+        text = text or ""
+        lex = lexical_label(text) if self.cfg.lexical_fast_path else None
+        try:
+            raw = await asyncio.wait_for(self._emb.aembed_query(text), timeout=self.cfg.timeout_s)
+        except Exception as e:  # timeout or embedding backend error
+            source = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            t1 = time.perf_counter()
+            if self.cfg.fail_mode != "open":
+                return Decision("unavailable", 1.0, None, 0.0, source, timings={"guardrail": t1 - t0})
+            route = await fast_route(text)
+            return Decision("in_scope", 0.0, route, 0.0, source, "llm",
+                            timings={"guardrail": t1 - t0, "route": time.perf_counter() - t1})
+
+        vector = np.asarray(raw, dtype=np.float32)
+        t_embed = time.perf_counter()
+        d = self.decide_vector(vector, lex)
+        t1 = time.perf_counter()
+        d.timings["guardrail"] = t1 - t0
+        if d.intent != "in_scope":
+            return d
+        if ROUTER_MODE == "llm":
+            d.route, d.route_source = await fast_route(text), "llm"
+        else:
+            # decide_vector already routed locally; the LLM only when that was unsure
+            self.router.record(d.route is not None, t1 - t_embed)
+            if d.route is None:
+                d.route, d.route_source = await fast_route(text), "llm"
+        d.timings["route"] = time.perf_counter() - t1
+        return d
+
+    async def classify_many(self, texts: Sequence[str]) -> Tuple[List[Decision], List[Optional[np.ndarray]]]:
+        """
+        Batch path (/chat/batch): ONE embedding call for all texts (lexical hits as
+        priors), one mat-mul per prototype set; the LLM router only for unsure routes.
+        Returns decisions and the query vectors (None where no embedding was made).
+        """
+        texts = [t or "" for t in texts]
+        decisions: List[Optional[Decision]] = [None] * len(texts)
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        lex = [lexical_label(t) if self.cfg.lexical_fast_path else None for t in texts]
+
+        if texts:
+            try:
+                raw = await self._emb.aembed_documents(texts)
+            except Exception:
+                raw = None
+            if raw is None:
+                for i in range(len(texts)):
+                    decisions[i] = (Decision("in_scope", 0.0, None, 0.0, "error") if self.cfg.fail_mode == "open"
+                                    else Decision("unavailable", 1.0, None, 0.0, "error"))
+            else:
+                matrix = np.asarray(raw, dtype=np.float32)
+                for i, d in enumerate(self.decide_vectors(matrix, lex)):
+                    decisions[i], vectors[i] = d, matrix[i]
+                    if d.intent == "in_scope" and ROUTER_MODE != "llm":
+                        self.router.record(d.route is not None)
+
+        unsure = [i for i, d in enumerate(decisions)
+                  if d.intent == "in_scope" and (d.route is None or ROUTER_MODE == "llm")]
+        # concurrent, but bounded by the shared Ollama limiter
+        for i, route in zip(unsure, await asyncio.gather(*(fast_route(texts[i]) for i in unsure))):
+            decisions[i].route, decisions[i].route_source = route, "llm"
+        return decisions, vectors  # type: ignore[return-value]
+
+
+_fused: Optional[FusedClassifier] = None
+_fused_lock = threading.Lock()
+
+
+def get_fused_classifier() -> FusedClassifier:
+    """Process-wide instance (shares the router singleton and its prototypes)."""
+    global _fused
+    with _fused_lock:
+        if _fused is None:
+            _fused = FusedClassifier()
+        return _fused
@@ -1,17 +1,21 @@
 from __future__ import annotations
-from langchain_ollama import OllamaLLM
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from functools import lru_cache
 from omnibot.config.prompts import ROUTER_PROMPT
 from omnibot.config.constants import ROUTER_MODEL, ROUTER_KWARGS
 
-router_prompt = ChatPromptTemplate.from_template(ROUTER_PROMPT)
-router_llm = OllamaLLM(model=ROUTER_MODEL, **ROUTER_KWARGS)
-router_chain = router_prompt | router_llm | StrOutputParser()
+@lru_cache(maxsize=1)
+def get_router_chain():
+    """Prompt | Ollama | parser, built on the first LLM-routed question (not at import)."""
+    from langchain.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    from omnibot.clients.registry import get_ollama_llm
+    router_llm = get_ollama_llm(ROUTER_MODEL, **ROUTER_KWARGS)
+    return ChatPromptTemplate.from_template(ROUTER_PROMPT) | router_llm | StrOutputParser()
 
 async def fast_route(question: str) -> str:
+    from omnibot.clients.registry import ainvoke_limited
     try:
-        out = await router_chain.ainvoke({"question": question})
+        out = await ainvoke_limited("ollama", get_router_chain(), {"question": question})
         ans = (out or "").strip().lower()
         if ans in {"pdf", "claims", "both"}:
             return ans
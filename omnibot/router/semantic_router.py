@@ -0,0 +1,149 @@
+# omnibot/router/semantic_router.py
+"""
+Nearest-prototype router: pdf | claims | both from the query embedding.
+
+Uses the same normalized-prototype approach as the intent guardrail, so when the
+guardrail has already embedded the question, routing is a single mat-vec (µs).
+The LLM router (`fast_route`) is only consulted when the margin between the two
+best classes is below `min_margin`.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from omnibot.clients.registry import get_embeddings
+from omnibot.config.constants import EMBED_MODEL, ROUTER_MODE
+from omnibot.embeddings.prototypes import PrototypeSet, top_two
+from .router import fast_route
+
+# ---- Seeds ----
+SEEDS_PDF: List[str] = [
+    "What is my copay for a specialist visit?",
+    "What does my plan cover for preventive care?",
+    "Is physical therapy covered and how many visits are allowed?",
+    "What is my deductible and out-of-pocket maximum?",
+    "Do I need prior authorization for an MRI?",
+    "Do I need a referral to see a cardiologist?",
+    "What are the rules for out-of-network care?",
+    "Show the Evidence of Coverage section about emergency care.",
+    "What dental and vision services are covered?",
+    "What is my copay for generic and brand-name drugs?",
+    "Are ambulance services covered?",
+    "How do I change my primary care physician?",
+    "What services are excluded from my plan?",
+    "What is the coinsurance for hospital stays?",
+    "¿Cuál es mi copago para especialistas?",
+]
+
+SEEDS_CLAIMS: List[str] = [
+    "Show my latest claim.",
+    "List all my claims from last month.",
+    "How much do I owe on my recent claim?",
+    "Why was my claim denied?",
+    "What was the billed amount and allowed amount on my claim?",
+    "What diagnosis codes are on my claim?",
+    "What procedure codes were billed on my last visit?",
+    "What is the status of my claim?",
+    "Show the explanation of benefits for my claim.",
+    "What was the date of service for my last claim?",
+    "How much did the plan pay for my last visit?",
+    "What is the total out-of-pocket across my claims?",
+    "Which provider submitted this claim?",
+    "Muestra mi último reclamo y cuánto debo.",
+]
+
+SEEDS_BOTH: List[str] = [
+    "Does my plan cover this service and what was paid on my last claim?",
+    "Why did I pay this amount on my claim given my plan's copay?",
+    "Was my last claim processed according to my plan's deductible rules?",
+    "My claim was denied; does my Evidence of Coverage say it should be covered?",
+    "Compare what I paid on my claim with the copay listed in my plan.",
+    "How much of my deductible did my claims use and what is left under my plan?",
+    "Was the coinsurance on my claim correct according to my benefits?",
+    "Should this claim have required prior authorization under my plan?",
+    "Is the amount I owe on my claim more than my plan's out-of-pocket maximum?",
+]
+
+ROUTE_SEEDS: Dict[str, Sequence[str]] = {"pdf": SEEDS_PDF, "claims": SEEDS_CLAIMS, "both": SEEDS_BOTH}
+
+
+@dataclass
+class RouterConfig:
+    embed_model: str = EMBED_MODEL
+    min_margin: float = float(os.getenv("RAG_ROUTER_MIN_MARGIN", "0.04"))
+    min_score: float = float(os.getenv("RAG_ROUTER_MIN_SCORE", "0.25"))
+
+
+class SemanticRouter:
+    def __init__(self, cfg: Optional[RouterConfig] = None):
+        self.cfg = cfg or RouterConfig()
+        self._emb = get_embeddings(self.cfg.embed_model)
+        self.protos = PrototypeSet.load_or_build(self._emb, ROUTE_SEEDS, name="router", model=self.cfg.embed_model)
+        self._lock = threading.Lock()
+        self._counts = {"local": 0, "llm_fallback": 0}
+        self._local_seconds = 0.0
+
+    def route_vector(self, vector) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """(route or None when not confident, margin, per-route scores)."""
+        return self.route_scores(self.protos.scores(vector))
+
+    def route_scores(self, scores: Dict[str, float]) -> Tuple[Optional[str], float, Dict[str, float]]:
+        best, s1, margin = top_two(scores)
+        if s1 < self.cfg.min_score or margin < self.cfg.min_margin:
+            return None, margin, scores
+        return best, margin, scores
+
+    async def aroute(self, question: str, vector=None) -> str:
+        """Route locally from the (reused) query embedding; fall back to the LLM when unsure."""
+        if vector is None:
+            vector = await self._emb.aembed_query(question or "")
+        t0 = time.perf_counter()
+        route, _, _ = self.route_vector(vector)
+        self.record(route is not None, time.perf_counter() - t0)
+        if route is not None:
+            return route
+        return await fast_route(question)
+
+    def record(self, local: bool, seconds: float = 0.0) -> None:
+        """Count a routing decision made elsewhere from this router's scores (e.g. the fused classifier)."""
+        with self._lock:
+            if local:
+                self._counts["local"] += 1
+                self._local_seconds += seconds
+            else:
+                self._counts["llm_fallback"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            local = self._counts["local"]
+            fallback = self._counts["llm_fallback"]
+            total = local + fallback
+            return {
+                "local": local,
+                "llm_fallback": fallback,
+                "llm_fallback_rate": (fallback / total) if total else 0.0,
+                "local_decision_avg_us": (self._local_seconds / local * 1e6) if local else 0.0,
+            }
+
+
+_router: Optional[SemanticRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_semantic_router() -> SemanticRouter:
+    """Process-wide router instance (prototypes are embedded once)."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = SemanticRouter()
+        return _router
+
+
+async def route_question(question: str, vector=None) -> str:
+    """Entry point used by the graph and the API; honours RAG_ROUTER_MODE (semantic|llm)."""
+    if ROUTER_MODE == "llm":
+        return await fast_route(question)
+    return await get_semantic_router().aroute(question, vector=vector)
@@ -11,7 +11,92 @@ export type StreamHandlers = {
   onError?: (err: any) => void;
 };
 
+// ---------- WebSocket transport (/ws/chat) ----------
+// One socket per page, questions multiplexed by request id; falls back to SSE
+// whenever the socket can't be opened.
+type WsMessage = { id: string | null; event: string; data: any };
+
+const WS_CREDIT = 64;
+
+class ChatSocket {
+  private ws: WebSocket | null = null;
+  private ready: Promise<WebSocket> | null = null;
+  private handlers = new Map<string, (m: WsMessage) => void>();
+  private spent = new Map<string, number>();
+  private seq = 0;
+
+  private connect(): Promise<WebSocket> {
+    if (this.ready) return this.ready;
+    this.ready = new Promise((resolve, reject) => {
+      const proto = location.protocol === "https:" ? "wss:" : "ws:";
+      const ws = new WebSocket(`${proto}//${location.host}/ws/chat`);
+      ws.onopen = () => { this.ws = ws; resolve(ws); };
+      ws.onmessage = (ev) => {
+        let m: WsMessage;
+        try { m = JSON.parse(ev.data); } catch { return; }
+        if (m.id != null) this.handlers.get(m.id)?.(m);
+      };
+      ws.onclose = () => {
+        this.ws = null;
+        this.ready = null;
+        reject(new Error("websocket closed"));
+        for (const [id, fn] of this.handlers) fn({ id, event: "error", data: { reason: "closed" } });
+        this.handlers.clear();
+        this.spent.clear();
+      };
+    });
+    return this.ready;
+  }
+
+  private send(msg: object) {
+    this.ws?.send(JSON.stringify(msg));
+  }
+
+  async ask(text: string, threadId: string, onMessage: (m: WsMessage) => void): Promise<() => void> {
+    const ws = await this.connect();
+    const id = `q${++this.seq}`;
+    this.spent.set(id, 0);
+    this.handlers.set(id, (m) => {
+      if (m.event === "token") {
+        // hand credit back in halves so the server never stalls on a reading client
+        const n = (this.spent.get(id) || 0) + 1;
+        if (n >= WS_CREDIT / 2) { this.send({ type: "credit", id, n }); this.spent.set(id, 0); }
+        else this.spent.set(id, n);
+      }
+      if (m.event === "final" || m.event === "cancelled" || m.event === "error") {
+        this.handlers.delete(id);
+        this.spent.delete(id);
+      }
+      onMessage(m);
+    });
+    ws.send(JSON.stringify({ type: "ask", id, text, thread_id: threadId, credit: WS_CREDIT }));
+    return () => {
+      if (this.handlers.delete(id)) this.send({ type: "cancel", id });
+      this.spent.delete(id);
+    };
+  }
+}
+
+const chatSocket = typeof WebSocket !== "undefined" ? new ChatSocket() : null;
+
 export function streamChat(text: string, threadId: string, h: StreamHandlers) {
+  let closed = false;
+  let close = () => { closed = true; };
+  if (!chatSocket) return streamChatSSE(text, threadId, h);
+
+  chatSocket.ask(text, threadId, (m) => {
+    if (m.event === "route") h.onRoute?.(m.data.route);
+    else if (m.event === "token") h.onToken?.(m.data.agent, m.data.token);
+    else if (m.event === "final") h.onFinal?.(m.data.answer || "");
+    else if (m.event === "error") h.onError?.(m.data);
+  }).then(
+    (cancel) => { if (closed) cancel(); else close = cancel; },
+    () => { if (!closed) close = streamChatSSE(text, threadId, h); },
+  );
+  return () => close();
+}
+
+function streamChatSSE(text: string, threadId: string, h: StreamHandlers) {
   const url = `/chat/stream?text=${encodeURIComponent(text)}&thread_id=${encodeURIComponent(threadId)}`;
   const es = new EventSource(url);
 
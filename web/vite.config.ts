@@ -9,6 +9,7 @@ export default defineConfig({
       "/healthz": "http://localhost:8000",
       "/thread":  "http://localhost:8000",
       "/chat":    "http://localhost:8000",
+      "/ws":      { target: "ws://localhost:8000", ws: true },
     },
   },
 });